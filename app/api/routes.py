@@ -1,21 +1,29 @@
 from __future__ import annotations
 
-import uuid
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from google.cloud import firestore
 
 from app.auth.dependencies import require_firebase_user
-from app.jobs.enqueue import enqueue_job
-from app.jobs.models import EnqueueResponse, JobStatusResponse, TranscribeRequest
-from app.services.firestore import (
-    build_job_doc,
-    build_reel_doc,
-    workspace_job_ref,
-    workspace_reel_ref,
+from app.jobs.enqueue import queue_depths
+from app.jobs.models import (
+    MAX_BATCH_GET_JOBS,
+    EnqueueResponse,
+    JobBatchGetRequest,
+    JobBatchGetResponse,
+    JobStatusRecord,
+    JobStatusResponse,
+    TranscribeBatchRequest,
+    TranscribeBatchResponse,
+    TranscribeRequest,
 )
-from app.services.hashing import sha256_hex
+from app.jobs.retry import delayed_count
+from app.jobs.status import resolve_job_statuses
+from app.jobs.submit import submit_transcriptions
+from app.services.chunk_checkpoints import chunk_checkpoint_stats
+from app.services.circuit_breaker import breaker_states
+from app.services.provider_stats import PROVIDERS, provider_stats_summary
+from app.services.redis_client import get_redis
 
 router = APIRouter()
 
@@ -25,81 +33,35 @@ def health() -> Dict[str, Any]:
     return {"ok": True, "service": "sources-api"}
 
 
+def _invalid_reason(payload: TranscribeRequest) -> Optional[str]:
+    if not payload.workspaceId.strip():
+        return "workspaceId required"
+    if not payload.reelUrl.startswith("http"):
+        return "Invalid reelUrl"
+    return None
+
+
 @router.post("/v1/transcribe", response_model=EnqueueResponse)
 def transcribe(
     payload: TranscribeRequest,
     _claims: dict = Depends(require_firebase_user),
 ):
-    workspace_id = payload.workspaceId.strip()
-    if not workspace_id:
-        raise HTTPException(status_code=400, detail="workspaceId required")
-    if not payload.reelUrl.startswith("http"):
-        raise HTTPException(status_code=400, detail="Invalid reelUrl")
-
-    reel_id = payload.reelId.strip() if payload.reelId else ""
-    if not reel_id:
-        reel_id = sha256_hex(payload.reelUrl)
-    job_id = str(uuid.uuid4())
-
-    reel_ref = workspace_reel_ref(workspace_id, reel_id)
-    job_ref = workspace_job_ref(workspace_id, job_id)
-
-    reel_snapshot = reel_ref.get()
-    reel_data = reel_snapshot.to_dict() if reel_snapshot.exists else {}
-    if reel_data.get("transcriptText"):
-        job_ref.set(
-            build_job_doc(
-                {
-                    "jobId": job_id,
-                    "reelId": reel_id,
-                    "workspaceId": workspace_id,
-                    "status": "completed",
-                    "source": payload.source,
-                    "reelUrl": payload.reelUrl,
-                }
-            ),
-            merge=True,
-        )
-        return EnqueueResponse(
-            jobId=job_id, reelId=reel_id, workspaceId=workspace_id, status="completed"
-        )
-
-    reel_ref.set(
-        build_reel_doc(
-            {
-                "reelId": reel_id,
-                "workspaceId": workspace_id,
-                "source": payload.source,
-                "reelUrl": payload.reelUrl,
-                "postedAt": payload.postedAt,
-                "metadata": payload.metadata,
-                "status": "queued",
-                "createdAt": firestore.SERVER_TIMESTAMP,
-            }
-        ),
-        merge=True,
-    )
-
-    job_ref.set(
-        build_job_doc(
-            {
-                "jobId": job_id,
-                "reelId": reel_id,
-                "workspaceId": workspace_id,
-                "source": payload.source,
-                "reelUrl": payload.reelUrl,
-                "status": "queued",
-                "createdAt": firestore.SERVER_TIMESTAMP,
-            }
-        ),
-        merge=True,
-    )
+    reason = _invalid_reason(payload)
+    if reason:
+        raise HTTPException(status_code=400, detail=reason)
+    return submit_transcriptions([payload])[0]
 
-    enqueue_job(job_id, workspace_id)
 
-    return EnqueueResponse(
-        jobId=job_id, reelId=reel_id, workspaceId=workspace_id, status="queued"
-    )
+@router.post("/v1/transcribe:batch", response_model=TranscribeBatchResponse)
+def transcribe_batch(
+    payload: TranscribeBatchRequest,
+    _claims: dict = Depends(require_firebase_user),
+):
+    for index, item in enumerate(payload.items):
+        reason = _invalid_reason(item)
+        if reason:
+            raise HTTPException(status_code=400, detail=f"items[{index}]: {reason}")
+    return TranscribeBatchResponse(results=submit_transcriptions(payload.items))
 
 
 @router.get("/v1/jobs/{job_id}", response_model=JobStatusResponse)
@@ -111,15 +73,65 @@ def job_status(
     if not workspace_id:
         raise HTTPException(status_code=400, detail="workspaceId required")
 
-    job_ref = workspace_job_ref(workspace_id, job_id)
-    snapshot = job_ref.get()
-    if not snapshot.exists:
+    data = resolve_job_statuses(workspace_id, [job_id])[job_id]
+    if data is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    data = snapshot.to_dict() or {}
     return JobStatusResponse(
         jobId=job_id,
         workspaceId=workspace_id,
         status=data.get("status", "unknown"),
         error=data.get("error"),
     )
+
+
+def _batch_get(workspace_id: str, job_ids: List[str]) -> JobBatchGetResponse:
+    workspace_id = workspace_id.strip()
+    if not workspace_id:
+        raise HTTPException(status_code=400, detail="workspaceId required")
+    job_ids = [job_id.strip() for job_id in job_ids if job_id.strip()]
+    if not job_ids:
+        raise HTTPException(status_code=400, detail="jobIds required")
+    if len(set(job_ids)) > MAX_BATCH_GET_JOBS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_GET_JOBS} jobIds")
+
+    jobs = resolve_job_statuses(workspace_id, job_ids)
+    records = []
+    for job_id in job_ids:
+        data = jobs[job_id]
+        if data is None:
+            records.append(JobStatusRecord(jobId=job_id, status="not_found"))
+        else:
+            records.append(
+                JobStatusRecord(jobId=job_id, status=data.get("status", "unknown"), error=data.get("error"))
+            )
+    return JobBatchGetResponse(workspaceId=workspace_id, jobs=records)
+
+
+@router.get("/v1/jobs:batchGet", response_model=JobBatchGetResponse, response_model_exclude_none=True)
+def jobs_batch_get(
+    workspace_id: str = Query(..., alias="workspaceId"),
+    job_ids: List[str] = Query(..., alias="jobIds"),
+    _claims: dict = Depends(require_firebase_user),
+):
+    # Accept repeated ``jobIds`` params as well as comma-separated lists.
+    return _batch_get(workspace_id, [job_id for value in job_ids for job_id in value.split(",")])
+
+
+@router.post("/v1/jobs:batchGet", response_model=JobBatchGetResponse, response_model_exclude_none=True)
+def jobs_batch_get_post(
+    payload: JobBatchGetRequest,
+    _claims: dict = Depends(require_firebase_user),
+):
+    return _batch_get(payload.workspaceId, payload.jobIds)
+
+
+@router.get("/v1/queues")
+def queue_stats(_claims: dict = Depends(require_firebase_user)) -> Dict[str, Any]:
+    return {
+        "queues": queue_depths(get_redis()),
+        "delayed": delayed_count(),
+        "chunkCheckpoints": chunk_checkpoint_stats(),
+        "router": provider_stats_summary(),
+        "circuits": breaker_states(PROVIDERS),
+    }
@@ -1,25 +1,175 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
 
-from google.auth.transport import requests
-from google.oauth2 import id_token
+from google.auth import jwt
+from redis.exceptions import RedisError
 
 from app.config import get_settings
+from app.services.hashing import sha256_hex
+from app.services.http_client import get_http_client
+from app.services.redis_client import get_redis
 
 
-def verify_firebase_jwt(token: str) -> Dict[str, Any]:
-    settings = get_settings()
-    request = requests.Request()
+CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+CERTS_CACHE_KEY = "auth:firebase:certs"
+DEFAULT_MAX_AGE_SECONDS = 3600
+# An unknown key id forces a refetch at most this often, to pick up rotated keys early.
+MIN_REFRESH_INTERVAL_SECONDS = 60
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+logger = logging.getLogger(__name__)
+
+
+def parse_max_age(cache_control: Optional[str]) -> int:
+    match = _MAX_AGE_RE.search(cache_control or "")
+    return int(match.group(1)) if match else DEFAULT_MAX_AGE_SECONDS
+
+
+class FirebaseCerts:
+    """Google's Firebase signing certs, cached per Cache-Control max-age.
+
+    Each process keeps its own copy. Processes share fetched certs through Redis
+    (with the same TTL), so gunicorn workers do not each hit Google.
+    """
+
+    def __init__(self) -> None:
+        self._certs: Dict[str, str] = {}
+        self._expires_at = 0.0
+        self._last_fetch = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, kid: Optional[str] = None) -> Dict[str, str]:
+        with self._lock:
+            now = time.time()
+            if self._expires_at > now and (kid is None or kid in self._certs):
+                return self._certs
+            if self._load_shared(now) and (kid is None or kid in self._certs):
+                return self._certs
+            if self._certs and now - self._last_fetch < MIN_REFRESH_INTERVAL_SECONDS:
+                return self._certs
+            self._fetch(now)
+            return self._certs
+
+    def _load_shared(self, now: float) -> bool:
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.get(CERTS_CACHE_KEY)
+            pipe.ttl(CERTS_CACHE_KEY)
+            raw, ttl = pipe.execute()
+        except RedisError as exc:
+            logger.warning("Shared cert cache lookup failed: %s", exc)
+            return False
+        if raw is None or ttl is None or ttl <= 0:
+            return False
+        self._certs = json.loads(raw)
+        self._expires_at = now + ttl
+        return True
+
+    def _fetch(self, now: float) -> None:
+        resp = get_http_client().get(CERTS_URL, timeout=10.0)
+        resp.raise_for_status()
+        max_age = parse_max_age(resp.headers.get("cache-control"))
+        self._certs = resp.json()
+        self._expires_at = now + max_age
+        self._last_fetch = now
+        logger.info("Fetched Firebase signing certs keys=%s max_age=%s", len(self._certs), max_age)
+        try:
+            get_redis().set(CERTS_CACHE_KEY, json.dumps(self._certs), ex=max_age)
+        except RedisError as exc:
+            logger.warning("Shared cert cache update failed: %s", exc)
 
-    claims = id_token.verify_firebase_token(token, request, audience=settings.FIREBASE_PROJECT_ID)
 
-    iss = f"https://securetoken.google.com/{settings.FIREBASE_PROJECT_ID}"
-    if claims.get("iss") != iss:
-        raise ValueError("Invalid issuer")
-    if claims.get("aud") != settings.FIREBASE_PROJECT_ID:
-        raise ValueError("Invalid audience")
-    if settings.REQUIRE_INTERNAL_CLAIM and claims.get("internal") is not True:
-        raise ValueError("Missing internal claim")
+class FirebaseTokenVerifier:
+    """Verifies Firebase ID tokens and remembers verified ones until they expire.
 
-    return claims
+    ``certs`` replaces Google's cert endpoint with a fixed ``{kid: PEM cert}`` set,
+    for tests and local development.
+    """
+
+    def __init__(
+        self,
+        project_id: str,
+        *,
+        require_internal: bool = False,
+        certs: Optional[Mapping[str, str]] = None,
+        cache_size: int = 10000,
+    ) -> None:
+        self.project_id = project_id
+        self.require_internal = require_internal
+        self._static_certs = dict(certs) if certs is not None else None
+        self._certs = FirebaseCerts() if certs is None else None
+        self.cache_size = cache_size
+        self._verified: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, digest: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._verified.get(digest)
+            if entry is None:
+                return None
+            claims, exp = entry
+            if exp <= time.time():
+                del self._verified[digest]
+                return None
+            self._verified.move_to_end(digest)
+            return dict(claims)
+
+    def _remember(self, digest: str, claims: Dict[str, Any]) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._verified[digest] = (claims, float(claims["exp"]))
+            self._verified.move_to_end(digest)
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        digest = sha256_hex(token)
+        cached = self._cached(digest)
+        if cached is not None:
+            return cached
+
+        if self._static_certs is not None:
+            certs = self._static_certs
+        else:
+            certs = self._certs.get(jwt.decode_header(token).get("kid"))
+        claims = jwt.decode(token, certs=certs, audience=self.project_id)
+
+        iss = f"https://securetoken.google.com/{self.project_id}"
+        if claims.get("iss") != iss:
+            raise ValueError("Invalid issuer")
+        if claims.get("aud") != self.project_id:
+            raise ValueError("Invalid audience")
+        if self.require_internal and claims.get("internal") is not True:
+            raise ValueError("Missing internal claim")
+
+        self._remember(digest, claims)
+        return dict(claims)
+
+
+@lru_cache(maxsize=1)
+def get_verifier() -> FirebaseTokenVerifier:
+    settings = get_settings()
+    certs = None
+    if settings.FIREBASE_CERTS_FILE:
+        certs = json.loads(Path(settings.FIREBASE_CERTS_FILE).read_text())
+    return FirebaseTokenVerifier(
+        settings.FIREBASE_PROJECT_ID,
+        require_internal=settings.REQUIRE_INTERNAL_CLAIM,
+        certs=certs,
+        cache_size=settings.AUTH_TOKEN_CACHE_SIZE,
+    )
+
+
+def verify_firebase_jwt(token: str) -> Dict[str, Any]:
+    return get_verifier().verify(token)
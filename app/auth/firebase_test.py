@@ -0,0 +1,74 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt, jwt
+
+from app.auth.firebase import FirebaseTokenVerifier, parse_max_age
+
+
+PROJECT = "demo-project"
+
+
+def _key_set():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "test")])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(1)
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    pem_key = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    signer = crypt.RSASigner.from_string(pem_key, key_id="kid-1")
+    return signer, {"kid-1": cert.public_bytes(serialization.Encoding.PEM).decode()}
+
+
+def _token(signer, **overrides):
+    now = int(time.time())
+    claims = {
+        "iss": f"https://securetoken.google.com/{PROJECT}",
+        "aud": PROJECT,
+        "sub": "user-1",
+        "iat": now,
+        "exp": now + 3600,
+        **overrides,
+    }
+    return jwt.encode(signer, claims).decode()
+
+
+def test_verifier_accepts_local_key_set_and_caches_until_exp():
+    signer, certs = _key_set()
+    verifier = FirebaseTokenVerifier(PROJECT, certs=certs, cache_size=1)
+    token = _token(signer)
+
+    assert verifier.verify(token)["sub"] == "user-1"
+    verifier._static_certs = {}
+    assert verifier.verify(token)["sub"] == "user-1"
+
+    verifier.verify(token)["sub"] = "tampered"
+    assert verifier.verify(token)["sub"] == "user-1"
+
+
+def test_verifier_rejects_wrong_audience_and_missing_internal_claim():
+    signer, certs = _key_set()
+    with pytest.raises(ValueError):
+        FirebaseTokenVerifier(PROJECT, certs=certs).verify(_token(signer, aud="other"))
+    with pytest.raises(ValueError):
+        FirebaseTokenVerifier(PROJECT, certs=certs, require_internal=True).verify(_token(signer))
+
+
+def test_parse_max_age():
+    assert parse_max_age("public, max-age=22311, must-revalidate, no-transform") == 22311
+    assert parse_max_age(None) == 3600
@@ -20,18 +20,87 @@ class Settings(BaseSettings):
 
     FIRESTORE_REELS_COLLECTION: str = Field(default="sources_reels")
     FIRESTORE_JOBS_COLLECTION: str = Field(default="source_jobs")
+    FIRESTORE_REEL_INDEX_COLLECTION: str = Field(default="sources_reel_index")
 
     REDIS_URL: str = Field(default="redis://redis:6379/0")
     WHISPER_URL: str = Field(default="http://whisper-lb:8000/transcribe")
+    WHISPER_URLS: str = Field(default="", description="Comma-separated Whisper backends; overrides WHISPER_URL")
+    WHISPER_MAX_CONCURRENCY_PER_BACKEND: int = Field(default=4, description="Upper bound for adaptive concurrency")
+    WHISPER_HEALTH_PATH: str = Field(default="/health", description="Empty disables active health checks")
+    WHISPER_HEALTH_INTERVAL_SECONDS: int = Field(default=10)
+    WHISPER_EJECT_SECONDS: int = Field(default=30)
     ORYN_WHISPER_KEY: Optional[str] = Field(default=None)
+    WHISPER_MAX_UPLOAD_BYTES: int = Field(default=25 * 1024 * 1024)
     TMP_DIR: str = Field(default="/tmp")
+    STREAMING_INGEST: bool = Field(
+        default=False, description="Pipe yt-dlp audio straight into ffmpeg without writing the video"
+    )
+
+    AUDIO_PROFILE_LOCAL: str = Field(default="mp3", description="Audio profile for local Whisper: mp3 or opus")
+    AUDIO_PROFILE_OPENAI: str = Field(default="opus", description="Audio profile for OpenAI: mp3 or opus")
+
+    ROUTER_MODE: str = Field(default="adaptive", description="adaptive or static (duration threshold only)")
+    ROUTER_OPENAI_BUDGET_PER_HOUR: float = Field(default=0.0, description="USD per hour across workers; 0 is unlimited")
+    OPENAI_COST_PER_MINUTE: float = Field(default=0.006, description="USD per audio minute")
+    HEDGE_ENABLED: bool = Field(default=True, description="Race the other provider when the first is slow")
+    HEDGE_PERCENTILE: float = Field(default=95.0, description="Latency percentile that triggers a hedge")
+    HEDGE_MIN_DELAY_SECONDS: float = Field(default=10.0)
+    CIRCUIT_FAILURE_THRESHOLD: int = Field(default=5, description="Consecutive failures that open a provider's circuit")
+    CIRCUIT_OPEN_SECONDS: int = Field(default=60)
+
+    OPENAI_REQUESTS_PER_MINUTE: int = Field(default=50, description="Shared across all workers; 0 disables limiting")
+    OPENAI_AUDIO_SECONDS_PER_MINUTE: int = Field(default=0, description="Shared audio budget; 0 disables it")
+
+    TRANSCRIBE_CHUNK_CONCURRENCY: int = Field(default=4)
+    TRANSCRIBE_CHUNK_MIN_SECONDS: int = Field(
+        default=600, description="Audio at least this long is split and transcribed in parallel"
+    )
+
+    TRANSCRIPT_CACHE_ENABLED: bool = Field(default=True)
+    TRANSCRIPT_CACHE_MAX_ENTRIES: int = Field(default=50000)
+    TRANSCRIPT_CACHE_TTL_SECONDS: int = Field(default=30 * 24 * 3600)
+
+    CHUNK_CHECKPOINTS_ENABLED: bool = Field(
+        default=True, description="Keep chunk transcripts in Redis by audio hash so retries skip them"
+    )
+    CHUNK_CHECKPOINT_TTL_SECONDS: int = Field(default=24 * 3600)
+
+    STAGE_CACHE_ENABLED: bool = Field(default=True, description="Keep stage outputs on disk so retries resume")
+    STAGE_CACHE_TTL_SECONDS: int = Field(default=3600)
+    STAGE_CACHE_MAX_BYTES: int = Field(default=2 * 1024 * 1024 * 1024)
 
     MAX_ATTEMPTS: int = Field(default=3)
     LEASE_SECONDS: int = Field(default=300)
+    RETRY_BASE_SECONDS: float = Field(default=10.0)
+    RETRY_MAX_SECONDS: float = Field(default=600.0)
+    RETRY_POLL_SECONDS: float = Field(default=1.0)
+    PIPELINE_MODE: str = Field(
+        default="inline", description="inline (one job runs every stage) or staged (a queue per stage)"
+    )
+    WORKER_QUEUES: str = Field(
+        default="", description="Comma-separated queues or stages to serve; empty serves all"
+    )
+    WORKER_MODE: str = Field(
+        default="fork", description="fork (stock RQ), warm (long-lived process) or threaded (warm, many slots)"
+    )
+    WORKER_SLOTS: int = Field(default=0, description="Concurrent jobs in threaded mode; 0 derives from cores")
+    WORKER_SLOTS_PER_CORE: int = Field(default=4)
+    WORKER_CPU_CONCURRENCY: int = Field(default=0, description="ffmpeg stages per process; 0 means one per core")
+    WORKER_IO_CONCURRENCY: int = Field(default=0, description="Network stages per process; 0 means 8 per core")
+    PREFETCH_DEPTH: int = Field(
+        default=0, description="Warm/threaded workers claim and download this many queued jobs ahead; 0 disables"
+    )
+    WORKER_MAX_RSS_MB: int = Field(default=1024, description="Warm worker recycles above this RSS")
+    WORKER_MAX_JOBS: int = Field(default=0, description="Warm worker recycles after this many jobs; 0 disables")
+
     API_PORT: int = Field(default=8000)
     LOG_LEVEL: str = Field(default="INFO")
 
     REQUIRE_INTERNAL_CLAIM: bool = Field(default=False)
+    FIREBASE_CERTS_FILE: Optional[str] = Field(
+        default=None, description="JSON {kid: PEM cert} used instead of Google's signing certs (tests/local dev)"
+    )
+    AUTH_TOKEN_CACHE_SIZE: int = Field(default=10000, description="Verified tokens kept per API process until exp")
 
 
 @lru_cache(maxsize=1)
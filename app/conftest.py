@@ -0,0 +1,159 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+from google.cloud.firestore import Increment
+
+from app.config import get_settings
+
+
+class FakeSnapshot:
+    def __init__(self, reference: "FakeDocument", data: Optional[Dict[str, Any]]) -> None:
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocument:
+    def __init__(self, client: "FakeFirestore", path: str) -> None:
+        self.client = client
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name: str) -> "FakeCollection":
+        return FakeCollection(self.client, f"{self.path}/{name}")
+
+    def get(self, *args: Any, **kwargs: Any) -> FakeSnapshot:
+        self.client.calls.append(("get", 1))
+        return FakeSnapshot(self, self.client.docs.get(self.path))
+
+    def set(self, data: Dict[str, Any], merge: bool = False) -> None:
+        self.client.calls.append(("set", 1))
+        self.client.docs.setdefault(self.path, {}).update(data)
+
+
+class FakeCollection:
+    def __init__(self, client: "FakeFirestore", path: str) -> None:
+        self.client = client
+        self.path = path
+
+    def document(self, doc_id: str) -> FakeDocument:
+        return FakeDocument(self.client, f"{self.path}/{doc_id}")
+
+
+class FakeBatch:
+    def __init__(self, client: "FakeFirestore") -> None:
+        self.client = client
+        self.ops: List[Tuple[FakeDocument, Dict[str, Any]]] = []
+
+    def set(self, ref: FakeDocument, data: Dict[str, Any], merge: bool = False) -> None:
+        self.ops.append((ref, data))
+
+    def commit(self) -> None:
+        self.client.calls.append(("commit", len(self.ops)))
+        self.client.batches.append([ref.path for ref, _ in self.ops])
+        for ref, data in self.ops:
+            self.client.docs.setdefault(ref.path, {}).update(data)
+
+
+def _apply(target: Dict[str, Any], data: Dict[str, Any]) -> None:
+    for key, value in data.items():
+        if isinstance(value, Increment):
+            target[key] = target.get(key, 0) + value.value
+        else:
+            target[key] = value
+
+
+class FakeTransaction:
+    """Enough of ``firestore.Transaction`` for ``@firestore.transactional``: writes land on commit."""
+
+    _read_only = False
+    _max_attempts = 1
+
+    def __init__(self, client: "FakeFirestore") -> None:
+        self.client = client
+        self._id: Optional[bytes] = None
+        self.ops: List[Tuple[FakeDocument, Dict[str, Any]]] = []
+
+    def _clean_up(self) -> None:
+        self._id = None
+        self.ops = []
+
+    def _begin(self, retry_id: Optional[bytes] = None) -> None:
+        self._id = b"txn"
+
+    def _commit(self) -> None:
+        self.client.calls.append(("transaction", len(self.ops)))
+        for ref, data in self.ops:
+            _apply(self.client.docs.setdefault(ref.path, {}), data)
+        self._clean_up()
+
+    def _rollback(self) -> None:
+        self._clean_up()
+
+    def get_all(self, refs: Any) -> List[FakeSnapshot]:
+        return self.client.get_all(refs)
+
+    def set(self, ref: FakeDocument, data: Dict[str, Any], merge: bool = False) -> None:
+        self.ops.append((ref, data))
+
+    def update(self, ref: FakeDocument, data: Dict[str, Any]) -> None:
+        self.ops.append((ref, data))
+
+
+class FakeFirestore:
+    """In-memory stand-in for the Firestore client that records every round trip."""
+
+    def __init__(self) -> None:
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.calls: List[Tuple[str, int]] = []
+        self.batches: List[List[str]] = []
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, name)
+
+    def get_all(self, refs: Any) -> List[FakeSnapshot]:
+        refs = list(refs)
+        self.calls.append(("get_all", len(refs)))
+        return [FakeSnapshot(ref, self.docs.get(ref.path)) for ref in refs]
+
+    def batch(self) -> FakeBatch:
+        return FakeBatch(self)
+
+    def transaction(self) -> FakeTransaction:
+        return FakeTransaction(self)
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setenv("FIREBASE_PROJECT_ID", "test-project")
+    get_settings.cache_clear()
+    yield get_settings()
+    get_settings.cache_clear()
+
+
+@pytest.fixture
+def fake_firestore(monkeypatch, settings) -> FakeFirestore:
+    from app.services import firestore
+    from app.workers import worker
+
+    client = FakeFirestore()
+    for module in (firestore, worker):
+        monkeypatch.setattr(module, "get_firestore_client", lambda: client)
+    monkeypatch.setattr(firestore, "_workspace_roots", {})
+    return client
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.jobs import enqueue, retry, singleflight
+
+    redis = fakeredis.FakeRedis()
+    for module in (enqueue, retry, singleflight):
+        monkeypatch.setattr(module, "get_redis", lambda: redis)
+    return redis
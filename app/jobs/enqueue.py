@@ -1,18 +1,91 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
 from redis import Redis
 from rq import Queue
 
 from app.config import get_settings
+from app.services.redis_client import get_redis
 
 
 QUEUE_NAME = "sources"
 
+DOWNLOAD = "download"
+TRANSCODE = "transcode"
+TRANSCRIBE = "transcribe"
+PERSIST = "persist"
+STAGES = (DOWNLOAD, TRANSCODE, TRANSCRIBE, PERSIST)
+
+
+def stage_queue_name(stage: str) -> str:
+    return f"{QUEUE_NAME}:{stage}"
 
-def get_queue() -> Queue:
-    settings = get_settings()
-    redis_conn = Redis.from_url(settings.REDIS_URL)
-    return Queue(name=QUEUE_NAME, connection=redis_conn)
 
+def get_queue(name: str = QUEUE_NAME) -> Queue:
+    return Queue(name=name, connection=get_redis())
 
-def enqueue_job(job_id: str, workspace_id: str) -> None:
+
+def enqueue_job(job_id: str, workspace_id: str, payload: Optional[Dict[str, Any]] = None) -> None:
+    """Queue a job; ``payload`` (reelId, reelUrl, source) saves the worker a Firestore read."""
+    if get_settings().PIPELINE_MODE == "staged":
+        enqueue_stage(DOWNLOAD, {**(payload or {}), "jobId": job_id, "workspaceId": workspace_id})
+        return
     queue = get_queue()
-    queue.enqueue("app.workers.worker.process_job", job_id, workspace_id)
+    queue.enqueue("app.workers.worker.process_job", job_id, workspace_id, payload)
+
+
+def enqueue_jobs(jobs: Sequence[Tuple[str, str, Optional[Dict[str, Any]]]]) -> None:
+    """Queue many ``(job_id, workspace_id, payload)`` jobs in one Redis pipeline."""
+    if not jobs:
+        return
+    if get_settings().PIPELINE_MODE == "staged":
+        queue = get_queue(stage_queue_name(DOWNLOAD))
+        datas = [
+            Queue.prepare_data(
+                f"app.workers.pipeline.{DOWNLOAD}_stage",
+                args=({**(payload or {}), "jobId": job_id, "workspaceId": workspace_id},),
+            )
+            for job_id, workspace_id, payload in jobs
+        ]
+    else:
+        queue = get_queue()
+        datas = [
+            Queue.prepare_data("app.workers.worker.process_job", args=(job_id, workspace_id, payload))
+            for job_id, workspace_id, payload in jobs
+        ]
+    queue.enqueue_many(datas)
+
+
+def enqueue_stage(stage: str, handoff: Dict[str, Any]) -> None:
+    queue = get_queue(stage_queue_name(stage))
+    queue.enqueue(f"app.workers.pipeline.{stage}_stage", handoff)
+
+
+def worker_queue_names() -> List[str]:
+    """Queues this worker serves, most downstream first so started jobs drain."""
+    settings = get_settings()
+    if settings.WORKER_QUEUES:
+        return [
+            name if name.startswith(QUEUE_NAME) else stage_queue_name(name)
+            for name in (part.strip() for part in settings.WORKER_QUEUES.split(","))
+            if name
+        ]
+    if settings.PIPELINE_MODE == "staged":
+        return [stage_queue_name(stage) for stage in reversed(STAGES)] + [QUEUE_NAME]
+    return [QUEUE_NAME]
+
+
+def worker_queues(connection: Redis) -> List[Queue]:
+    return [Queue(name, connection=connection) for name in worker_queue_names()]
+
+
+def queue_depths(connection: Redis) -> Dict[str, Dict[str, int]]:
+    names = [QUEUE_NAME] + [stage_queue_name(stage) for stage in STAGES]
+    depths = {}
+    for name in names:
+        queue = Queue(name, connection=connection)
+        depths[name] = {
+            "queued": queue.count,
+            "started": queue.started_job_registry.count,
+            "failed": queue.failed_job_registry.count,
+        }
+    return depths
@@ -1,27 +1,50 @@
 from __future__ import annotations
 
+import logging
+import threading
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Tuple
+from typing import Any, Callable, Dict, Iterable, Tuple
 
 from google.cloud import firestore
 
 from app.config import get_settings
+from app.utils.stages import IO, stage
 from app.utils.time import utc_now
 
 
+class LeaseLostError(RuntimeError):
+    pass
+
+
 def _lease_expired(lease_until: datetime | None) -> bool:
     if not lease_until:
         return True
     return lease_until <= utc_now()
 
 
-def acquire_lease(job_ref: firestore.DocumentReference) -> Tuple[bool, Dict[str, Any]]:
+def acquire_lease(
+    job_ref: firestore.DocumentReference,
+    reel_ref_for: Callable[[str], firestore.DocumentReference] | None = None,
+    reel_id: str | None = None,
+) -> Tuple[bool, Dict[str, Any]]:
+    """Take the job lease in one transaction.
+
+    On success the result carries the job doc it read (``job``) and, with
+    ``reel_ref_for``, the job's reel doc (``reel``), so callers need not read them
+    again. A known ``reel_id`` lets both come back in a single read.
+    """
     settings = get_settings()
     db = job_ref._client
 
     @firestore.transactional
     def txn(transaction: firestore.Transaction) -> Tuple[bool, Dict[str, Any]]:
-        snapshot = job_ref.get(transaction=transaction)
+        reel_snapshot = None
+        if reel_ref_for is not None and reel_id:
+            snapshots = {s.reference.path: s for s in transaction.get_all([job_ref, reel_ref_for(reel_id)])}
+            snapshot = snapshots[job_ref.path]
+            reel_snapshot = snapshots.get(reel_ref_for(reel_id).path)
+        else:
+            snapshot = job_ref.get(transaction=transaction)
         if not snapshot.exists:
             return False, {"error": "Job not found"}
 
@@ -29,6 +52,7 @@ def acquire_lease(job_ref: firestore.DocumentReference) -> Tuple[bool, Dict[str,
         status = data.get("status")
         lease_until = data.get("leaseUntil")
         attempts = int(data.get("attempts", 0))
+        lease_token = int(data.get("leaseToken", 0)) + 1
 
         if status == "completed":
             return False, {"status": "completed"}
@@ -37,7 +61,14 @@ def acquire_lease(job_ref: firestore.DocumentReference) -> Tuple[bool, Dict[str,
             if lease_until.tzinfo is None:
                 lease_until = lease_until.replace(tzinfo=timezone.utc)
         if lease_until and not _lease_expired(lease_until):
-            return False, {"status": "leased"}
+            return False, {"status": "leased", "leaseUntil": lease_until}
+
+        reel_data: Dict[str, Any] = {}
+        if reel_ref_for is not None and data.get("reelId"):
+            if reel_snapshot is None or data["reelId"] != reel_id:
+                reel_snapshot = reel_ref_for(data["reelId"]).get(transaction=transaction)
+            if reel_snapshot.exists:
+                reel_data = reel_snapshot.to_dict() or {}
 
         new_lease = utc_now() + timedelta(seconds=settings.LEASE_SECONDS)
         transaction.update(
@@ -45,10 +76,145 @@ def acquire_lease(job_ref: firestore.DocumentReference) -> Tuple[bool, Dict[str,
             {
                 "status": "running",
                 "leaseUntil": new_lease,
+                "leaseToken": lease_token,
                 "attempts": attempts + 1,
                 "updatedAt": firestore.SERVER_TIMESTAMP,
             },
         )
-        return True, {"attempts": attempts + 1}
+        return True, {
+            "attempts": attempts + 1,
+            "leaseToken": lease_token,
+            "job": {**data, "attempts": attempts + 1, "leaseToken": lease_token},
+            "reel": reel_data,
+        }
+
+    return txn(db.transaction())
+
+
+def _check_token(snapshot, lease_token: int) -> None:
+    data = (snapshot.to_dict() or {}) if snapshot.exists else {}
+    if int(data.get("leaseToken", 0)) != lease_token:
+        raise LeaseLostError(f"Lease token {lease_token} superseded")
+
+
+def renew_lease(
+    job_ref: firestore.DocumentReference,
+    lease_token: int,
+    fields: Dict[str, Any] | None = None,
+) -> datetime:
+    settings = get_settings()
+    db = job_ref._client
+
+    @firestore.transactional
+    def txn(transaction: firestore.Transaction) -> datetime:
+        _check_token(job_ref.get(transaction=transaction), lease_token)
+        new_lease = utc_now() + timedelta(seconds=settings.LEASE_SECONDS)
+        transaction.update(job_ref, {**(fields or {}), "leaseUntil": new_lease})
+        return new_lease
 
     return txn(db.transaction())
+
+
+def release_lease(job_ref: firestore.DocumentReference, lease_token: int) -> None:
+    """Hand back a lease that never ran the job so the next claim starts immediately."""
+    db = job_ref._client
+
+    @firestore.transactional
+    def txn(transaction: firestore.Transaction) -> None:
+        _check_token(job_ref.get(transaction=transaction), lease_token)
+        transaction.update(
+            job_ref,
+            {
+                "status": "queued",
+                "leaseUntil": utc_now(),
+                "attempts": firestore.Increment(-1),
+                "updatedAt": firestore.SERVER_TIMESTAMP,
+            },
+        )
+
+    txn(db.transaction())
+
+
+def fenced_commit(
+    job_ref: firestore.DocumentReference,
+    lease_token: int,
+    job_fields: Dict[str, Any],
+    writes: Iterable[Tuple[firestore.DocumentReference, Dict[str, Any]]] = (),
+) -> None:
+    """Apply the job update and merge ``writes`` atomically, only while holding the lease."""
+    db = job_ref._client
+
+    @firestore.transactional
+    def txn(transaction: firestore.Transaction) -> None:
+        _check_token(job_ref.get(transaction=transaction), lease_token)
+        for ref, data in writes:
+            transaction.set(ref, data, merge=True)
+        transaction.update(job_ref, job_fields)
+
+    with stage(IO):
+        txn(db.transaction())
+
+
+class LeaseHeartbeat:
+    """Renews a job lease in the background until stopped or the lease is lost."""
+
+    def __init__(
+        self,
+        job_ref: firestore.DocumentReference,
+        lease_token: int,
+        logger: logging.Logger | logging.LoggerAdapter | None = None,
+        interval: float | None = None,
+        on_renew: Callable[[], None] | None = None,
+    ) -> None:
+        self.job_ref = job_ref
+        self.lease_token = lease_token
+        self.interval = interval or max(get_settings().LEASE_SECONDS / 3, 1.0)
+        self._renew_callbacks: list[Callable[[], None]] = [on_renew] if on_renew is not None else []
+        self._logger = logger or logging.getLogger(__name__)
+        self._stop_event = threading.Event()
+        self._lost = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+
+    @property
+    def lost(self) -> bool:
+        return self._lost.is_set()
+
+    def check(self) -> None:
+        if self.lost:
+            raise LeaseLostError(f"Lease token {self.lease_token} lost")
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                renew_lease(self.job_ref, self.lease_token)
+            except LeaseLostError:
+                self._logger.warning("Lease lost, stopping heartbeat")
+                self._lost.set()
+                return
+            except Exception as exc:
+                self._logger.warning("Lease renewal failed: %s", exc)
+                continue
+            for callback in list(self._renew_callbacks):
+                try:
+                    callback()
+                except Exception as exc:
+                    self._logger.warning("Lease renewal callback failed: %s", exc)
+
+    def add_renew_callback(self, callback: Callable[[], None]) -> None:
+        """Also run ``callback`` after every successful renewal."""
+        self._renew_callbacks.append(callback)
+
+    def start(self) -> "LeaseHeartbeat":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from app.jobs.lease import LeaseHeartbeat, LeaseLostError, acquire_lease, fenced_commit, release_lease
+from app.services.firestore import workspace_job_ref, workspace_reel_ref
+
+
+def _queued_job(fake_firestore, job_id: str = "j1"):
+    job_ref = workspace_job_ref("w1", job_id)
+    fake_firestore.docs[job_ref.path] = {"status": "queued", "reelId": "r1", "attempts": 0}
+    return job_ref
+
+
+def test_superseded_commit_writes_nothing(fake_firestore):
+    job_ref = _queued_job(fake_firestore)
+    reel_ref = workspace_reel_ref("w1", "r1")
+    _, first = acquire_lease(job_ref)
+    # The first lease expires and another worker takes the job.
+    fake_firestore.docs[job_ref.path]["leaseUntil"] = None
+    _, second = acquire_lease(job_ref)
+    assert second["leaseToken"] == first["leaseToken"] + 1
+
+    writes = [(reel_ref, {"transcriptText": "x"})]
+    with pytest.raises(LeaseLostError):
+        fenced_commit(job_ref, first["leaseToken"], {"status": "completed"}, writes=writes)
+    assert reel_ref.path not in fake_firestore.docs
+    assert fake_firestore.docs[job_ref.path]["status"] == "running"
+
+    fenced_commit(job_ref, second["leaseToken"], {"status": "completed"}, writes=writes)
+    assert fake_firestore.docs[reel_ref.path] == {"transcriptText": "x"}
+    assert fake_firestore.docs[job_ref.path]["status"] == "completed"
+
+
+def test_heartbeat_marks_a_superseded_lease_lost(fake_firestore):
+    job_ref = _queued_job(fake_firestore)
+    _, info = acquire_lease(job_ref)
+    renewals = []
+    heartbeat = LeaseHeartbeat(
+        job_ref, info["leaseToken"], interval=0.01, on_renew=lambda: renewals.append(1)
+    ).start()
+    deadline = time.monotonic() + 2
+    while not renewals and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert renewals and not heartbeat.lost
+
+    fake_firestore.docs[job_ref.path]["leaseToken"] += 1
+    deadline = time.monotonic() + 2
+    while not heartbeat.lost and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert heartbeat.lost
+    with pytest.raises(LeaseLostError):
+        heartbeat.check()
+    heartbeat.stop()
+
+
+def test_stopped_heartbeat_stops_renewing(fake_firestore):
+    job_ref = _queued_job(fake_firestore)
+    _, info = acquire_lease(job_ref)
+    heartbeat = LeaseHeartbeat(job_ref, info["leaseToken"], interval=0.01).start()
+    heartbeat.stop()
+    lease_until = fake_firestore.docs[job_ref.path]["leaseUntil"]
+
+    time.sleep(0.05)
+    assert fake_firestore.docs[job_ref.path]["leaseUntil"] == lease_until
+    assert not heartbeat.lost
+
+
+def test_release_lease_gives_the_attempt_back(fake_firestore):
+    job_ref = _queued_job(fake_firestore)
+    _, info = acquire_lease(job_ref)
+    assert fake_firestore.docs[job_ref.path]["attempts"] == 1
+
+    release_lease(job_ref, info["leaseToken"])
+    assert fake_firestore.docs[job_ref.path]["attempts"] == 0
+    assert fake_firestore.docs[job_ref.path]["status"] == "queued"
+
+    ok, again = acquire_lease(job_ref)
+    assert ok and again["attempts"] == 1
+    with pytest.raises(LeaseLostError):
+        release_lease(job_ref, info["leaseToken"])
+    assert fake_firestore.docs[job_ref.path]["attempts"] == 1
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -14,6 +14,13 @@ class TranscribeRequest(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
+MAX_BATCH_ITEMS = 500
+
+
+class TranscribeBatchRequest(BaseModel):
+    items: List[TranscribeRequest] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
 class JobStatusResponse(BaseModel):
     jobId: str
     workspaceId: str
@@ -21,8 +28,32 @@ class JobStatusResponse(BaseModel):
     error: Optional[str] = None
 
 
+MAX_BATCH_GET_JOBS = 500
+
+
+class JobBatchGetRequest(BaseModel):
+    workspaceId: str = Field(..., min_length=1)
+    jobIds: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_GET_JOBS)
+
+
+class JobStatusRecord(BaseModel):
+    jobId: str
+    status: str
+    error: Optional[str] = None
+
+
+class JobBatchGetResponse(BaseModel):
+    workspaceId: str
+    jobs: List[JobStatusRecord]
+
+
 class EnqueueResponse(BaseModel):
     jobId: str
     reelId: str
     workspaceId: str
     status: str
+    leaderJobId: Optional[str] = None
+
+
+class TranscribeBatchResponse(BaseModel):
+    results: List[EnqueueResponse]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from app.config import get_settings
+from app.jobs.enqueue import enqueue_job, enqueue_stage
+from app.services.redis_client import get_redis
+
+
+DELAYED_KEY = "sources:delayed"
+LEASE_RETRY_JITTER_SECONDS = 5.0
+
+_POP_DUE_SCRIPT = """
+local due = redis.call('zrangebyscore', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due > 0 then
+  redis.call('zrem', KEYS[1], unpack(due))
+end
+return due
+"""
+
+
+def backoff_delay(
+    attempt: int,
+    *,
+    base: float,
+    cap: float,
+    rng: Callable[[], float] = random.random,
+) -> float:
+    """Exponential backoff with equal jitter: half the window fixed, half random."""
+    window = min(cap, base * (2 ** max(attempt - 1, 0)))
+    return window / 2 + rng() * window / 2
+
+
+def lease_retry_delay(remaining_seconds: float, rng: Callable[[], float] = random.random) -> float:
+    return max(remaining_seconds, 0.0) + rng() * LEASE_RETRY_JITTER_SECONDS
+
+
+def _job_member(job_id: str, workspace_id: str) -> str:
+    return json.dumps({"jobId": job_id, "workspaceId": workspace_id}, sort_keys=True)
+
+
+def schedule_retry(job_id: str, workspace_id: str, delay_seconds: float) -> None:
+    get_redis().zadd(DELAYED_KEY, {_job_member(job_id, workspace_id): time.time() + delay_seconds})
+
+
+def cancel_retry(job_id: str, workspace_id: str) -> None:
+    get_redis().zrem(DELAYED_KEY, _job_member(job_id, workspace_id))
+
+
+def schedule_stage_retry(stage: str, handoff: Dict[str, Any], delay_seconds: float) -> None:
+    member = json.dumps({"stage": stage, "handoff": handoff}, sort_keys=True)
+    get_redis().zadd(DELAYED_KEY, {member: time.time() + delay_seconds})
+
+
+def delayed_count() -> int:
+    return int(get_redis().zcard(DELAYED_KEY))
+
+
+def promote_due_jobs(limit: int = 100) -> int:
+    """Move due retries from the delayed set onto the work queue."""
+    redis = get_redis()
+    due = redis.eval(_POP_DUE_SCRIPT, 1, DELAYED_KEY, time.time(), limit)
+    due = due or []
+    promoted = 0
+    for index, raw in enumerate(due):
+        entry = json.loads(raw)
+        try:
+            if "stage" in entry:
+                enqueue_stage(entry["stage"], entry["handoff"])
+            else:
+                enqueue_job(entry["jobId"], entry["workspaceId"])
+        except Exception:
+            # Put back this entry and every later one the script already popped.
+            now = time.time()
+            redis.zadd(DELAYED_KEY, {member: now for member in due[index:]})
+            raise
+        promoted += 1
+    return promoted
+
+
+class DelayedJobPromoter(threading.Thread):
+    def __init__(self, interval: float | None = None) -> None:
+        super().__init__(name="delayed-job-promoter", daemon=True)
+        self.interval = interval or get_settings().RETRY_POLL_SECONDS
+        self._stop_event = threading.Event()
+        self._logger = logging.getLogger(__name__)
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                promoted = promote_due_jobs()
+                if promoted:
+                    self._logger.info("Promoted delayed jobs count=%s", promoted)
+            except Exception as exc:
+                self._logger.warning("Promoting delayed jobs failed: %s", exc)
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> None:
+        self._stop_event.set()
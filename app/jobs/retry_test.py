@@ -0,0 +1,38 @@
+import pytest
+
+from app.jobs import retry
+from app.jobs.retry import DELAYED_KEY, backoff_delay, lease_retry_delay, promote_due_jobs, schedule_retry
+
+
+def test_backoff_delay_grows_and_caps():
+    lows = [backoff_delay(n, base=10, cap=600, rng=lambda: 0.0) for n in range(1, 9)]
+    highs = [backoff_delay(n, base=10, cap=600, rng=lambda: 1.0) for n in range(1, 9)]
+    assert lows[:4] == [5, 10, 20, 40]
+    assert highs[:4] == [10, 20, 40, 80]
+    assert max(highs) == 600
+
+
+def test_lease_retry_delay_waits_out_remaining_lease():
+    assert lease_retry_delay(42.0, rng=lambda: 0.5) == 44.5
+    assert lease_retry_delay(-3.0, rng=lambda: 0.0) == 0.0
+
+
+def test_promote_due_jobs_puts_back_unprocessed_entries_on_failure(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.FakeRedis()
+    monkeypatch.setattr(retry, "get_redis", lambda: redis)
+    for job_id in ("a", "b", "c"):
+        schedule_retry(job_id, "w", -10)
+
+    enqueued = []
+
+    def enqueue(job_id, workspace_id):
+        if job_id == "b":
+            raise ConnectionError("redis down")
+        enqueued.append(job_id)
+
+    monkeypatch.setattr(retry, "enqueue_job", enqueue)
+    with pytest.raises(ConnectionError):
+        promote_due_jobs()
+    assert enqueued == ["a"]
+    assert redis.zcard(DELAYED_KEY) == 2
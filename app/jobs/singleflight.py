@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple
+
+from app.config import get_settings
+from app.services.redis_client import get_redis
+
+
+CLAIM_ATTEMPTS = 3
+
+_ATTACH_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+  redis.call('sadd', KEYS[2], ARGV[2])
+  redis.call('expire', KEYS[2], ARGV[3])
+  return 1
+end
+return 0
+"""
+
+_REFRESH_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+  redis.call('expire', KEYS[1], ARGV[2])
+  redis.call('expire', KEYS[2], ARGV[2])
+  return 1
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+local followers = redis.call('smembers', KEYS[2])
+if redis.call('get', KEYS[1]) == ARGV[1] then
+  redis.call('del', KEYS[1])
+end
+redis.call('del', KEYS[2])
+return followers
+"""
+
+
+def _leader_key(workspace_id: str, reel_id: str) -> str:
+    return f"inflight:{workspace_id}:{reel_id}"
+
+
+def _followers_key(workspace_id: str, reel_id: str, leader_job_id: str) -> str:
+    return f"inflight:{workspace_id}:{reel_id}:{leader_job_id}:followers"
+
+
+def _ttl_seconds() -> int:
+    settings = get_settings()
+    return settings.LEASE_SECONDS * (settings.MAX_ATTEMPTS + 1)
+
+
+def claim_or_attach(workspace_id: str, reel_id: str, job_id: str) -> Optional[str]:
+    """Make ``job_id`` the in-flight leader for a reel, or attach it to the current one.
+
+    Returns None when ``job_id`` should run (it is the leader, or no leader could be
+    pinned down), otherwise the leader's job id. A leader whose job doc is never
+    written or enqueued must be ``release``d, or later submits follow it.
+    """
+    redis = get_redis()
+    leader_key = _leader_key(workspace_id, reel_id)
+    ttl = _ttl_seconds()
+
+    for _ in range(CLAIM_ATTEMPTS):
+        if redis.set(leader_key, job_id, nx=True, ex=ttl):
+            return None
+        raw = redis.get(leader_key)
+        if raw is None:
+            continue
+        leader = raw.decode()
+        attached = redis.eval(
+            _ATTACH_SCRIPT,
+            2,
+            leader_key,
+            _followers_key(workspace_id, reel_id, leader),
+            leader,
+            job_id,
+            ttl,
+        )
+        if attached:
+            return leader
+    return None
+
+
+def claim_or_attach_many(claims: Sequence[Tuple[str, str, str]]) -> List[Optional[str]]:
+    """``claim_or_attach`` for many ``(workspace_id, reel_id, job_id)`` triples.
+
+    Uncontended reels are claimed in one pipelined round trip; only reels that
+    already have a leader take the one-at-a-time path.
+    """
+    if not claims:
+        return []
+    ttl = _ttl_seconds()
+    pipe = get_redis().pipeline(transaction=False)
+    for workspace_id, reel_id, job_id in claims:
+        pipe.set(_leader_key(workspace_id, reel_id), job_id, nx=True, ex=ttl)
+    claimed = pipe.execute()
+    return [
+        None if won else claim_or_attach(workspace_id, reel_id, job_id)
+        for won, (workspace_id, reel_id, job_id) in zip(claimed, claims)
+    ]
+
+
+def refresh_claim(workspace_id: str, reel_id: str, leader_job_id: str) -> bool:
+    """Push back the expiry of the claim and followers set while ``leader_job_id`` holds them.
+
+    Leaders call this on every lease renewal, so a job that runs past the initial
+    TTL still finds its followers on ``release``.
+    """
+    refreshed = get_redis().eval(
+        _REFRESH_SCRIPT,
+        2,
+        _leader_key(workspace_id, reel_id),
+        _followers_key(workspace_id, reel_id, leader_job_id),
+        leader_job_id,
+        _ttl_seconds(),
+    )
+    return bool(refreshed)
+
+
+def release(workspace_id: str, reel_id: str, leader_job_id: str) -> list[str]:
+    """Drop the in-flight lock held by ``leader_job_id`` and return its followers."""
+    redis = get_redis()
+    followers = redis.eval(
+        _RELEASE_SCRIPT,
+        2,
+        _leader_key(workspace_id, reel_id),
+        _followers_key(workspace_id, reel_id, leader_job_id),
+        leader_job_id,
+    )
+    return [f.decode() if isinstance(f, bytes) else f for f in followers or []]
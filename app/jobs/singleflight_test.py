@@ -0,0 +1,26 @@
+import time
+
+from app.jobs import singleflight
+from app.jobs.singleflight import claim_or_attach, refresh_claim, release
+
+
+def test_refreshed_claim_outlives_its_initial_ttl(fake_redis, settings, monkeypatch):
+    monkeypatch.setattr(singleflight, "_ttl_seconds", lambda: 1)
+    assert claim_or_attach("w1", "r1", "leader") is None
+    assert claim_or_attach("w1", "r1", "follower") == "leader"
+
+    # What a lease renewal does while the leader is still running.
+    monkeypatch.setattr(singleflight, "_ttl_seconds", lambda: 60)
+    assert refresh_claim("w1", "r1", "leader")
+    time.sleep(1.2)
+
+    assert claim_or_attach("w1", "r1", "resubmit") == "leader"
+    assert sorted(release("w1", "r1", "leader")) == ["follower", "resubmit"]
+    assert claim_or_attach("w1", "r1", "next") is None
+
+
+def test_only_the_leader_refreshes_its_claim(fake_redis, settings):
+    assert claim_or_attach("w1", "r1", "leader") is None
+
+    assert not refresh_claim("w1", "r1", "other")
+    assert not fake_redis.exists("inflight:w1:r1:other:followers")
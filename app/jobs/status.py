@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Sequence
+
+from app.services.firestore import get_docs, workspace_job_ref
+
+
+FINAL_STATUSES = ("completed", "failed")
+
+
+def resolve_job_statuses(workspace_id: str, job_ids: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Job docs by id (None if missing), with unfinished followers showing their leader's doc.
+
+    Read-only: one ``get_all`` for the jobs, plus one for leaders not already fetched.
+    """
+    refs = {job_id: workspace_job_ref(workspace_id, job_id) for job_id in dict.fromkeys(job_ids)}
+    docs = get_docs(refs.values())
+    jobs = {job_id: docs[ref.path] for job_id, ref in refs.items()}
+
+    leader_ids = {
+        job_id: data["leaderJobId"]
+        for job_id, data in jobs.items()
+        if data and data.get("leaderJobId") and data.get("status") not in FINAL_STATUSES
+    }
+    fetched = dict(jobs)
+    missing = {
+        leader: workspace_job_ref(workspace_id, leader)
+        for leader in leader_ids.values()
+        if leader not in fetched
+    }
+    if missing:
+        docs = get_docs(missing.values())
+        fetched.update({leader: docs[ref.path] for leader, ref in missing.items()})
+    for job_id, leader in leader_ids.items():
+        if fetched.get(leader):
+            jobs[job_id] = fetched[leader]
+    return jobs
@@ -0,0 +1,36 @@
+from app.jobs.status import resolve_job_statuses
+from app.services.firestore import workspace_job_ref
+
+
+def _seed(client, **jobs):
+    for job_id, data in jobs.items():
+        client.docs[workspace_job_ref("w1", job_id).path] = data
+
+
+def test_followers_mirror_unfinished_leaders_without_writes(fake_firestore):
+    _seed(
+        fake_firestore,
+        leader={"status": "processing"},
+        waiting={"status": "queued", "leaderJobId": "leader"},
+        finished={"status": "failed", "error": "boom", "leaderJobId": "leader"},
+        orphan={"status": "queued", "leaderJobId": "gone"},
+        elsewhere={"status": "queued", "leaderJobId": "other"},
+        other={"status": "completed"},
+    )
+
+    jobs = resolve_job_statuses("w1", ["waiting", "finished", "orphan", "elsewhere", "leader", "missing", "waiting"])
+
+    assert jobs["waiting"] == {"status": "processing"}
+    assert jobs["finished"]["error"] == "boom"
+    assert jobs["orphan"] == {"status": "queued", "leaderJobId": "gone"}
+    assert jobs["elsewhere"] == {"status": "completed"}
+    assert jobs["missing"] is None
+    # One read for the requested ids, one for leaders not among them; nothing written.
+    assert fake_firestore.calls == [("get_all", 6), ("get_all", 2)]
+
+
+def test_no_leader_read_when_nothing_is_following(fake_firestore):
+    _seed(fake_firestore, a={"status": "completed"})
+
+    assert resolve_job_statuses("w1", ["a", "b"]) == {"a": {"status": "completed"}, "b": None}
+    assert fake_firestore.calls == [("get_all", 2)]
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from google.cloud import firestore
+
+from app.jobs.enqueue import enqueue_jobs
+from app.jobs.models import EnqueueResponse, TranscribeRequest
+from app.jobs.singleflight import claim_or_attach_many, release
+from app.services.canonical import canonical_reel_key
+from app.services.firestore import (
+    build_job_doc,
+    build_reel_doc,
+    commit_bulk,
+    get_docs,
+    workspace_job_ref,
+    workspace_reel_index_ref,
+    workspace_reel_ref,
+)
+from app.services.hashing import sha256_hex
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Submission:
+    request: TranscribeRequest
+    workspace_id: str
+    canonical_key: str
+    reel_id: str
+    index_ref: Any
+    reel_ref: Any
+    job_id: str
+
+
+def _resolve(requests: Sequence[TranscribeRequest]) -> Tuple[List[_Submission], Dict[str, Optional[Dict[str, Any]]]]:
+    """Work out each request's reel, reading index entries and reels in one ``get_all``."""
+    pending = []
+    refs: Dict[str, Any] = {}
+    for request in requests:
+        workspace_id = request.workspaceId.strip()
+        canonical_key = canonical_reel_key(request.source, request.reelUrl)
+        index_ref = workspace_reel_index_ref(workspace_id, canonical_key)
+        reel_id = request.reelId.strip() if request.reelId else ""
+        if reel_id:
+            reel_ref = workspace_reel_ref(workspace_id, reel_id)
+        else:
+            reel_ref = workspace_reel_ref(workspace_id, sha256_hex(canonical_key))
+            refs[index_ref.path] = index_ref
+        refs[reel_ref.path] = reel_ref
+        pending.append((request, workspace_id, canonical_key, bool(reel_id), index_ref, reel_ref))
+
+    docs = get_docs(refs.values())
+
+    submissions = []
+    redirects: Dict[str, Any] = {}
+    for request, workspace_id, canonical_key, explicit, index_ref, reel_ref in pending:
+        if not explicit:
+            indexed = (docs[index_ref.path] or {}).get("reelId")
+            if indexed and indexed != reel_ref.id:
+                # Indexed under an explicit reelId from an earlier submit.
+                reel_ref = workspace_reel_ref(workspace_id, indexed)
+                if reel_ref.path not in docs:
+                    redirects[reel_ref.path] = reel_ref
+        submissions.append(
+            _Submission(
+                request=request,
+                workspace_id=workspace_id,
+                canonical_key=canonical_key,
+                reel_id=reel_ref.id,
+                index_ref=index_ref,
+                reel_ref=reel_ref,
+                job_id=str(uuid.uuid4()),
+            )
+        )
+    if redirects:
+        docs.update(get_docs(redirects.values()))
+    return submissions, docs
+
+
+def _completed_job(item: _Submission) -> Dict[str, Any]:
+    return build_job_doc(
+        {
+            "jobId": item.job_id,
+            "reelId": item.reel_id,
+            "workspaceId": item.workspace_id,
+            "status": "completed",
+            "source": item.request.source,
+            "reelUrl": item.request.reelUrl,
+        }
+    )
+
+
+def _queued_writes(item: _Submission, leader_job_id: Optional[str]) -> List[Tuple[Any, Dict[str, Any]]]:
+    request = item.request
+    return [
+        (
+            item.reel_ref,
+            build_reel_doc(
+                {
+                    "reelId": item.reel_id,
+                    "workspaceId": item.workspace_id,
+                    "source": request.source,
+                    "reelUrl": request.reelUrl,
+                    "canonicalKey": item.canonical_key,
+                    "postedAt": request.postedAt,
+                    "metadata": request.metadata,
+                    "status": "queued",
+                    "createdAt": firestore.SERVER_TIMESTAMP,
+                }
+            ),
+        ),
+        (
+            item.index_ref,
+            {
+                "canonicalKey": item.canonical_key,
+                "reelId": item.reel_id,
+                "updatedAt": firestore.SERVER_TIMESTAMP,
+            },
+        ),
+        (
+            workspace_job_ref(item.workspace_id, item.job_id),
+            build_job_doc(
+                {
+                    "jobId": item.job_id,
+                    "reelId": item.reel_id,
+                    "workspaceId": item.workspace_id,
+                    "source": request.source,
+                    "reelUrl": request.reelUrl,
+                    "status": "queued",
+                    "leaderJobId": leader_job_id,
+                    "createdAt": firestore.SERVER_TIMESTAMP,
+                }
+            ),
+        ),
+    ]
+
+
+def submit_transcriptions(requests: Sequence[TranscribeRequest]) -> List[EnqueueResponse]:
+    """Create reel, index and job docs for already validated requests and queue the jobs.
+
+    Requests for the same reel of a workspace share the first one's job. Firestore
+    sees one ``get_all`` (two when an index entry points at an explicit reelId) and
+    chunked batch writes; Redis sees one pipeline for claims and one for enqueues.
+    """
+    submissions, docs = _resolve(requests)
+
+    unique: Dict[Tuple[str, str], _Submission] = {}
+    for item in submissions:
+        unique.setdefault((item.workspace_id, item.reel_id), item)
+
+    done: List[_Submission] = []
+    todo: List[_Submission] = []
+    for item in unique.values():
+        transcribed = (docs.get(item.reel_ref.path) or {}).get("transcriptText")
+        (done if transcribed else todo).append(item)
+    leaders = claim_or_attach_many([(item.workspace_id, item.reel_id, item.job_id) for item in todo])
+
+    writes: List[Tuple[Any, Dict[str, Any]]] = []
+    responses: Dict[Tuple[str, str], EnqueueResponse] = {}
+    for item in done:
+        writes.append((workspace_job_ref(item.workspace_id, item.job_id), _completed_job(item)))
+        responses[(item.workspace_id, item.reel_id)] = EnqueueResponse(
+            jobId=item.job_id, reelId=item.reel_id, workspaceId=item.workspace_id, status="completed"
+        )
+    for item, leader_job_id in zip(todo, leaders):
+        writes.extend(_queued_writes(item, leader_job_id))
+        responses[(item.workspace_id, item.reel_id)] = EnqueueResponse(
+            jobId=item.job_id,
+            reelId=item.reel_id,
+            workspaceId=item.workspace_id,
+            status="queued",
+            leaderJobId=leader_job_id,
+        )
+    # Followers finish when the leader does; only leaders are enqueued.
+    led = [item for item, leader_job_id in zip(todo, leaders) if leader_job_id is None]
+    try:
+        commit_bulk(writes, [item.workspace_id for item in unique.values()])
+        enqueue_jobs(
+            [
+                (
+                    item.job_id,
+                    item.workspace_id,
+                    {"reelId": item.reel_id, "reelUrl": item.request.reelUrl, "source": item.request.source},
+                )
+                for item in led
+            ]
+        )
+    except Exception:
+        # Otherwise resubmits would follow leaders that never run until the claims expire.
+        for item in led:
+            try:
+                release(item.workspace_id, item.reel_id, item.job_id)
+            except Exception as exc:
+                logger.warning("Releasing leader claim failed jobId=%s: %s", item.job_id, exc)
+        raise
+
+    return [responses[(item.workspace_id, item.reel_id)] for item in submissions]
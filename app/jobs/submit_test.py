@@ -0,0 +1,85 @@
+import pytest
+from rq import Queue
+
+from app.jobs import submit
+from app.jobs.enqueue import QUEUE_NAME
+from app.jobs.models import TranscribeRequest
+from app.jobs.submit import submit_transcriptions
+from app.services.firestore import workspace_reel_index_ref, workspace_reel_ref
+from app.services.hashing import sha256_hex
+
+
+def _request(code: str, **fields) -> TranscribeRequest:
+    return TranscribeRequest(workspaceId="w1", reelUrl=f"https://www.instagram.com/reel/{code}/", **fields)
+
+
+def _queued(redis):
+    return [job.args[0] for job in Queue(QUEUE_NAME, connection=redis).jobs]
+
+
+def test_batch_dedupes_reels_and_keeps_response_order(fake_firestore, fake_redis):
+    requests = [
+        _request("A"),
+        _request("B"),
+        TranscribeRequest(workspaceId="w1", reelUrl="https://instagram.com/reel/A?igsh=x"),
+    ]
+
+    results = submit_transcriptions(requests)
+
+    assert [r.reelId for r in results] == [sha256_hex(f"instagram:{code}") for code in "ABA"]
+    assert results[2] == results[0]
+    assert [r.status for r in results] == ["queued", "queued", "queued"]
+    assert _queued(fake_redis) == [results[0].jobId, results[1].jobId]
+    assert [call for call in fake_firestore.calls if call[0] == "get_all"] == [("get_all", 4)]
+    # Root, then reel, index and job for each of the two reels.
+    assert fake_firestore.calls[-1] == ("commit", 7)
+
+
+def test_transcribed_reels_complete_without_enqueueing(fake_firestore, fake_redis):
+    done_ref = workspace_reel_ref("w1", sha256_hex("instagram:B"))
+    fake_firestore.docs[done_ref.path] = {"transcriptText": "hello"}
+
+    results = submit_transcriptions([_request("A"), _request("B"), _request("C")])
+
+    assert [r.status for r in results] == ["queued", "completed", "queued"]
+    assert _queued(fake_redis) == [results[0].jobId, results[2].jobId]
+    assert fake_firestore.docs[done_ref.path] == {"transcriptText": "hello"}
+
+
+def test_index_redirects_to_explicit_reel_id(fake_firestore, fake_redis):
+    index_ref = workspace_reel_index_ref("w1", "instagram:A")
+    fake_firestore.docs[index_ref.path] = {"reelId": "custom"}
+    fake_firestore.docs[workspace_reel_ref("w1", "custom").path] = {"transcriptText": "hi"}
+
+    (result,) = submit_transcriptions([_request("A")])
+
+    assert (result.reelId, result.status) == ("custom", "completed")
+    assert [call for call in fake_firestore.calls if call[0] == "get_all"] == [("get_all", 2), ("get_all", 1)]
+
+
+def test_second_submit_follows_the_in_flight_leader(fake_firestore, fake_redis):
+    (leader,) = submit_transcriptions([_request("A")])
+    (follower,) = submit_transcriptions([_request("A")])
+
+    assert follower.leaderJobId == leader.jobId
+    assert _queued(fake_redis) == [leader.jobId]
+
+
+def test_failed_commit_releases_leader_claims(fake_firestore, fake_redis, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("firestore unavailable")
+
+    monkeypatch.setattr(submit, "commit_bulk", fail)
+    with pytest.raises(RuntimeError):
+        submit_transcriptions([_request("A"), _request("B")])
+    assert fake_redis.keys("inflight:*") == []
+
+
+def test_single_submit_is_one_read_and_one_commit(fake_firestore, fake_redis):
+    (first,) = submit_transcriptions([_request("A")])
+    assert fake_firestore.calls == [("get_all", 2), ("commit", 4)]
+
+    fake_firestore.calls.clear()
+    submit_transcriptions([_request("B")])
+    # The workspace root was upserted by the first submit and is not due again yet.
+    assert fake_firestore.calls == [("get_all", 2), ("commit", 3)]
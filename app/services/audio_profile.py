@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.config import get_settings
+
+
+@dataclass(frozen=True)
+class AudioProfile:
+    name: str
+    codec: str
+    bitrate: str
+    suffix: str
+    mime_type: str
+    sample_rate: int = 16000
+    channels: int = 1
+
+    def encode_args(self) -> list[str]:
+        # Bit-exact output: the transcript cache and chunk checkpoints key on the
+        # audio's hash, and the ogg muxer otherwise picks a random stream serial.
+        return [
+            "-vn",
+            "-map_metadata",
+            "-1",
+            "-fflags",
+            "+bitexact",
+            "-flags:a",
+            "+bitexact",
+            "-ac",
+            str(self.channels),
+            "-ar",
+            str(self.sample_rate),
+            "-c:a",
+            self.codec,
+            "-b:a",
+            self.bitrate,
+        ]
+
+
+AUDIO_PROFILES = {
+    "mp3": AudioProfile(
+        name="mp3", codec="libmp3lame", bitrate="48k", suffix=".mp3", mime_type="audio/mpeg"
+    ),
+    "opus": AudioProfile(
+        name="opus", codec="libopus", bitrate="24k", suffix=".ogg", mime_type="audio/ogg"
+    ),
+}
+
+
+def get_audio_profile(name: str) -> AudioProfile:
+    try:
+        return AUDIO_PROFILES[name.lower()]
+    except KeyError as exc:
+        raise ValueError(f"Unknown audio profile: {name}") from exc
+
+
+def profile_for_provider(provider: str) -> AudioProfile:
+    settings = get_settings()
+    if provider == "openai":
+        return get_audio_profile(settings.AUDIO_PROFILE_OPENAI)
+    return get_audio_profile(settings.AUDIO_PROFILE_LOCAL)
+
+
+def mime_type_for(path: Path) -> str:
+    for profile in AUDIO_PROFILES.values():
+        if path.suffix == profile.suffix:
+            return profile.mime_type
+    return "audio/mpeg"
@@ -0,0 +1,9 @@
+from app.services.audio_profile import AUDIO_PROFILES
+
+
+def test_encode_args_are_bitexact():
+    for profile in AUDIO_PROFILES.values():
+        args = profile.encode_args()
+        assert args[args.index("-fflags") + 1] == "+bitexact"
+        assert args[args.index("-flags:a") + 1] == "+bitexact"
+        assert args[args.index("-map_metadata") + 1] == "-1"
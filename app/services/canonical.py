@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import re
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+Canonicalizer = Callable[[str], Optional[str]]
+
+TRACKING_PARAMS = {"igsh", "igshid", "fbclid", "gclid", "si", "ref", "ref_src"}
+
+_CANONICALIZERS: Dict[str, Canonicalizer] = {}
+
+_INSTAGRAM_HOSTS = ("instagram.com", "instagr.am")
+_INSTAGRAM_PATH_RE = re.compile(r"^/(?:[^/]+/)?(?:reel|reels|p|tv)/([A-Za-z0-9_-]+)")
+
+
+def register_canonicalizer(source: str) -> Callable[[Canonicalizer], Canonicalizer]:
+    """Register a function that extracts a stable id from a URL for ``source``."""
+
+    def decorator(func: Canonicalizer) -> Canonicalizer:
+        _CANONICALIZERS[source.lower()] = func
+        return func
+
+    return decorator
+
+
+def _host(parts) -> str:
+    host = (parts.hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    )
+    path = parts.path.rstrip("/")
+    return urlunsplit(("https", _host(parts), path, urlencode(query), ""))
+
+
+@register_canonicalizer("instagram")
+def instagram_shortcode(url: str) -> Optional[str]:
+    parts = urlsplit(url.strip())
+    host = _host(parts)
+    if not any(host == h or host.endswith(f".{h}") for h in _INSTAGRAM_HOSTS):
+        return None
+    match = _INSTAGRAM_PATH_RE.match(parts.path)
+    return match.group(1) if match else None
+
+
+def canonical_reel_key(source: str, url: str) -> str:
+    source = (source or "").strip().lower()
+    canonicalizer = _CANONICALIZERS.get(source)
+    stable_id = canonicalizer(url) if canonicalizer else None
+    return f"{source}:{stable_id or normalize_url(url)}"
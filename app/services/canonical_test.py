@@ -0,0 +1,29 @@
+from app.services.canonical import canonical_reel_key, normalize_url, register_canonicalizer
+
+
+def test_instagram_variants_share_a_key():
+    urls = [
+        "https://www.instagram.com/reel/Cx1_aB-9/",
+        "https://instagram.com/reel/Cx1_aB-9",
+        "https://www.instagram.com/p/Cx1_aB-9/?igsh=abc123",
+        "https://www.instagram.com/reels/Cx1_aB-9/?utm_source=ig_web_copy_link",
+        "https://www.instagram.com/somehandle/reel/Cx1_aB-9/",
+    ]
+    assert {canonical_reel_key("instagram", url) for url in urls} == {"instagram:Cx1_aB-9"}
+
+
+def test_unknown_source_falls_back_to_normalized_url():
+    key = canonical_reel_key("tiktok", "https://WWW.TikTok.com/@a/video/1/?utm_medium=x&b=2&a=1#t")
+    assert key == "tiktok:https://tiktok.com/@a/video/1?a=1&b=2"
+
+
+def test_normalize_url_drops_tracking_params():
+    assert normalize_url("http://example.com/x/?fbclid=1&id=5") == "https://example.com/x?id=5"
+
+
+def test_registered_canonicalizer_is_used():
+    @register_canonicalizer("example")
+    def _example(url):
+        return url.rsplit("/", 1)[-1] or None
+
+    assert canonical_reel_key("Example", "https://example.com/v/abc") == "example:abc"
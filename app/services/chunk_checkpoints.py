@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from redis.exceptions import RedisError
+
+from app.config import get_settings
+from app.services.redis_client import get_redis
+
+
+KEY_PREFIX = "chunks:"
+STATS_KEY = "chunks:stats"
+
+
+def _key(audio_hash: str) -> str:
+    return f"{KEY_PREFIX}{audio_hash}"
+
+
+def _field(index: int, offset: float, end: float) -> str:
+    return f"{index}:{round(offset * 1000)}:{round(end * 1000)}"
+
+
+class RedisChunkCheckpoints:
+    """Chunk transcripts keyed by audio hash, chunk index and span.
+
+    Shared by every worker, so a retry on any host only re-sends the chunks that
+    never came back. Each ``scoped`` view prefixes its fields, and ``clear`` drops
+    every view of the audio. Hits and misses feed cluster-wide counters in ``chunks:stats``.
+    """
+
+    def __init__(
+        self,
+        audio_hash: str,
+        logger: logging.Logger | logging.LoggerAdapter | None = None,
+        namespace: str = "",
+    ) -> None:
+        self.audio_hash = audio_hash
+        self.key = _key(audio_hash)
+        self.namespace = namespace
+        self._logger = logger or logging.getLogger(__name__)
+        self._resumed = False
+
+    def _field(self, index: int, offset: float, end: float) -> str:
+        field = _field(index, offset, end)
+        return f"{self.namespace}:{field}" if self.namespace else field
+
+    def scoped(self, name: str) -> "RedisChunkCheckpoints":
+        return RedisChunkCheckpoints(self.audio_hash, logger=self._logger, namespace=name)
+
+    def get(self, index: int, offset: float, end: float) -> Optional[Dict[str, Any]]:
+        redis = get_redis()
+        try:
+            raw = redis.hget(self.key, self._field(index, offset, end))
+            if raw is None:
+                return None
+            pipe = redis.pipeline(transaction=False)
+            pipe.hincrby(STATS_KEY, "chunksReused", 1)
+            if not self._resumed:
+                pipe.hincrby(STATS_KEY, "resumedRuns", 1)
+            pipe.execute()
+            self._resumed = True
+            return json.loads(raw)
+        except (RedisError, ValueError) as exc:
+            self._logger.warning("Chunk checkpoint lookup failed: %s", exc)
+            return None
+
+    def put(self, index: int, offset: float, end: float, payload: Dict[str, Any]) -> None:
+        redis = get_redis()
+        try:
+            pipe = redis.pipeline(transaction=False)
+            pipe.hset(self.key, self._field(index, offset, end), json.dumps(payload))
+            pipe.expire(self.key, get_settings().CHUNK_CHECKPOINT_TTL_SECONDS)
+            pipe.hincrby(STATS_KEY, "chunksTranscribed", 1)
+            pipe.execute()
+        except RedisError as exc:
+            self._logger.warning("Chunk checkpoint store failed: %s", exc)
+
+    def clear(self) -> None:
+        try:
+            get_redis().delete(self.key)
+        except RedisError as exc:
+            self._logger.warning("Chunk checkpoint cleanup failed: %s", exc)
+
+
+def chunk_checkpoint_stats() -> Dict[str, int]:
+    raw = get_redis().hgetall(STATS_KEY)
+    return {key.decode(): int(value) for key, value in raw.items()}
@@ -0,0 +1,31 @@
+import pytest
+
+from app.services import chunk_checkpoints
+from app.services.chunk_checkpoints import RedisChunkCheckpoints, chunk_checkpoint_stats
+
+
+@pytest.fixture
+def redis(fake_redis, settings, monkeypatch):
+    monkeypatch.setattr(chunk_checkpoints, "get_redis", lambda: fake_redis)
+    return fake_redis
+
+
+def test_round_trip_and_counters(redis):
+    checkpoints = RedisChunkCheckpoints("abc")
+    assert checkpoints.get(0, 0.0, 60.0) is None
+    checkpoints.put(0, 0.0, 60.0, {"text": "first"})
+    checkpoints.put(1, 60.0, 90.0, {"text": "second"})
+    assert redis.ttl(checkpoints.key) > 0
+
+    # A retry reads both back and counts as a single resumed run.
+    retry = RedisChunkCheckpoints("abc")
+    assert retry.get(0, 0.0, 60.0) == {"text": "first"}
+    assert retry.get(1, 60.0, 90.0) == {"text": "second"}
+    assert retry.get(1, 60.0, 120.0) is None
+    assert chunk_checkpoint_stats() == {"chunksTranscribed": 2, "chunksReused": 2, "resumedRuns": 1}
+
+    retry.scoped("openai").put(0, 0.0, 60.0, {"text": "other"})
+    retry.clear()
+    assert checkpoints.get(0, 0.0, 60.0) is None
+    assert retry.scoped("openai").get(0, 0.0, 60.0) is None
+    assert chunk_checkpoint_stats()["chunksReused"] == 2
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Protocol, Sequence
+
+from app.services.ffmpeg import split_audio
+from app.utils.stages import CPU, stage
+
+
+UPLOAD_HEADROOM = 0.9
+MIN_CHUNK_SECONDS = 30.0
+
+
+class TranscriptionCancelled(RuntimeError):
+    """The caller no longer wants this transcription (a hedged attempt that lost)."""
+
+
+def raise_if_cancelled(cancel: Optional[threading.Event]) -> None:
+    if cancel is not None and cancel.is_set():
+        raise TranscriptionCancelled("Transcription cancelled")
+
+
+class ChunkCheckpoints(Protocol):
+    """Saved chunk transcripts, keyed by the chunk's index and its ``offset``-``end`` span.
+
+    The span ties a saved chunk to the split that produced it, so a retry planned
+    with other chunk lengths misses instead of merging overlapping transcripts.
+    """
+
+    def get(self, index: int, offset: float, end: float) -> Optional[Dict[str, Any]]: ...
+
+    def put(self, index: int, offset: float, end: float, payload: Dict[str, Any]) -> None: ...
+
+    def scoped(self, name: str) -> "ChunkCheckpoints":
+        """The same store, with chunks kept apart from those of any other ``name``."""
+        ...
+
+
+def payload_text(payload: Dict[str, Any]) -> Optional[str]:
+    return payload.get("text") or payload.get("transcript") or payload.get("transcriptText")
+
+
+def map_segments(segments: Any, *, offset: float = 0.0) -> list[dict]:
+    mapped: list[dict] = []
+    if not isinstance(segments, list):
+        return mapped
+    for segment in segments:
+        if not isinstance(segment, dict):
+            continue
+        try:
+            start = float(segment.get("start", 0.0)) + offset
+            end = float(segment.get("end", 0.0)) + offset
+        except (TypeError, ValueError):
+            continue
+        mapped.append(
+            {
+                "id": segment.get("id"),
+                "start": start,
+                "end": end,
+                "text": (segment.get("text") or "").strip(),
+            }
+        )
+    return mapped
+
+
+def should_chunk(
+    *,
+    duration: Optional[float],
+    size_bytes: int,
+    max_bytes: int,
+    min_parallel_seconds: float,
+) -> bool:
+    if size_bytes > max_bytes:
+        return True
+    return duration is not None and duration >= min_parallel_seconds
+
+
+def plan_chunk_seconds(
+    *,
+    duration: float,
+    size_bytes: int,
+    max_bytes: int,
+    concurrency: int,
+    min_seconds: float = MIN_CHUNK_SECONDS,
+) -> float:
+    """Longest chunk that fits the upload limit, spread across the concurrency cap."""
+    bytes_per_second = size_bytes / duration
+    size_cap = (max_bytes * UPLOAD_HEADROOM) / bytes_per_second
+    spread = math.ceil(duration / max(concurrency, 1))
+    return min(max(spread, min_seconds), size_cap)
+
+
+def merge_chunk_payloads(
+    results: Sequence[tuple[float, Dict[str, Any]]],
+    *,
+    map_segments: Callable[..., list[dict]] = map_segments,
+) -> tuple[str, list[dict]]:
+    parts: list[str] = []
+    all_segments: list[dict] = []
+    for offset, payload in sorted(results, key=lambda item: item[0]):
+        text = payload_text(payload)
+        if text:
+            parts.append(text.strip())
+        all_segments.extend(map_segments(payload.get("segments"), offset=offset))
+    return " ".join(p for p in parts if p), all_segments
+
+
+def transcribe_chunked(
+    audio_path: Path,
+    *,
+    duration: float,
+    transcribe: Callable[[Path, float], Dict[str, Any]],
+    max_bytes: int,
+    concurrency: int,
+    map_segments: Callable[..., list[dict]] = map_segments,
+    checkpoints: Optional[ChunkCheckpoints] = None,
+    cancel: Optional[threading.Event] = None,
+    logger: logging.Logger | None = None,
+) -> Dict[str, Any]:
+    """Split, transcribe chunks concurrently and merge.
+
+    ``transcribe`` is called with each chunk's path and its length in seconds.
+    With ``checkpoints``, chunks saved by an earlier attempt are reused and each
+    newly transcribed chunk is saved as soon as it returns. Setting ``cancel``
+    stops chunks that have not started yet.
+    """
+    log = logger or logging.getLogger(__name__)
+    chunk_seconds = plan_chunk_seconds(
+        duration=duration,
+        size_bytes=audio_path.stat().st_size,
+        max_bytes=max_bytes,
+        concurrency=concurrency,
+    )
+    start_time = time.monotonic()
+    chunks: list[tuple[Path, float]] = []
+
+    try:
+        raise_if_cancelled(cancel)
+        with stage(CPU):
+            chunks = split_audio(audio_path, duration=duration, chunk_seconds=chunk_seconds)
+        workers = max(1, min(concurrency, len(chunks)))
+        log.info(
+            "Chunked transcription: chunks=%s chunk_seconds=%.1f concurrency=%s",
+            len(chunks),
+            chunk_seconds,
+            workers,
+        )
+
+        def run(index: int, path: Path, offset: float, end: float) -> Dict[str, Any]:
+            raise_if_cancelled(cancel)
+            payload = transcribe(path, end - offset)
+            # A cancelled attempt's owner may already have cleared the checkpoints.
+            if checkpoints is not None and not (cancel is not None and cancel.is_set()):
+                checkpoints.put(index, offset, end, payload)
+            return payload
+
+        ends = [offset for _, offset in chunks[1:]] + [duration]
+        results: list[tuple[float, Dict[str, Any]]] = []
+        pending: list[tuple[int, Path, float, float]] = []
+        for index, ((path, offset), end) in enumerate(zip(chunks, ends)):
+            saved = checkpoints.get(index, offset, end) if checkpoints is not None else None
+            if saved is not None:
+                results.append((offset, saved))
+            else:
+                pending.append((index, path, offset, end))
+        if results:
+            log.info("Resuming chunked transcription: reused=%s remaining=%s", len(results), len(pending))
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chunk") as pool:
+            futures = [
+                (offset, pool.submit(run, index, path, offset, end)) for index, path, offset, end in pending
+            ]
+            try:
+                results.extend((offset, future.result()) for offset, future in futures)
+            except BaseException:
+                for _, future in futures:
+                    future.cancel()
+                raise
+
+        text, segments = merge_chunk_payloads(results, map_segments=map_segments)
+        log.info(
+            "Chunked transcription completed: segments_count=%s elapsed=%.2fs",
+            len(segments),
+            time.monotonic() - start_time,
+        )
+        return {
+            "text": text,
+            "segments": segments,
+            "durationSeconds": duration,
+            "duration": duration,
+        }
+    finally:
+        for path, _ in chunks:
+            if path == audio_path:
+                continue
+            try:
+                if path.exists():
+                    path.unlink()
+            except Exception:
+                pass
@@ -0,0 +1,129 @@
+import threading
+from contextlib import nullcontext
+
+from app.services import chunking
+from app.services.chunking import merge_chunk_payloads, plan_chunk_seconds, should_chunk, transcribe_chunked
+
+
+MB = 1024 * 1024
+
+
+def test_plan_chunk_seconds_spreads_across_concurrency():
+    # 30 minutes at 6000 B/s fits one upload, so the cap is concurrency.
+    seconds = plan_chunk_seconds(
+        duration=1800.0, size_bytes=1800 * 6000, max_bytes=25 * MB, concurrency=4
+    )
+    assert seconds == 450
+
+
+def test_plan_chunk_seconds_respects_upload_limit():
+    # 128 kbps = 16000 B/s, so a chunk must stay under ~1474s.
+    seconds = plan_chunk_seconds(
+        duration=7200.0, size_bytes=7200 * 16000, max_bytes=25 * MB, concurrency=2
+    )
+    assert seconds * 16000 <= 25 * MB
+    assert seconds > 1400
+
+
+def test_should_chunk():
+    assert should_chunk(duration=None, size_bytes=30 * MB, max_bytes=25 * MB, min_parallel_seconds=600)
+    assert should_chunk(duration=900.0, size_bytes=MB, max_bytes=25 * MB, min_parallel_seconds=600)
+    assert not should_chunk(duration=60.0, size_bytes=MB, max_bytes=25 * MB, min_parallel_seconds=600)
+
+
+def test_merge_chunk_payloads_orders_by_offset():
+    results = [
+        (120.0, {"text": " second ", "segments": [{"id": 0, "start": 1.0, "end": 2.0, "text": "second"}]}),
+        (0.0, {"text": "first", "segments": [{"id": 0, "start": 0.5, "end": 1.5, "text": "first"}]}),
+    ]
+    text, segments = merge_chunk_payloads(results)
+    assert text == "first second"
+    assert [(s["start"], s["end"]) for s in segments] == [(0.5, 1.5), (121.0, 122.0)]
+
+
+class MemoryCheckpoints:
+    def __init__(self):
+        self.saved = {}
+
+    def get(self, index, offset, end):
+        return self.saved.get((index, offset, end))
+
+    def put(self, index, offset, end, payload):
+        self.saved[(index, offset, end)] = payload
+
+
+def test_transcribe_chunked_resends_only_missing_chunks(tmp_path, monkeypatch):
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"0" * 1000)
+    chunks = [(audio, 0.0), (tmp_path / "c1.mp3", 100.0), (tmp_path / "c2.mp3", 200.0)]
+    monkeypatch.setattr(chunking, "split_audio", lambda *args, **kwargs: chunks)
+    monkeypatch.setattr(chunking, "stage", lambda kind: nullcontext())
+    checkpoints = MemoryCheckpoints()
+    sent = []
+    failures = {"c2.mp3": 1}
+
+    def flaky(path, seconds):
+        sent.append(path.name)
+        if failures.get(path.name):
+            failures[path.name] -= 1
+            raise RuntimeError("rate limited")
+        return {"text": path.stem, "segments": []}
+
+    kwargs = dict(duration=300.0, transcribe=flaky, max_bytes=10**9, concurrency=1, checkpoints=checkpoints)
+    try:
+        transcribe_chunked(audio, **kwargs)
+    except RuntimeError:
+        pass
+    sent.clear()
+    result = transcribe_chunked(audio, **kwargs)
+    assert sent == ["c2.mp3"]
+    assert result["text"] == "audio c1 c2"
+
+
+def test_transcribe_chunked_ignores_chunks_from_another_plan(tmp_path, monkeypatch):
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"0" * 1000)
+    monkeypatch.setattr(chunking, "stage", lambda kind: nullcontext())
+    checkpoints = MemoryCheckpoints()
+    sent = []
+
+    def transcribe(path, seconds):
+        sent.append((path.name, seconds))
+        return {"text": path.stem, "segments": []}
+
+    kwargs = dict(duration=300.0, transcribe=transcribe, max_bytes=10**9, concurrency=1, checkpoints=checkpoints)
+    halves = [(audio, 0.0), (tmp_path / "h1.mp3", 150.0)]
+    monkeypatch.setattr(chunking, "split_audio", lambda *args, **kwargs: halves)
+    transcribe_chunked(audio, **kwargs)
+
+    # Same first chunk offset, but it now ends at 100s instead of 150s.
+    thirds = [(audio, 0.0), (tmp_path / "t1.mp3", 100.0), (tmp_path / "t2.mp3", 200.0)]
+    monkeypatch.setattr(chunking, "split_audio", lambda *args, **kwargs: thirds)
+    sent.clear()
+    result = transcribe_chunked(audio, **kwargs)
+    assert sent == [("audio.mp3", 100.0), ("t1.mp3", 100.0), ("t2.mp3", 100.0)]
+    assert result["text"] == "audio t1 t2"
+
+
+def test_cancelled_chunk_is_not_checkpointed(tmp_path, monkeypatch):
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"0" * 1000)
+    monkeypatch.setattr(chunking, "split_audio", lambda *args, **kwargs: [(audio, 0.0)])
+    monkeypatch.setattr(chunking, "stage", lambda kind: nullcontext())
+    checkpoints = MemoryCheckpoints()
+    cancel = threading.Event()
+
+    def lost_the_race(path, seconds):
+        cancel.set()
+        return {"text": "late", "segments": []}
+
+    transcribe_chunked(
+        audio,
+        duration=60.0,
+        transcribe=lost_the_race,
+        max_bytes=10**9,
+        concurrency=1,
+        checkpoints=checkpoints,
+        cancel=cancel,
+    )
+    assert checkpoints.saved == {}
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import logging
+import time
+from functools import lru_cache
+from typing import Dict
+
+from redis.exceptions import RedisError
+
+from app.config import get_settings
+from app.services.redis_client import get_redis
+
+
+KEY_PREFIX = "breaker:"
+
+# KEYS[1] = breaker hash. ARGV = now, failure threshold, open seconds.
+# Counts a failure; opens (or re-opens after a failed trial) once the threshold is hit.
+_FAILURE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local failures = redis.call('hincrby', KEYS[1], 'failures', 1)
+local opened = tonumber(redis.call('hget', KEYS[1], 'openUntil') or '0')
+if failures >= tonumber(ARGV[2]) or opened > 0 then
+  redis.call('hset', KEYS[1], 'openUntil', now + tonumber(ARGV[3]))
+  redis.call('hdel', KEYS[1], 'probe')
+  redis.call('expire', KEYS[1], math.ceil(tonumber(ARGV[3])) * 10)
+  return 1
+end
+return 0
+"""
+
+# KEYS[1] = breaker hash. ARGV = now, open seconds.
+# Closed: allow. Open: refuse. Past the open window: let exactly one trial request through.
+_ALLOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local opened = tonumber(redis.call('hget', KEYS[1], 'openUntil') or '0')
+if opened == 0 then
+  return 1
+end
+if opened > now then
+  return 0
+end
+local probe = tonumber(redis.call('hget', KEYS[1], 'probe') or '0')
+if probe > now then
+  return 0
+end
+redis.call('hset', KEYS[1], 'probe', now + tonumber(ARGV[2]))
+return 1
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Cluster-wide breaker for one provider, kept in Redis.
+
+    After ``failure_threshold`` consecutive failures the breaker opens for
+    ``open_seconds`` and traffic goes elsewhere. Then a single trial request is
+    let through: success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, name: str, *, failure_threshold: int, open_seconds: float) -> None:
+        self.name = name
+        self.key = f"{KEY_PREFIX}{name}"
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+
+    def allow(self) -> bool:
+        try:
+            return bool(get_redis().eval(_ALLOW_SCRIPT, 1, self.key, time.time(), self.open_seconds))
+        except RedisError as exc:
+            logger.warning("Circuit breaker check failed name=%s: %s", self.name, exc)
+            return True
+
+    def record_success(self) -> None:
+        try:
+            get_redis().delete(self.key)
+        except RedisError as exc:
+            logger.warning("Circuit breaker update failed name=%s: %s", self.name, exc)
+
+    def record_failure(self) -> None:
+        try:
+            opened = get_redis().eval(
+                _FAILURE_SCRIPT, 1, self.key, time.time(), self.failure_threshold, self.open_seconds
+            )
+        except RedisError as exc:
+            logger.warning("Circuit breaker update failed name=%s: %s", self.name, exc)
+            return
+        if opened:
+            logger.warning("Circuit open name=%s for %.0fs", self.name, self.open_seconds)
+
+    def state(self) -> str:
+        try:
+            opened = float(get_redis().hget(self.key, "openUntil") or 0)
+        except RedisError:
+            return "unknown"
+        if not opened:
+            return "closed"
+        return "open" if opened > time.time() else "half_open"
+
+
+@lru_cache(maxsize=None)
+def get_breaker(name: str) -> CircuitBreaker:
+    settings = get_settings()
+    return CircuitBreaker(
+        name,
+        failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+        open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+    )
+
+
+def breaker_states(names) -> Dict[str, str]:
+    return {name: get_breaker(name).state() for name in names}
@@ -0,0 +1,55 @@
+import pytest
+
+from app.services import circuit_breaker
+from app.services.circuit_breaker import CircuitBreaker
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    redis = fakeredis.FakeRedis()
+    clock = _Clock()
+    monkeypatch.setattr(circuit_breaker, "get_redis", lambda: redis)
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+    return clock
+
+
+def test_breaker_opens_after_threshold_and_lets_one_probe_through(clock):
+    breaker = CircuitBreaker("openai", failure_threshold=3, open_seconds=60)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.allow() and breaker.state() == "closed"
+
+    breaker.record_failure()
+    assert breaker.state() == "open"
+    assert not breaker.allow()
+
+    clock.now += 61
+    assert breaker.state() == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_breaker_probe_success_closes_and_failure_reopens(clock):
+    breaker = CircuitBreaker("local", failure_threshold=1, open_seconds=60)
+    breaker.record_failure()
+    clock.now += 61
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state() == "open"
+    assert not breaker.allow()
+
+    clock.now += 61
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state() == "closed"
+    assert breaker.allow() and breaker.allow()
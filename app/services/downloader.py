@@ -1,16 +1,30 @@
 from __future__ import annotations
 
+import json
 import subprocess
 from pathlib import Path
+from typing import Any, Dict, Optional
 
 
 class DownloadError(RuntimeError):
     pass
 
 
-def download_instagram(url: str, output_path: Path, timeout_sec: int = 180) -> None:
+def _parse_info(stdout: str) -> Optional[Dict[str, Any]]:
+    for line in reversed(stdout.strip().splitlines()):
+        try:
+            info = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(info, dict):
+            return info
+    return None
+
+
+def download_instagram(url: str, output_path: Path, timeout_sec: int = 180) -> Optional[Dict[str, Any]]:
+    """Download the reel and return yt-dlp's info JSON when it was printed."""
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    cmd = ["yt-dlp", "-o", str(output_path), url]
+    cmd = ["yt-dlp", "--no-simulate", "-j", "-o", str(output_path), url]
 
     try:
         result = subprocess.run(
@@ -27,3 +41,5 @@ def download_instagram(url: str, output_path: Path, timeout_sec: int = 180) -> N
 
     if not output_path.exists() or output_path.stat().st_size == 0:
         raise DownloadError("Downloaded file missing or empty")
+
+    return _parse_info(result.stdout or "")
@@ -1,28 +1,29 @@
 from __future__ import annotations
 
+import csv
+import re
 import subprocess
 from pathlib import Path
+from typing import Optional
+
+from app.services.audio_profile import AudioProfile
 
 
 class FfmpegError(RuntimeError):
     pass
 
 
-def extract_audio(input_path: Path, output_path: Path, timeout_sec: int = 450) -> None:
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    cmd = [
-        "ffmpeg",
-        "-y",
-        "-i",
-        str(input_path),
-        "-vn",
-        "-acodec",
-        "libmp3lame",
-        str(output_path),
-    ]
+SILENCE_NOISE_DB = -35
+SILENCE_MIN_SECONDS = 0.4
+SILENCE_SEARCH_FRACTION = 0.25
 
+_SILENCE_START_RE = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*(-?[\d.]+)")
+
+
+def _run_ffmpeg(cmd: list[str], timeout_sec: int) -> subprocess.CompletedProcess:
     try:
-        subprocess.run(
+        return subprocess.run(
             cmd,
             capture_output=True,
             text=True,
@@ -34,5 +35,144 @@ def extract_audio(input_path: Path, output_path: Path, timeout_sec: int = 450) -
     except subprocess.CalledProcessError as exc:
         raise FfmpegError(f"ffmpeg failed: {exc.stderr.strip()}") from exc
 
+
+def audio_encode_cmd(input_arg: str, output_path: Path, profile: AudioProfile) -> list[str]:
+    return ["ffmpeg", "-y", "-i", input_arg, *profile.encode_args(), str(output_path)]
+
+
+def extract_audio(
+    input_path: Path,
+    output_path: Path,
+    profile: AudioProfile,
+    timeout_sec: int = 450,
+) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    _run_ffmpeg(audio_encode_cmd(str(input_path), output_path, profile), timeout_sec)
+
     if not output_path.exists() or output_path.stat().st_size == 0:
         raise FfmpegError("Audio output missing or empty")
+
+
+def parse_silences(stderr: str) -> list[tuple[float, float]]:
+    silences: list[tuple[float, float]] = []
+    start: Optional[float] = None
+    for line in stderr.splitlines():
+        match = _SILENCE_START_RE.search(line)
+        if match:
+            start = max(float(match.group(1)), 0.0)
+            continue
+        match = _SILENCE_END_RE.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    return silences
+
+
+def detect_silences(input_path: Path, timeout_sec: int = 450) -> list[tuple[float, float]]:
+    cmd = [
+        "ffmpeg",
+        "-hide_banner",
+        "-nostats",
+        "-i",
+        str(input_path),
+        "-vn",
+        "-af",
+        f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_SECONDS}",
+        "-f",
+        "null",
+        "-",
+    ]
+    result = _run_ffmpeg(cmd, timeout_sec)
+    return parse_silences(result.stderr or "")
+
+
+def choose_cut_points(
+    duration: float,
+    silences: list[tuple[float, float]],
+    chunk_seconds: float,
+) -> list[float]:
+    """Cut at the latest silence before each chunk boundary, or at the boundary itself.
+
+    Chunks never exceed ``chunk_seconds``, so size limits derived from it still hold.
+    """
+    window = chunk_seconds * SILENCE_SEARCH_FRACTION
+    midpoints = sorted((start + end) / 2 for start, end in silences)
+    cuts: list[float] = []
+    last = 0.0
+    while duration - last > chunk_seconds:
+        target = last + chunk_seconds
+        candidates = [m for m in midpoints if target - window <= m <= target and m > last]
+        cut = candidates[-1] if candidates else target
+        cuts.append(cut)
+        last = cut
+    return cuts
+
+
+def parse_segment_list(text: str, directory: Path) -> list[tuple[Path, float]]:
+    chunks: list[tuple[Path, float]] = []
+    for row in csv.reader(text.splitlines()):
+        if len(row) < 2:
+            continue
+        chunks.append((directory / row[0], float(row[1])))
+    return chunks
+
+
+def split_audio(
+    input_path: Path,
+    *,
+    duration: float,
+    chunk_seconds: float,
+    timeout_sec: int = 450,
+) -> list[tuple[Path, float]]:
+    """Split audio at silences in a single segment-muxer pass.
+
+    Returns each chunk with the exact start offset reported by the muxer. When the
+    audio already fits in one chunk the input itself is returned at offset 0.
+    """
+    if duration <= chunk_seconds:
+        return [(input_path, 0.0)]
+
+    cuts = choose_cut_points(duration, detect_silences(input_path, timeout_sec), chunk_seconds)
+    list_path = input_path.with_name(f"{input_path.stem}.chunks.csv")
+    pattern = input_path.with_name(f"{input_path.stem}.chunk%03d{input_path.suffix}")
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        str(input_path),
+        "-vn",
+        "-c",
+        "copy",
+        "-f",
+        "segment",
+        "-segment_times",
+        ",".join(f"{cut:.3f}" for cut in cuts),
+        "-reset_timestamps",
+        "1",
+        "-segment_list",
+        str(list_path),
+        "-segment_list_type",
+        "csv",
+        str(pattern),
+    ]
+
+    try:
+        _run_ffmpeg(cmd, timeout_sec)
+        chunks = parse_segment_list(list_path.read_text(), input_path.parent)
+    except Exception:
+        for path in input_path.parent.glob(f"{input_path.stem}.chunk*{input_path.suffix}"):
+            try:
+                path.unlink()
+            except Exception:
+                pass
+        raise
+    finally:
+        try:
+            if list_path.exists():
+                list_path.unlink()
+        except Exception:
+            pass
+
+    if not chunks:
+        raise FfmpegError("Segment list missing or empty")
+    return chunks
@@ -0,0 +1,59 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app.services.audio_profile import AUDIO_PROFILES
+from app.services.ffmpeg import (
+    _run_ffmpeg,
+    audio_encode_cmd,
+    choose_cut_points,
+    parse_segment_list,
+    parse_silences,
+)
+
+
+def test_parse_silences():
+    stderr = "\n".join(
+        [
+            "[silencedetect @ 0x1] silence_start: 118.2",
+            "[silencedetect @ 0x1] silence_end: 119.0 | silence_duration: 0.8",
+            "size=N/A time=00:05:00.00",
+            "[silencedetect @ 0x1] silence_start: -0.01",
+            "[silencedetect @ 0x1] silence_end: 0.5 | silence_duration: 0.51",
+        ]
+    )
+    assert parse_silences(stderr) == [(118.2, 119.0), (0.0, 0.5)]
+
+
+def test_choose_cut_points_prefers_silence_before_boundary():
+    silences = [(50.0, 51.0), (110.0, 112.0), (125.0, 126.0)]
+    cuts = choose_cut_points(300.0, silences, 120.0)
+    assert cuts[0] == 111.0
+    assert all(b - a <= 120.0 for a, b in zip([0.0] + cuts, cuts + [300.0]))
+
+
+def test_choose_cut_points_falls_back_to_boundary():
+    assert choose_cut_points(250.0, [], 100.0) == [100.0, 200.0]
+    assert choose_cut_points(90.0, [], 100.0) == []
+
+
+def test_parse_segment_list():
+    text = "a.chunk000.mp3,0.000000,111.012000\na.chunk001.mp3,111.012000,240.5\n"
+    chunks = parse_segment_list(text, Path("/tmp"))
+    assert chunks == [(Path("/tmp/a.chunk000.mp3"), 0.0), (Path("/tmp/a.chunk001.mp3"), 111.012)]
+
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+@pytest.mark.parametrize("name", sorted(AUDIO_PROFILES))
+def test_audio_encode_is_reproducible(tmp_path, name):
+    profile = AUDIO_PROFILES[name]
+    outputs = []
+    for attempt in range(2):
+        output = tmp_path / f"out{attempt}{profile.suffix}"
+        cmd = audio_encode_cmd("sine=frequency=440:duration=2", output, profile)
+        cmd[cmd.index("-i"):cmd.index("-i")] = ["-f", "lavfi"]
+        _run_ffmpeg(cmd, 60)
+        outputs.append(output.read_bytes())
+    assert outputs[0] == outputs[1]
@@ -1,15 +1,25 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Dict
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 import firebase_admin
 from firebase_admin import credentials, firestore
 
 from app.config import get_settings
+from app.services.hashing import sha256_hex
 
 
+# Workspace roots only need to exist; the API re-upserts one at most once per TTL per process.
+WORKSPACE_ROOT_TTL_SECONDS = 600
+# Firestore caps a batched write at 500 operations.
+MAX_BATCH_WRITES = 500
+
 _app = None
+_workspace_roots: Dict[str, float] = {}
+_workspace_roots_lock = threading.Lock()
 
 
 def get_firestore_client() -> firestore.Client:
@@ -30,37 +40,78 @@ def get_firestore_client() -> firestore.Client:
     return firestore.client(app=_app)
 
 
-def ensure_workspace_root(workspace_id: str) -> None:
-    db = get_firestore_client()
-    db.collection("workspaces").document(workspace_id).set(
-        {"updatedAt": firestore.SERVER_TIMESTAMP}, merge=True
-    )
+def workspace_root_ref(workspace_id: str):
+    return get_firestore_client().collection("workspaces").document(workspace_id)
+
+
+def workspace_root_due(workspace_id: str) -> bool:
+    """Whether this process has not upserted the workspace root within the TTL."""
+    with _workspace_roots_lock:
+        return _workspace_roots.get(workspace_id, 0.0) <= time.monotonic()
+
+
+def mark_workspace_root(workspace_id: str) -> None:
+    with _workspace_roots_lock:
+        _workspace_roots[workspace_id] = time.monotonic() + WORKSPACE_ROOT_TTL_SECONDS
+
+
+def workspace_root_doc() -> Dict[str, Any]:
+    return {"updatedAt": firestore.SERVER_TIMESTAMP}
 
 
 def workspace_reel_ref(workspace_id: str, reel_id: str):
     settings = get_settings()
-    db = get_firestore_client()
-    ensure_workspace_root(workspace_id)
-    return (
-        db.collection("workspaces")
-        .document(workspace_id)
-        .collection(settings.FIRESTORE_REELS_COLLECTION)
-        .document(reel_id)
-    )
+    return workspace_root_ref(workspace_id).collection(settings.FIRESTORE_REELS_COLLECTION).document(reel_id)
 
 
 def workspace_job_ref(workspace_id: str, job_id: str):
     settings = get_settings()
-    db = get_firestore_client()
-    ensure_workspace_root(workspace_id)
+    return workspace_root_ref(workspace_id).collection(settings.FIRESTORE_JOBS_COLLECTION).document(job_id)
+
+
+def workspace_reel_index_ref(workspace_id: str, canonical_key: str):
+    settings = get_settings()
     return (
-        db.collection("workspaces")
-        .document(workspace_id)
-        .collection(settings.FIRESTORE_JOBS_COLLECTION)
-        .document(job_id)
+        workspace_root_ref(workspace_id)
+        .collection(settings.FIRESTORE_REEL_INDEX_COLLECTION)
+        .document(sha256_hex(canonical_key))
     )
 
 
+def get_docs(refs: Iterable[Any]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Read several documents in one round trip, keyed by path (None if missing)."""
+    refs = list(refs)
+    if not refs:
+        return {}
+    docs: Dict[str, Optional[Dict[str, Any]]] = {ref.path: None for ref in refs}
+    for snapshot in get_firestore_client().get_all(refs):
+        if snapshot.exists:
+            docs[snapshot.reference.path] = snapshot.to_dict() or {}
+    return docs
+
+
+def commit_writes(workspace_id: str, writes: Iterable[Tuple[Any, Dict[str, Any]]]) -> None:
+    """Merge ``writes`` in one atomic batch, upserting the workspace root when it is due."""
+    commit_bulk(writes, [workspace_id])
+
+
+def commit_bulk(writes: Iterable[Tuple[Any, Dict[str, Any]]], workspace_ids: Iterable[str]) -> None:
+    """Merge ``writes`` in as few batches as Firestore allows, upserting due workspace roots.
+
+    Writes that fit in one batch are atomic; larger sets are committed chunk by chunk.
+    """
+    client = get_firestore_client()
+    due = [ws for ws in dict.fromkeys(workspace_ids) if workspace_root_due(ws)]
+    ops = [(workspace_root_ref(ws), workspace_root_doc()) for ws in due] + list(writes)
+    for start in range(0, len(ops), MAX_BATCH_WRITES):
+        batch = client.batch()
+        for ref, data in ops[start:start + MAX_BATCH_WRITES]:
+            batch.set(ref, data, merge=True)
+        batch.commit()
+    for ws in due:
+        mark_workspace_root(ws)
+
+
 def build_reel_doc(payload: Dict[str, Any]) -> Dict[str, Any]:
     doc = dict(payload)
     doc.setdefault("status", "queued")
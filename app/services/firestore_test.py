@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+
+from app.services import firestore
+from app.services.firestore import MAX_BATCH_WRITES, commit_bulk, workspace_job_ref, workspace_root_ref
+
+
+def test_commit_bulk_chunks_writes_with_root_upserts_first(fake_firestore):
+    writes = [(workspace_job_ref(ws, f"job{i}"), {"n": i}) for i in range(300) for ws in ("w1", "w2")]
+
+    commit_bulk(writes, ["w1", "w2", "w1"])
+
+    assert [len(batch) for batch in fake_firestore.batches] == [MAX_BATCH_WRITES, 102]
+    roots = [workspace_root_ref(ws).path for ws in ("w1", "w2")]
+    assert fake_firestore.batches[0][:2] == roots
+    assert not any(path in roots for path in fake_firestore.batches[1])
+
+    # Roots are not upserted again within the TTL.
+    commit_bulk(writes[:1], ["w1", "w2"])
+    assert fake_firestore.batches[-1] == [writes[0][0].path]
+
+
+def test_workspace_root_memo_expires_after_ttl(fake_firestore, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(firestore, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    assert firestore.workspace_root_due("w1")
+    firestore.mark_workspace_root("w1")
+    assert not firestore.workspace_root_due("w1")
+    assert firestore.workspace_root_due("w2")
+
+    now[0] += firestore.WORKSPACE_ROOT_TTL_SECONDS - 1
+    assert not firestore.workspace_root_due("w1")
+    now[0] += 1
+    assert firestore.workspace_root_due("w1")
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+import httpx
+
+
+MAX_CONNECTIONS = 32
+MAX_KEEPALIVE_CONNECTIONS = 16
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """Process-wide client so connections are reused across jobs."""
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        ),
+        timeout=httpx.Timeout(connect=30.0, read=900.0, write=300.0, pool=30.0),
+    )
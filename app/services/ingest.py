@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import logging
+import signal
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from app.config import get_settings
+from app.services.audio_profile import AudioProfile, profile_for_provider
+from app.services.downloader import DownloadError, download_instagram
+from app.services.ffmpeg import FfmpegError, audio_encode_cmd, extract_audio
+from app.services.media_probe import MediaInfo, NoAudioStreamError, probe_media, require_audio
+from app.services.stage_cache import DOWNLOADED, TRANSCODED, load_checkpoint, save_checkpoint
+from app.services.transcription_router import choose_provider
+from app.utils.stages import CPU, IO, stage
+
+
+AUDIO_ONLY_FORMAT = "wa/ba/b"
+# ffmpeg's complaint when the input has no stream to encode, i.e. no audio.
+NO_OUTPUT_STREAMS = "does not contain any stream"
+
+
+def _stderr_text(handle) -> str:
+    handle.seek(0)
+    return handle.read().decode("utf-8", errors="replace").strip()
+
+
+def _kill(proc: subprocess.Popen) -> None:
+    if proc.poll() is None:
+        proc.kill()
+        proc.wait()
+
+
+def stream_audio(
+    url: str,
+    output_path: Path,
+    profile: AudioProfile,
+    download_timeout_sec: int = 180,
+    timeout_sec: int = 450,
+) -> None:
+    """Pipe the smallest audio-only format from yt-dlp straight into ffmpeg.
+
+    The source media is never written to disk. Failures map to DownloadError
+    when yt-dlp is at fault, NoAudioStreamError when the media has no audio and
+    FfmpegError otherwise, as in the two-step path.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    ytdlp_cmd = ["yt-dlp", "-q", "--no-part", "-f", AUDIO_ONLY_FORMAT, "-o", "-", url]
+
+    with tempfile.TemporaryFile() as ytdlp_err, tempfile.TemporaryFile() as ffmpeg_err:
+        ytdlp = subprocess.Popen(ytdlp_cmd, stdout=subprocess.PIPE, stderr=ytdlp_err)
+        try:
+            ffmpeg = subprocess.Popen(
+                audio_encode_cmd("pipe:0", output_path, profile),
+                stdin=ytdlp.stdout,
+                stdout=subprocess.DEVNULL,
+                stderr=ffmpeg_err,
+            )
+        except Exception:
+            _kill(ytdlp)
+            raise
+        # ffmpeg owns the read end now; closing ours lets yt-dlp see SIGPIPE if ffmpeg dies.
+        ytdlp.stdout.close()
+
+        started = time.monotonic()
+        try:
+            ytdlp.wait(timeout=download_timeout_sec)
+        except subprocess.TimeoutExpired as exc:
+            _kill(ytdlp)
+            _kill(ffmpeg)
+            raise DownloadError("yt-dlp timed out") from exc
+
+        try:
+            ffmpeg.wait(timeout=max(timeout_sec - (time.monotonic() - started), 1))
+        except subprocess.TimeoutExpired as exc:
+            _kill(ffmpeg)
+            raise FfmpegError("ffmpeg timed out") from exc
+
+        ytdlp_stderr = _stderr_text(ytdlp_err)
+        broken_pipe = ytdlp.returncode == -signal.SIGPIPE or "Broken pipe" in ytdlp_stderr
+        if ytdlp.returncode != 0 and not (broken_pipe and ffmpeg.returncode != 0):
+            raise DownloadError(f"yt-dlp failed: {ytdlp_stderr}")
+        if ffmpeg.returncode != 0:
+            ffmpeg_stderr = _stderr_text(ffmpeg_err)
+            if NO_OUTPUT_STREAMS in ffmpeg_stderr:
+                raise NoAudioStreamError("Media has no audio stream")
+            raise FfmpegError(f"ffmpeg failed: {ffmpeg_stderr}")
+
+    if not output_path.exists() or output_path.stat().st_size == 0:
+        raise FfmpegError("Audio output missing or empty")
+
+
+@dataclass(frozen=True)
+class IngestedAudio:
+    audio_path: Path
+    media: Optional[MediaInfo]
+    provider: Optional[str]
+    # Checkpointed audio belongs to the stage cache and outlives a failed attempt.
+    checkpointed: bool = False
+
+
+def _media_fields(media: Optional[MediaInfo]) -> Optional[dict]:
+    return asdict(media) if media else None
+
+
+def _media_from(fields: Optional[dict]) -> Optional[MediaInfo]:
+    return MediaInfo(**fields) if fields else None
+
+
+def ingest_audio(
+    job_id: str,
+    reel_url: str,
+    logger: logging.Logger | logging.LoggerAdapter,
+    *,
+    checkpoint_key: Optional[str] = None,
+    on_stage: Optional[Callable[[str], None]] = None,
+) -> IngestedAudio:
+    """Fetch a reel and leave a single transcription-ready audio file.
+
+    With ``checkpoint_key``, the downloaded video and the extracted audio are saved
+    to the stage cache as each step finishes (``on_stage`` is told which), and a
+    retry resumes from the latest one.
+    """
+    settings = get_settings()
+    tmp_dir = Path(settings.TMP_DIR)
+    video_path = tmp_dir / f"{job_id}.mp4"
+    audio_path: Path | None = None
+
+    def checkpoint(name: str, data: dict, files: dict) -> dict:
+        if checkpoint_key is None:
+            return files
+        moved = save_checkpoint(checkpoint_key, name, data, files)
+        if on_stage is not None:
+            on_stage(name)
+        return moved
+
+    if checkpoint_key is not None:
+        saved = load_checkpoint(checkpoint_key, TRANSCODED)
+        if saved is not None:
+            logger.info("Resuming from %s checkpoint", TRANSCODED)
+            return IngestedAudio(saved["audio"], _media_from(saved.get("media")), saved.get("provider"), True)
+
+    try:
+        if settings.STREAMING_INGEST:
+            # Nothing is known about the media until the audio exists; probe that instead.
+            profile = profile_for_provider(choose_provider(None))
+            audio_path = tmp_dir / f"{job_id}{profile.suffix}"
+            logger.info("Streaming audio profile=%s", profile.name)
+            with stage(IO):
+                stream_audio(reel_url, audio_path, profile)
+            media = probe_media(audio_path, logger=logger)
+            require_audio(media)
+            provider = None
+        else:
+            saved = load_checkpoint(checkpoint_key, DOWNLOADED) if checkpoint_key else None
+            if saved is not None:
+                logger.info("Resuming from %s checkpoint", DOWNLOADED)
+                video_path, media = saved["video"], _media_from(saved.get("media"))
+            else:
+                logger.info("Downloading video")
+                with stage(IO):
+                    ytdlp_info = download_instagram(reel_url, video_path)
+                media = MediaInfo.from_ytdlp(ytdlp_info) or probe_media(video_path, logger=logger)
+                require_audio(media)
+                video_path = checkpoint(DOWNLOADED, {"media": _media_fields(media)}, {"video": video_path})[
+                    "video"
+                ]
+
+            provider = choose_provider(media.duration if media else None)
+            profile = profile_for_provider(provider)
+            audio_path = tmp_dir / f"{job_id}{profile.suffix}"
+            logger.info("Extracting audio profile=%s", profile.name)
+            with stage(CPU):
+                extract_audio(video_path, audio_path, profile)
+
+        audio_path = checkpoint(
+            TRANSCODED,
+            {"media": _media_fields(media), "provider": provider},
+            {"audio": audio_path},
+        )["audio"]
+        return IngestedAudio(audio_path, media, provider, audio_path.parent != tmp_dir)
+    except BaseException:
+        if audio_path is not None and audio_path.parent == tmp_dir:
+            audio_path.unlink(missing_ok=True)
+        raise
+    finally:
+        # Once audio exists the video is never needed again; a saved download is kept otherwise.
+        if (audio_path is not None and audio_path.exists()) or video_path.parent == tmp_dir:
+            video_path.unlink(missing_ok=True)
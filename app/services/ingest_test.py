@@ -0,0 +1,57 @@
+import logging
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+from app.services import ingest
+from app.services.audio_profile import profile_for_provider
+from app.services.ffmpeg import FfmpegError
+from app.services.ingest import ingest_audio, stream_audio
+from app.services.media_probe import MediaInfo, NoAudioStreamError
+
+
+def _tool(bin_dir: Path, name: str, script: str) -> None:
+    path = bin_dir / name
+    path.write_text(f"#!/bin/sh\n{script}\n")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+
+
+@pytest.fixture
+def tools(tmp_path, monkeypatch, settings):
+    """Stand-ins for yt-dlp and ffmpeg on PATH."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    _tool(bin_dir, "yt-dlp", "printf video-only-bytes")
+    return bin_dir
+
+
+def test_stream_without_audio_is_not_an_ffmpeg_error(tools, tmp_path):
+    _tool(tools, "ffmpeg", "cat >/dev/null; echo 'Output file #0 does not contain any stream' >&2; exit 1")
+
+    with pytest.raises(NoAudioStreamError):
+        stream_audio("https://example.com/r1", tmp_path / "audio.ogg", profile_for_provider(None))
+
+
+def test_other_ffmpeg_failures_still_raise_ffmpeg_error(tools, tmp_path):
+    _tool(tools, "ffmpeg", "cat >/dev/null; echo 'Invalid data found' >&2; exit 1")
+
+    with pytest.raises(FfmpegError, match="Invalid data found"):
+        stream_audio("https://example.com/r1", tmp_path / "audio.ogg", profile_for_provider(None))
+
+
+def test_streamed_audio_without_an_audio_stream_is_rejected(settings, tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        ingest,
+        "get_settings",
+        lambda: settings.model_copy(update={"TMP_DIR": str(tmp_path), "STREAMING_INGEST": True}),
+    )
+    monkeypatch.setattr(ingest, "choose_provider", lambda duration: None)
+    monkeypatch.setattr(ingest, "stream_audio", lambda url, path, profile: path.write_bytes(b"x"))
+    monkeypatch.setattr(ingest, "probe_media", lambda path, logger: MediaInfo(duration=12.0, has_audio=False))
+
+    with pytest.raises(NoAudioStreamError):
+        ingest_audio("j1", "https://example.com/r1", logging.getLogger(__name__))
+    assert list(tmp_path.iterdir()) == []
@@ -2,20 +2,105 @@ from __future__ import annotations
 
 import json
 import subprocess
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional
 
 import logging
 
 
-def get_duration_seconds(path: Path, logger: logging.Logger | None = None) -> Optional[float]:
+PROBE_MEMO_SIZE = 256
+
+_memo: "OrderedDict[tuple[str, int, int], MediaInfo]" = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+class NoAudioStreamError(RuntimeError):
+    pass
+
+
+def _positive_float(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+def _positive_int(value: Any) -> Optional[int]:
+    number = _positive_float(value)
+    return int(number) if number is not None else None
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    duration: Optional[float]
+    has_audio: bool
+    audio_codec: Optional[str] = None
+    video_codec: Optional[str] = None
+    bit_rate: Optional[int] = None
+    size_bytes: Optional[int] = None
+
+    @classmethod
+    def from_ffprobe(cls, payload: Dict[str, Any]) -> "MediaInfo":
+        fmt = payload.get("format") or {}
+        streams = payload.get("streams") or []
+        audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+        video = next((s for s in streams if s.get("codec_type") == "video"), None)
+        return cls(
+            duration=_positive_float(fmt.get("duration")),
+            has_audio=audio is not None,
+            audio_codec=audio.get("codec_name") if audio else None,
+            video_codec=video.get("codec_name") if video else None,
+            bit_rate=_positive_int(fmt.get("bit_rate")),
+            size_bytes=_positive_int(fmt.get("size")),
+        )
+
+    @classmethod
+    def from_ytdlp(cls, info: Optional[Dict[str, Any]]) -> Optional["MediaInfo"]:
+        """Build from yt-dlp's info JSON, or None when it lacks duration or codec data."""
+        if not info:
+            return None
+        duration = _positive_float(info.get("duration"))
+        acodec = info.get("acodec")
+        if duration is None or acodec is None:
+            return None
+        vcodec = info.get("vcodec")
+        tbr = _positive_float(info.get("tbr"))
+        return cls(
+            duration=duration,
+            has_audio=acodec != "none",
+            audio_codec=acodec if acodec != "none" else None,
+            video_codec=vcodec if vcodec not in (None, "none") else None,
+            bit_rate=int(tbr * 1000) if tbr else None,
+            size_bytes=_positive_int(info.get("filesize") or info.get("filesize_approx")),
+        )
+
+
+def probe_media(path: Path, logger: logging.Logger | None = None) -> Optional[MediaInfo]:
+    """Run ffprobe once per file version; results are memoized by path, mtime and size."""
     log = logger or logging.getLogger(__name__)
+    try:
+        stat = path.stat()
+    except OSError:
+        log.warning("ffprobe skipped: %s missing", path.name)
+        return None
+    key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+
+    with _memo_lock:
+        cached = _memo.get(key)
+        if cached is not None:
+            _memo.move_to_end(key)
+            return cached
+
     cmd = [
         "ffprobe",
         "-v",
         "error",
         "-show_entries",
-        "format=duration",
+        "format=duration,size,bit_rate:stream=codec_type,codec_name",
         "-of",
         "json",
         str(path),
@@ -38,14 +123,23 @@ def get_duration_seconds(path: Path, logger: logging.Logger | None = None) -> Op
         return None
 
     try:
-        payload = json.loads(result.stdout or "{}")
-        duration_raw = payload.get("format", {}).get("duration")
-        if duration_raw is None:
-            return None
-        duration = float(duration_raw)
-        if duration <= 0:
-            return None
-        return duration
-    except (ValueError, TypeError, json.JSONDecodeError):
+        info = MediaInfo.from_ffprobe(json.loads(result.stdout or "{}"))
+    except (ValueError, TypeError, AttributeError, json.JSONDecodeError):
         log.warning("ffprobe returned invalid JSON")
         return None
+
+    with _memo_lock:
+        _memo[key] = info
+        while len(_memo) > PROBE_MEMO_SIZE:
+            _memo.popitem(last=False)
+    return info
+
+
+def get_duration_seconds(path: Path, logger: logging.Logger | None = None) -> Optional[float]:
+    info = probe_media(path, logger=logger)
+    return info.duration if info else None
+
+
+def require_audio(info: Optional[MediaInfo]) -> None:
+    if info is not None and not info.has_audio:
+        raise NoAudioStreamError("Media has no audio stream")
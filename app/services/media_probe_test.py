@@ -0,0 +1,37 @@
+from app.services.media_probe import MediaInfo
+
+
+def test_media_info_from_ffprobe():
+    payload = {
+        "format": {"duration": "93.5", "size": "1048576", "bit_rate": "89000"},
+        "streams": [
+            {"codec_type": "video", "codec_name": "h264"},
+            {"codec_type": "audio", "codec_name": "aac"},
+        ],
+    }
+    info = MediaInfo.from_ffprobe(payload)
+    assert info == MediaInfo(
+        duration=93.5,
+        has_audio=True,
+        audio_codec="aac",
+        video_codec="h264",
+        bit_rate=89000,
+        size_bytes=1048576,
+    )
+
+
+def test_media_info_from_ffprobe_without_audio():
+    payload = {"format": {"duration": "12.0"}, "streams": [{"codec_type": "video", "codec_name": "h264"}]}
+    assert MediaInfo.from_ffprobe(payload).has_audio is False
+
+
+def test_media_info_from_ytdlp():
+    info = MediaInfo.from_ytdlp({"duration": 41, "acodec": "none", "vcodec": "avc1", "tbr": 900.5})
+    assert info is not None
+    assert info.has_audio is False
+    assert info.bit_rate == 900500
+
+
+def test_media_info_from_ytdlp_incomplete():
+    assert MediaInfo.from_ytdlp({"duration": 41}) is None
+    assert MediaInfo.from_ytdlp(None) is None
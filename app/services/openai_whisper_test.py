@@ -1,4 +1,8 @@
-from app.services.openai_whisper import _map_openai_segments
+from contextlib import nullcontext
+
+from app.services import chunking, openai_whisper
+from app.services.media_probe import MediaInfo
+from app.services.openai_whisper import _map_openai_segments, transcribe_with_openai
 
 
 def test_map_openai_segments_basic():
@@ -17,3 +21,23 @@ def test_map_openai_segments_with_offset():
     segments = [{"id": 0, "start": 0.0, "end": 1.0, "text": "Chunk text"}]
     mapped = _map_openai_segments(segments, offset=10.0)
     assert mapped == [{"id": 0, "start": 10.0, "end": 11.0, "text": "Chunk text"}]
+
+
+def test_chunks_carry_their_length_to_the_rate_limiter(settings, tmp_path, monkeypatch):
+    audio = tmp_path / "audio.ogg"
+    audio.write_bytes(b"0" * 1000)
+    chunks = [(audio, 0.0), (tmp_path / "c1.ogg", 400.0), (tmp_path / "c2.ogg", 800.0)]
+    monkeypatch.setattr(chunking, "split_audio", lambda *args, **kwargs: chunks)
+    monkeypatch.setattr(chunking, "stage", lambda kind: nullcontext())
+    sent = {}
+
+    def transcribe_file(path, *, language, prompt, logger, audio_seconds=None, cancel=None):
+        sent[path.name] = audio_seconds
+        return {"text": path.stem, "segments": []}
+
+    monkeypatch.setattr(openai_whisper, "_transcribe_file", transcribe_file)
+    media = MediaInfo(duration=1000.0, has_audio=True)
+    result = transcribe_with_openai(audio, media=media)
+
+    assert sent == {"audio.ogg": 400.0, "c1.ogg": 400.0, "c2.ogg": 200.0}
+    assert result["text"] == "audio c1 c2"
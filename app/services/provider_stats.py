@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from redis.exceptions import RedisError
+
+from app.config import get_settings
+from app.services.redis_client import get_redis
+
+
+LOCAL = "local"
+OPENAI = "openai"
+PROVIDERS = (LOCAL, OPENAI)
+
+KEY_PREFIX = "router:stats:"
+SPEND_KEY_PREFIX = "router:spend:"
+RTF_HISTORY_PREFIX = "router:rtf:"
+RTF_HISTORY_SIZE = 200
+EWMA_ALPHA = 0.2
+
+# KEYS[1] = stats hash. ARGV[1] = alpha, ARGV[2] = samples increment, then field/value pairs.
+_RECORD_SCRIPT = """
+local alpha = tonumber(ARGV[1])
+for i = 3, #ARGV, 2 do
+  local value = tonumber(ARGV[i + 1])
+  local old = redis.call('hget', KEYS[1], ARGV[i])
+  if old then
+    value = tonumber(old) + alpha * (value - tonumber(old))
+  end
+  redis.call('hset', KEYS[1], ARGV[i], value)
+end
+if tonumber(ARGV[2]) > 0 then
+  redis.call('hincrby', KEYS[1], 'samples', ARGV[2])
+end
+return 1
+"""
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProviderStats:
+    """Rolling estimates for one provider, shared by every worker."""
+
+    rtf: Optional[float] = None
+    queue_wait: float = 0.0
+    error_rate: float = 0.0
+    samples: int = 0
+
+
+def _key(provider: str) -> str:
+    return f"{KEY_PREFIX}{provider}"
+
+
+def _record(provider: str, samples: int, **fields: float) -> None:
+    args = []
+    for name, value in fields.items():
+        args.extend((name, value))
+    try:
+        get_redis().eval(_RECORD_SCRIPT, 1, _key(provider), EWMA_ALPHA, samples, *args)
+    except RedisError as exc:
+        logger.warning("Provider stats update failed: %s", exc)
+
+
+def record_outcome(provider: str, *, audio_seconds: Optional[float], elapsed: float, ok: bool) -> None:
+    """Fold one finished transcription into the provider's real-time factor and error rate."""
+    if not ok:
+        _record(provider, 1, errorRate=1.0)
+    elif audio_seconds:
+        rtf = elapsed / audio_seconds
+        _record(provider, 1, errorRate=0.0, rtf=rtf)
+        key = f"{RTF_HISTORY_PREFIX}{provider}"
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.lpush(key, rtf)
+            pipe.ltrim(key, 0, RTF_HISTORY_SIZE - 1)
+            pipe.execute()
+        except RedisError as exc:
+            logger.warning("Provider latency history update failed: %s", exc)
+
+
+def recent_rtf(provider: str) -> List[float]:
+    """The provider's most recent real-time factors, newest first."""
+    try:
+        return [float(value) for value in get_redis().lrange(f"{RTF_HISTORY_PREFIX}{provider}", 0, -1)]
+    except RedisError as exc:
+        logger.warning("Provider latency history lookup failed: %s", exc)
+        return []
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile, or None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def record_wait(provider: str, seconds: float) -> None:
+    """Fold the time a request waited for capacity (rate limit or backend slot)."""
+    _record(provider, 0, queueWait=seconds)
+
+
+def load_provider_stats() -> Dict[str, ProviderStats]:
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for provider in PROVIDERS:
+            pipe.hgetall(_key(provider))
+        raw = pipe.execute()
+    except RedisError as exc:
+        logger.warning("Provider stats lookup failed: %s", exc)
+        return {provider: ProviderStats() for provider in PROVIDERS}
+
+    stats = {}
+    for provider, fields in zip(PROVIDERS, raw):
+        values = {key.decode(): value.decode() for key, value in fields.items()}
+        stats[provider] = ProviderStats(
+            rtf=float(values["rtf"]) if "rtf" in values else None,
+            queue_wait=float(values.get("queueWait", 0.0)),
+            error_rate=float(values.get("errorRate", 0.0)),
+            samples=int(values.get("samples", 0)),
+        )
+    return stats
+
+
+def _spend_key(now: float) -> str:
+    return f"{SPEND_KEY_PREFIX}{time.strftime('%Y%m%d%H', time.gmtime(now))}"
+
+
+def openai_cost(audio_seconds: float) -> float:
+    return audio_seconds / 60 * get_settings().OPENAI_COST_PER_MINUTE
+
+
+def openai_spend_this_hour() -> float:
+    try:
+        return float(get_redis().get(_spend_key(time.time())) or 0.0)
+    except RedisError as exc:
+        logger.warning("OpenAI spend lookup failed: %s", exc)
+        return 0.0
+
+
+def record_openai_spend(audio_seconds: float) -> None:
+    key = _spend_key(time.time())
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.incrbyfloat(key, openai_cost(audio_seconds))
+        pipe.expire(key, 2 * 3600)
+        pipe.execute()
+    except RedisError as exc:
+        logger.warning("OpenAI spend update failed: %s", exc)
+
+
+def provider_stats_summary() -> Dict[str, Dict[str, object]]:
+    stats = load_provider_stats()
+    summary: Dict[str, Dict[str, object]] = {
+        provider: {
+            "rtf": round(item.rtf, 4) if item.rtf is not None else None,
+            "queueWaitSeconds": round(item.queue_wait, 3),
+            "errorRate": round(item.error_rate, 4),
+            "samples": item.samples,
+        }
+        for provider, item in stats.items()
+    }
+    summary[OPENAI]["spendThisHour"] = round(openai_spend_this_hour(), 4)
+    return summary
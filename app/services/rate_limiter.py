@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import logging
+import random
+import re
+import time
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Mapping, Optional
+
+from redis.exceptions import RedisError
+
+from app.config import get_settings
+from app.services.redis_client import get_redis
+
+
+MAX_SLEEP_SECONDS = 30.0
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+# KEYS[1] = blocked-until key, KEYS[2..] = buckets.
+# ARGV[1] = now, then (capacity, refill per second, cost) per bucket.
+# Takes from every bucket or none; returns the seconds to wait as a string.
+_ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local blocked = tonumber(redis.call('get', KEYS[1]) or '0')
+if blocked > now then
+  return tostring(blocked - now)
+end
+local wait = 0
+local state = {}
+for i = 2, #KEYS do
+  local base = 2 + (i - 2) * 3
+  local capacity = tonumber(ARGV[base])
+  local rate = tonumber(ARGV[base + 1])
+  local cost = tonumber(ARGV[base + 2])
+  local tokens = capacity
+  local saved = redis.call('hmget', KEYS[i], 'tokens', 'ts')
+  if saved[1] then
+    tokens = math.min(capacity, tonumber(saved[1]) + (now - tonumber(saved[2])) * rate)
+  end
+  if tokens < cost then
+    wait = math.max(wait, (cost - tokens) / rate)
+  end
+  state[i] = {tokens - cost, math.ceil(capacity / rate) + 60}
+end
+if wait > 0 then
+  return tostring(wait)
+end
+for i = 2, #KEYS do
+  redis.call('hset', KEYS[i], 'tokens', state[i][1], 'ts', now)
+  redis.call('expire', KEYS[i], state[i][2])
+end
+return '0'
+"""
+
+# KEYS[1] = blocked-until key, KEYS[2] = request bucket.
+# ARGV = now, block until (0 for none), remaining requests (-1 for unknown), capacity, refill.
+_OBSERVE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local until_ts = tonumber(ARGV[2])
+if until_ts > tonumber(redis.call('get', KEYS[1]) or '0') then
+  redis.call('set', KEYS[1], ARGV[2], 'EX', math.ceil(until_ts - now) + 1)
+end
+local remaining = tonumber(ARGV[3])
+if remaining >= 0 then
+  local capacity = tonumber(ARGV[4])
+  local rate = tonumber(ARGV[5])
+  local tokens = capacity
+  local saved = redis.call('hmget', KEYS[2], 'tokens', 'ts')
+  if saved[1] then
+    tokens = math.min(capacity, tonumber(saved[1]) + (now - tonumber(saved[2])) * rate)
+  end
+  redis.call('hset', KEYS[2], 'tokens', math.min(tokens, remaining), 'ts', now)
+  redis.call('expire', KEYS[2], math.ceil(capacity / rate) + 60)
+end
+return 1
+"""
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Parse OpenAI reset durations such as ``1s``, ``6m0s`` or ``20ms``."""
+    if not value:
+        return None
+    parts = _DURATION_RE.findall(value.strip())
+    if not parts:
+        return None
+    return sum(float(number) * _UNIT_SECONDS[unit] for number, unit in parts)
+
+
+def parse_retry_after(headers: Mapping[str, str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from ``retry-after-ms`` or ``Retry-After`` (seconds or HTTP date)."""
+    millis = headers.get("retry-after-ms")
+    if millis:
+        try:
+            return max(float(millis) / 1000, 0.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(when - (now if now is not None else time.time()), 0.0)
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Cluster-wide token buckets for requests and audio seconds, kept in Redis.
+
+    Every worker draws from the same buckets, and rate-limit headers from any
+    response tighten them for everyone, so workers wait for capacity instead of
+    retrying in lockstep.
+    """
+
+    def __init__(self, name: str, *, requests_per_minute: int, audio_seconds_per_minute: int = 0) -> None:
+        self.blocked_key = f"ratelimit:{name}:blocked"
+        self.requests_key = f"ratelimit:{name}:requests"
+        self.audio_key = f"ratelimit:{name}:audio"
+        self.requests_per_minute = requests_per_minute
+        self.audio_seconds_per_minute = audio_seconds_per_minute
+
+    def _buckets(self, audio_seconds: float) -> list[tuple[str, float, float, float]]:
+        buckets = [(self.requests_key, self.requests_per_minute, self.requests_per_minute / 60, 1.0)]
+        if self.audio_seconds_per_minute and audio_seconds > 0:
+            capacity = self.audio_seconds_per_minute
+            # A chunk longer than a whole minute of budget would otherwise never fit.
+            buckets.append((self.audio_key, capacity, capacity / 60, min(audio_seconds, capacity)))
+        return buckets
+
+    def acquire(self, audio_seconds: float = 0.0, logger: logging.Logger | None = None) -> float:
+        """Block until a request (and its audio seconds) fits; returns the time waited."""
+        log = logger or logging.getLogger(__name__)
+        buckets = self._buckets(audio_seconds)
+        keys = [self.blocked_key] + [bucket[0] for bucket in buckets]
+        waited = 0.0
+        while True:
+            args: list[float] = [time.time()]
+            for _, capacity, rate, cost in buckets:
+                args.extend((capacity, rate, cost))
+            try:
+                wait = float(get_redis().eval(_ACQUIRE_SCRIPT, len(keys), *keys, *args))
+            except RedisError as exc:
+                log.warning("Rate limiter unavailable, not throttling: %s", exc)
+                return waited
+            if wait <= 0:
+                if waited:
+                    log.info("Rate limiter released after %.1fs", waited)
+                return waited
+            # Jitter keeps waiting workers from waking in the same instant.
+            sleep_for = min(wait, MAX_SLEEP_SECONDS) + random.random() * 0.25
+            time.sleep(sleep_for)
+            waited += sleep_for
+
+    def _update(self, block: float, remaining: Optional[int], log: logging.Logger) -> None:
+        now = time.time()
+        try:
+            get_redis().eval(
+                _OBSERVE_SCRIPT,
+                2,
+                self.blocked_key,
+                self.requests_key,
+                now,
+                now + block if block else 0,
+                remaining if remaining is not None else -1,
+                self.requests_per_minute,
+                self.requests_per_minute / 60,
+            )
+        except RedisError as exc:
+            log.warning("Rate limiter update failed: %s", exc)
+
+    def observe(self, headers: Mapping[str, str], logger: logging.Logger | None = None) -> float:
+        """Fold Retry-After and x-ratelimit-* response headers into the shared buckets.
+
+        Returns how long every worker is now paused for (0 when not paused).
+        """
+        log = logger or logging.getLogger(__name__)
+        block = parse_retry_after(headers) or 0.0
+        remaining = _int_header(headers, "x-ratelimit-remaining-requests")
+        if remaining is not None and remaining <= 0:
+            block = max(block, parse_reset_duration(headers.get("x-ratelimit-reset-requests")) or 0.0)
+        if not block and remaining is None:
+            return 0.0
+        if block:
+            log.warning("Rate limited by provider, pausing all workers for %.1fs", block)
+        self._update(block, remaining, log)
+        return block
+
+    def pause(self, seconds: float, logger: logging.Logger | None = None) -> None:
+        self._update(seconds, None, logger or logging.getLogger(__name__))
+
+
+@lru_cache(maxsize=1)
+def get_openai_limiter() -> Optional[RateLimiter]:
+    settings = get_settings()
+    if settings.OPENAI_REQUESTS_PER_MINUTE <= 0:
+        return None
+    return RateLimiter(
+        "openai",
+        requests_per_minute=settings.OPENAI_REQUESTS_PER_MINUTE,
+        audio_seconds_per_minute=settings.OPENAI_AUDIO_SECONDS_PER_MINUTE,
+    )
@@ -0,0 +1,25 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from app.services.rate_limiter import parse_reset_duration, parse_retry_after
+
+
+def test_parse_reset_duration():
+    assert parse_reset_duration("1s") == 1.0
+    assert parse_reset_duration("6m0s") == 360.0
+    assert parse_reset_duration("20ms") == 0.02
+    assert parse_reset_duration("1h2m3.5s") == 3723.5
+    assert parse_reset_duration("") is None
+    assert parse_reset_duration("soon") is None
+
+
+def test_parse_retry_after_prefers_milliseconds():
+    assert parse_retry_after({"retry-after-ms": "1500", "retry-after": "9"}) == 1.5
+    assert parse_retry_after({"retry-after": "7"}) == 7.0
+    assert parse_retry_after({}) is None
+
+
+def test_parse_retry_after_http_date():
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    headers = {"retry-after": format_datetime(datetime(2024, 1, 1, 0, 0, 30, tzinfo=timezone.utc), usegmt=True)}
+    assert parse_retry_after(headers, now=now.timestamp()) == 30.0
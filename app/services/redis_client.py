@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+from redis import Redis
+
+from app.config import get_settings
+
+
+@lru_cache(maxsize=1)
+def get_redis() -> Redis:
+    settings = get_settings()
+    return Redis.from_url(settings.REDIS_URL)
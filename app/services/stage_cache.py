@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+from app.config import get_settings
+from app.services.hashing import sha256_hex
+
+
+DOWNLOADED = "downloaded"
+TRANSCODED = "transcoded"
+TRANSCRIBED = "transcribed"
+PERSISTED = "persisted"
+
+MANIFEST_SUFFIX = ".json"
+CHUNKS_DIR = "chunks"
+
+_prune_lock = threading.Lock()
+
+
+def _root() -> Path:
+    return Path(get_settings().TMP_DIR) / "stage-cache"
+
+
+def checkpoint_dir(key: str) -> Path:
+    return _root() / sha256_hex(key)[:32]
+
+
+def checkpoint_key(workspace_id: str, reel_id: str, job_id: str) -> Optional[str]:
+    """Stage cache key for one job's reel, or None when checkpointing is off.
+
+    Keyed by job too, so a concurrent job for the same reel never clears this one's files.
+    """
+    if not get_settings().STAGE_CACHE_ENABLED:
+        return None
+    return f"{workspace_id}:{reel_id}:{job_id}"
+
+
+def touch_checkpoint(key: str) -> None:
+    """Mark a checkpoint directory as in use so pruning leaves it alone.
+
+    Writes below the top level do not change its mtime, so every write (and every
+    lease renewal of the job that owns it) touches it explicitly.
+    """
+    try:
+        os.utime(checkpoint_dir(key))
+    except OSError:
+        pass
+
+
+def _expired(path: Path, ttl_seconds: int) -> bool:
+    try:
+        return time.time() - path.stat().st_mtime > ttl_seconds
+    except OSError:
+        return True
+
+
+def load_checkpoint(key: str, stage: str) -> Optional[Dict[str, Any]]:
+    """Return a stage's saved data with file entries resolved to paths, or None."""
+    settings = get_settings()
+    if not settings.STAGE_CACHE_ENABLED:
+        return None
+    manifest = checkpoint_dir(key) / f"{stage}{MANIFEST_SUFFIX}"
+    if not manifest.exists() or _expired(manifest, settings.STAGE_CACHE_TTL_SECONDS):
+        return None
+    try:
+        data = json.loads(manifest.read_text())
+    except (OSError, ValueError):
+        return None
+    files = {name: checkpoint_dir(key) / filename for name, filename in data.pop("files", {}).items()}
+    if not all(path.exists() for path in files.values()):
+        return None
+    touch_checkpoint(key)
+    return {**data, **files}
+
+
+def save_checkpoint(
+    key: str,
+    stage: str,
+    data: Mapping[str, Any],
+    files: Mapping[str, Path] | None = None,
+) -> Dict[str, Path]:
+    """Record a finished stage, moving its ``files`` into the checkpoint directory.
+
+    Returns the new location of each file.
+    """
+    settings = get_settings()
+    if not settings.STAGE_CACHE_ENABLED:
+        return dict(files or {})
+    directory = checkpoint_dir(key)
+    directory.mkdir(parents=True, exist_ok=True)
+    moved: Dict[str, Path] = {}
+    for name, path in (files or {}).items():
+        target = directory / path.name
+        if path != target:
+            shutil.move(str(path), target)
+        moved[name] = target
+
+    manifest = directory / f"{stage}{MANIFEST_SUFFIX}"
+    tmp = manifest.with_suffix(".tmp")
+    tmp.write_text(json.dumps({**data, "files": {name: path.name for name, path in moved.items()}}))
+    tmp.replace(manifest)
+    touch_checkpoint(key)
+    prune_checkpoints()
+    return moved
+
+
+def clear_checkpoints(key: str) -> None:
+    shutil.rmtree(checkpoint_dir(key), ignore_errors=True)
+
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def prune_checkpoints(logger: logging.Logger | None = None) -> None:
+    """Drop expired checkpoints, then the least recently used until under the size cap.
+
+    Directories used within the last lease period belong to running jobs and are kept.
+    """
+    settings = get_settings()
+    log = logger or logging.getLogger(__name__)
+    root = _root()
+    if not root.exists():
+        return
+    with _prune_lock:
+        entries = []
+        for directory in root.iterdir():
+            try:
+                if _expired(directory, settings.STAGE_CACHE_TTL_SECONDS):
+                    shutil.rmtree(directory, ignore_errors=True)
+                    continue
+                entries.append((directory.stat().st_mtime, _dir_size(directory), directory))
+            except OSError:
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        live_since = time.time() - settings.LEASE_SECONDS
+        for mtime, size, directory in sorted(entries):
+            if total <= settings.STAGE_CACHE_MAX_BYTES or mtime >= live_since:
+                break
+            shutil.rmtree(directory, ignore_errors=True)
+            total -= size
+            log.info("Evicted stage checkpoint dir=%s bytes=%s", directory.name, size)
+
+
+class DiskChunkCheckpoints:
+    """Per-chunk transcripts for one job/reel, stored next to its stage checkpoints."""
+
+    def __init__(self, key: str, namespace: str = "") -> None:
+        self.key = key
+        self.directory = checkpoint_dir(key) / CHUNKS_DIR
+        if namespace:
+            self.directory /= namespace
+
+    def scoped(self, name: str) -> "DiskChunkCheckpoints":
+        return DiskChunkCheckpoints(self.key, namespace=name)
+
+    def _path(self, index: int, offset: float, end: float) -> Path:
+        return self.directory / f"{index}-{round(offset * 1000)}-{round(end * 1000)}.json"
+
+    def get(self, index: int, offset: float, end: float) -> Optional[Dict[str, Any]]:
+        if not get_settings().STAGE_CACHE_ENABLED:
+            return None
+        try:
+            return json.loads(self._path(index, offset, end).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def put(self, index: int, offset: float, end: float, payload: Dict[str, Any]) -> None:
+        if not get_settings().STAGE_CACHE_ENABLED:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._path(index, offset, end).write_text(json.dumps(payload))
+        touch_checkpoint(self.key)
@@ -0,0 +1,53 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import stage_cache
+from app.services.stage_cache import DiskChunkCheckpoints, checkpoint_dir, prune_checkpoints, save_checkpoint
+
+
+@pytest.fixture
+def settings(monkeypatch, tmp_path):
+    settings = SimpleNamespace(
+        TMP_DIR=str(tmp_path),
+        STAGE_CACHE_ENABLED=True,
+        STAGE_CACHE_TTL_SECONDS=3600,
+        STAGE_CACHE_MAX_BYTES=10,
+        LEASE_SECONDS=300,
+    )
+    monkeypatch.setattr(stage_cache, "get_settings", lambda: settings)
+    return settings
+
+
+def _age(key: str, seconds: float) -> None:
+    past = time.time() - seconds
+    os.utime(checkpoint_dir(key), (past, past))
+
+
+def test_prune_evicts_idle_dirs_but_keeps_recently_used(settings):
+    save_checkpoint("w:idle:j1", "downloaded", {"pad": "x" * 20})
+    save_checkpoint("w:busy:j2", "downloaded", {"pad": "x" * 20})
+    _age("w:idle:j1", 1000)
+    _age("w:busy:j2", 1000)
+
+    # A chunk written deep inside the directory still counts as use.
+    DiskChunkCheckpoints("w:busy:j2").put(0, 0.0, 60.0, {"text": "hi"})
+    prune_checkpoints()
+    assert not checkpoint_dir("w:idle:j1").exists()
+    assert checkpoint_dir("w:busy:j2").exists()
+
+    _age("w:busy:j2", settings.STAGE_CACHE_TTL_SECONDS + 1)
+    prune_checkpoints()
+    assert not checkpoint_dir("w:busy:j2").exists()
+
+
+def test_scoped_chunk_checkpoints_are_kept_apart(settings):
+    checkpoints = DiskChunkCheckpoints("w:r:j")
+    checkpoints.scoped("local").put(0, 0.0, 60.0, {"text": "local"})
+    checkpoints.scoped("openai").put(0, 0.0, 60.0, {"text": "openai"})
+
+    assert checkpoints.scoped("local").get(0, 0.0, 60.0) == {"text": "local"}
+    assert checkpoints.scoped("openai").get(0, 0.0, 60.0) == {"text": "openai"}
+    assert checkpoints.get(0, 0.0, 60.0) is None
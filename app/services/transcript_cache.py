@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import Any, Dict, Optional
+
+import logging
+from redis.exceptions import RedisError
+
+from app.config import get_settings
+from app.services.redis_client import get_redis
+
+
+KEY_PREFIX = "transcript:"
+INDEX_KEY = "transcript:index"
+
+
+def _key(digest: str) -> str:
+    return f"{KEY_PREFIX}{digest}"
+
+
+def get_cached_transcript(
+    digest: str, logger: logging.Logger | None = None
+) -> Optional[Dict[str, Any]]:
+    settings = get_settings()
+    log = logger or logging.getLogger(__name__)
+    if not settings.TRANSCRIPT_CACHE_ENABLED:
+        return None
+
+    redis = get_redis()
+    try:
+        raw = redis.get(_key(digest))
+        if raw is None:
+            return None
+        pipe = redis.pipeline(transaction=False)
+        pipe.zadd(INDEX_KEY, {digest: time.time()})
+        pipe.expire(_key(digest), settings.TRANSCRIPT_CACHE_TTL_SECONDS)
+        pipe.execute()
+    except RedisError as exc:
+        log.warning("Transcript cache lookup failed: %s", exc)
+        return None
+
+    try:
+        return json.loads(raw)
+    except (TypeError, ValueError):
+        log.warning("Transcript cache entry corrupt, ignoring")
+        return None
+
+
+def store_transcript(
+    digest: str, result: Dict[str, Any], logger: logging.Logger | None = None
+) -> None:
+    """Store a transcript and evict the least recently used entries past the size bound."""
+    settings = get_settings()
+    log = logger or logging.getLogger(__name__)
+    if not settings.TRANSCRIPT_CACHE_ENABLED:
+        return
+
+    entry = {
+        "text": result.get("text") or result.get("transcript"),
+        "segments": result.get("segments"),
+        "durationSeconds": result.get("duration") or result.get("durationSeconds"),
+        "provider": result.get("provider"),
+    }
+    redis = get_redis()
+    try:
+        pipe = redis.pipeline(transaction=False)
+        pipe.set(_key(digest), json.dumps(entry), ex=settings.TRANSCRIPT_CACHE_TTL_SECONDS)
+        pipe.zadd(INDEX_KEY, {digest: time.time()})
+        pipe.zcard(INDEX_KEY)
+        size = pipe.execute()[-1]
+
+        excess = size - settings.TRANSCRIPT_CACHE_MAX_ENTRIES
+        if excess > 0:
+            evicted = redis.zpopmin(INDEX_KEY, excess)
+            if evicted:
+                redis.delete(*(_key(member.decode()) for member, _ in evicted))
+    except RedisError as exc:
+        log.warning("Transcript cache store failed: %s", exc)
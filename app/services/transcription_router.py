@@ -4,51 +4,288 @@ from pathlib import Path
 from typing import Any, Dict, Optional
 
 import logging
+import os
+import shutil
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 
-from app.services.media_probe import get_duration_seconds
+from app.config import get_settings
+from app.services.chunking import ChunkCheckpoints
+from app.services.circuit_breaker import get_breaker
+from app.services.media_probe import MediaInfo, probe_media
 from app.services.openai_whisper import transcribe_with_openai
-from app.services.whisper import transcribe_audio
+from app.services.provider_stats import (
+    LOCAL,
+    OPENAI,
+    ProviderStats,
+    load_provider_stats,
+    openai_cost,
+    openai_spend_this_hour,
+    percentile,
+    recent_rtf,
+    record_openai_spend,
+    record_outcome,
+)
+from app.services.whisper import transcribe_local
+
+
+LOCAL_MAX_SECONDS = 90
+MIN_SAMPLES = 5
+MIN_SUCCESS_RATE = 0.05
+COLD_HEDGE_DELAY_SECONDS = 120.0
+
+
+@dataclass
+class RouteDecision:
+    provider: str
+    reason: str
+    estimates: Dict[str, float] = field(default_factory=dict)
+
+    def describe(self) -> str:
+        estimates = " ".join(f"est_{name}={seconds:.1f}s" for name, seconds in sorted(self.estimates.items()))
+        return f"reason={self.reason}" + (f" {estimates}" if estimates else "")
+
+
+def _static_provider(duration: Optional[float]) -> str:
+    if duration is None or duration < LOCAL_MAX_SECONDS:
+        return LOCAL
+    return OPENAI
+
+
+def expected_seconds(stats: ProviderStats, duration: float) -> float:
+    """Expected completion time: queue wait plus transcription, inflated by the failure rate."""
+    return (stats.queue_wait + (stats.rtf or 0.0) * duration) / max(1 - stats.error_rate, MIN_SUCCESS_RATE)
+
+
+def pick_provider(
+    duration: Optional[float],
+    stats: Dict[str, ProviderStats],
+    *,
+    openai_available: bool = True,
+    openai_budget_left: Optional[float] = None,
+    cost: float = 0.0,
+) -> RouteDecision:
+    """Pick the provider with the lowest expected completion time that fits the budget."""
+    if duration is None:
+        return RouteDecision(LOCAL, "duration_unknown")
+    if not openai_available:
+        return RouteDecision(LOCAL, "openai_unconfigured")
+    if openai_budget_left is not None and cost > openai_budget_left:
+        return RouteDecision(LOCAL, "openai_budget_exhausted")
+    if any(stats[name].samples < MIN_SAMPLES or stats[name].rtf is None for name in (LOCAL, OPENAI)):
+        return RouteDecision(_static_provider(duration), "cold_start_static_threshold")
+    estimates = {name: expected_seconds(stats[name], duration) for name in (LOCAL, OPENAI)}
+    provider = min(estimates, key=estimates.__getitem__)
+    return RouteDecision(provider, "lowest_expected_time", estimates)
+
+
+def _openai_budget_left() -> Optional[float]:
+    settings = get_settings()
+    if settings.ROUTER_OPENAI_BUDGET_PER_HOUR <= 0:
+        return None
+    return settings.ROUTER_OPENAI_BUDGET_PER_HOUR - openai_spend_this_hour()
+
+
+def decide_provider(duration: Optional[float]) -> RouteDecision:
+    settings = get_settings()
+    if settings.ROUTER_MODE != "adaptive":
+        return RouteDecision(_static_provider(duration), "static")
+    return pick_provider(
+        duration,
+        load_provider_stats() if duration is not None else {},
+        openai_available=bool(settings.ORYN_WHISPER_KEY),
+        openai_budget_left=_openai_budget_left(),
+        cost=openai_cost(duration) if duration else 0.0,
+    )
+
+
+def choose_provider(duration: Optional[float]) -> str:
+    return decide_provider(duration).provider
 
 
 def route_transcription(
-    video_path: Path,
     audio_path: Path,
     *,
+    media: Optional[MediaInfo] = None,
+    provider: Optional[str] = None,
     language: Optional[str] = None,
     prompt: Optional[str] = None,
+    checkpoints: Optional[ChunkCheckpoints] = None,
     logger: logging.Logger | None = None,
 ) -> Dict[str, Any]:
     log = logger or logging.getLogger(__name__)
-    duration = get_duration_seconds(video_path, logger=log)
+    if media is None:
+        media = probe_media(audio_path, logger=log)
+    duration = media.duration if media else None
     start = time.monotonic()
-    provider = "local"
 
     if duration is None:
         log.warning("Router decision: LOCAL duration=unknown probe_failed")
-        result = transcribe_audio(audio_path)
+        result = transcribe_local(audio_path, logger=log)
         elapsed = time.monotonic() - start
-        result.setdefault("provider", "local")
+        result.setdefault("provider", LOCAL)
         result.setdefault("elapsed", elapsed)
         return result
 
-    if duration < 90:
-        log.info("Router decision: LOCAL duration=%.2fs", duration)
-        result = transcribe_audio(audio_path)
-    else:
-        log.info("Router decision: OPENAI duration=%.2fs", duration)
-        provider = "openai"
-        result = transcribe_with_openai(
-            audio_path,
-            language=language,
-            prompt=prompt,
-            logger=log,
-        )
-
-    if duration is not None and "durationSeconds" not in result and "duration" not in result:
-        result["durationSeconds"] = duration
+    if provider:
+        log.info("Router decision: %s duration=%.2fs reason=forced", provider.upper(), duration)
+        return _transcribe_with(provider, audio_path, media, language, prompt, checkpoints, log)
+
+    decision = decide_provider(duration)
+    primary = decision.provider
+    fallback = _fallback_provider(primary, duration)
+    if fallback is not None and not get_breaker(primary).allow() and get_breaker(fallback).allow():
+        log.warning("Circuit open for %s, routing to %s", primary, fallback)
+        primary, fallback, decision = fallback, None, RouteDecision(fallback, f"circuit_open_{primary}")
+    log.info("Router decision: %s duration=%.2fs %s", primary.upper(), duration, decision.describe())
+    if fallback is None or not get_settings().HEDGE_ENABLED:
+        return _transcribe_with(primary, audio_path, media, language, prompt, checkpoints, log)
+    return _hedged(primary, fallback, duration, audio_path, media, language, prompt, checkpoints, log)
+
+
+def _transcribe_with(
+    provider: str,
+    audio_path: Path,
+    media: MediaInfo,
+    language: Optional[str],
+    prompt: Optional[str],
+    checkpoints: Optional[ChunkCheckpoints],
+    log: logging.Logger,
+    cancel: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """Run one provider and feed the outcome into its stats and circuit breaker.
+
+    A run abandoned through ``cancel`` says nothing about the provider and is not recorded.
+    Chunk checkpoints are scoped to the provider, so hedged attempts never share them.
+    """
+    breaker = get_breaker(provider)
+    if checkpoints is not None:
+        checkpoints = checkpoints.scoped(provider)
+    start = time.monotonic()
+    try:
+        if provider == LOCAL:
+            result = transcribe_local(
+                audio_path, media=media, checkpoints=checkpoints, cancel=cancel, logger=log
+            )
+        else:
+            result = transcribe_with_openai(
+                audio_path,
+                media=media,
+                language=language,
+                prompt=prompt,
+                checkpoints=checkpoints,
+                cancel=cancel,
+                logger=log,
+            )
+    except Exception:
+        if cancel is not None and cancel.is_set():
+            log.info("Cancelled hedged transcription: provider=%s", provider)
+            raise
+        record_outcome(provider, audio_seconds=media.duration, elapsed=time.monotonic() - start, ok=False)
+        breaker.record_failure()
+        raise
+
     elapsed = time.monotonic() - start
+    record_outcome(provider, audio_seconds=media.duration, elapsed=elapsed, ok=True)
+    breaker.record_success()
+    if provider == OPENAI:
+        record_openai_spend(media.duration)
+    if "durationSeconds" not in result and "duration" not in result:
+        result["durationSeconds"] = media.duration
     log.info("Transcription completed: provider=%s elapsed=%.2fs", provider, elapsed)
     result.setdefault("provider", provider)
     result.setdefault("elapsed", elapsed)
     return result
+
+
+def _fallback_provider(primary: str, duration: float) -> Optional[str]:
+    """The other provider, if it may take this job at all."""
+    if primary == OPENAI:
+        return LOCAL
+    if not get_settings().ORYN_WHISPER_KEY:
+        return None
+    budget_left = _openai_budget_left()
+    if budget_left is not None and openai_cost(duration) > budget_left:
+        return None
+    return OPENAI
+
+
+def hedge_delay(provider: str, duration: float) -> float:
+    """How long to wait for ``provider`` before hedging, from its recent latency percentile."""
+    settings = get_settings()
+    history = recent_rtf(provider)
+    if len(history) < MIN_SAMPLES:
+        return max(COLD_HEDGE_DELAY_SECONDS, settings.HEDGE_MIN_DELAY_SECONDS)
+    return max(percentile(history, settings.HEDGE_PERCENTILE) * duration, settings.HEDGE_MIN_DELAY_SECONDS)
+
+
+def _working_copy(audio_path: Path, provider: str) -> Path:
+    """A private link to ``audio_path`` for one hedged attempt.
+
+    Chunk files are named after the input, so each attempt splits its own copy, and
+    the copy outlives the caller deleting ``audio_path`` once the other attempt wins.
+    """
+    copy = audio_path.with_name(f"{audio_path.stem}.{provider}{audio_path.suffix}")
+    copy.unlink(missing_ok=True)
+    try:
+        os.link(audio_path, copy)
+    except OSError:
+        shutil.copyfile(audio_path, copy)
+    return copy
+
+
+def _attempt(provider: str, audio_path: Path, cancel: threading.Event, *args: Any) -> Dict[str, Any]:
+    copy = _working_copy(audio_path, provider)
+    try:
+        return _transcribe_with(provider, copy, *args, cancel=cancel)
+    finally:
+        copy.unlink(missing_ok=True)
+
+
+def _hedged(
+    primary: str,
+    fallback: str,
+    duration: float,
+    audio_path: Path,
+    media: MediaInfo,
+    language: Optional[str],
+    prompt: Optional[str],
+    checkpoints: Optional[ChunkCheckpoints],
+    log: logging.Logger,
+) -> Dict[str, Any]:
+    """Run ``primary``; if it is slower than usual or fails, race ``fallback`` and keep the first answer.
+
+    The loser is cancelled: it stops before its next upload or chunk, and an
+    upload already in flight finishes in the background.
+    """
+    delay = hedge_delay(primary, duration)
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hedge")
+    cancel = threading.Event()
+    args = (media, language, prompt, checkpoints, log)
+    futures = {executor.submit(_attempt, primary, audio_path, cancel, *args): primary}
+    try:
+        done, _ = wait(futures, timeout=delay)
+        if not done or next(iter(done)).exception() is not None:
+            if get_breaker(fallback).allow():
+                if done:
+                    log.warning("Provider %s failed, failing over to %s", primary, fallback)
+                else:
+                    log.warning("No answer from %s after %.1fs, hedging to %s", primary, delay, fallback)
+                futures[executor.submit(_attempt, fallback, audio_path, cancel, *args)] = fallback
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if len(futures) > 1:
+                        log.info("Hedge won by provider=%s", futures[future])
+                    return future.result()
+        # Everything failed; surface the primary's error.
+        primary_future = next(future for future, name in futures.items() if name == primary)
+        raise primary_future.exception()
+    finally:
+        cancel.set()
+        executor.shutdown(wait=False)
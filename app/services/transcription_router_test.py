@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+
+import pytest
+
+from app.services import transcription_router as router
+from app.services.chunking import TranscriptionCancelled
+from app.services.media_probe import MediaInfo
+from app.services.provider_stats import ProviderStats
+from app.services.transcription_router import expected_seconds, pick_provider
+
+
+def _stats(local: ProviderStats, openai: ProviderStats):
+    return {"local": local, "openai": openai}
+
+
+def test_pick_provider_falls_back_to_threshold_on_cold_start():
+    stats = _stats(ProviderStats(rtf=0.1, samples=50), ProviderStats())
+    assert pick_provider(30, stats).provider == "local"
+    decision = pick_provider(300, stats)
+    assert (decision.provider, decision.reason) == ("openai", "cold_start_static_threshold")
+
+
+def test_pick_provider_prefers_lowest_expected_time():
+    busy_local = ProviderStats(rtf=0.2, queue_wait=120.0, samples=20)
+    openai = ProviderStats(rtf=0.1, queue_wait=2.0, samples=20)
+    decision = pick_provider(30, _stats(busy_local, openai))
+    assert decision.provider == "openai"
+    assert decision.estimates["local"] == expected_seconds(busy_local, 30)
+
+    idle_local = ProviderStats(rtf=0.05, samples=20)
+    assert pick_provider(600, _stats(idle_local, openai)).provider == "local"
+
+
+def test_pick_provider_penalizes_errors_and_respects_budget():
+    local = ProviderStats(rtf=0.2, samples=20)
+    flaky_openai = ProviderStats(rtf=0.1, error_rate=0.9, samples=20)
+    assert pick_provider(600, _stats(local, flaky_openai)).provider == "local"
+
+    openai = ProviderStats(rtf=0.1, samples=20)
+    assert pick_provider(600, _stats(local, openai), openai_budget_left=0.01, cost=0.06).reason == (
+        "openai_budget_exhausted"
+    )
+    assert pick_provider(600, _stats(local, openai), openai_available=False).provider == "local"
+    assert pick_provider(None, {}).reason == "duration_unknown"
+
+
+class _Breaker:
+    def __init__(self) -> None:
+        self.failures = 0
+
+    def allow(self) -> bool:
+        return True
+
+    def record_failure(self) -> None:
+        self.failures += 1
+
+    def record_success(self) -> None:
+        pass
+
+
+def _hedge(monkeypatch, tmp_path, attempts):
+    """Run ``_hedged`` with fake providers; returns the result and the calls each provider saw."""
+    audio = tmp_path / "audio.ogg"
+    audio.write_bytes(b"audio")
+    calls = {}
+
+    def fake_transcribe_with(provider, audio_path, media, language, prompt, checkpoints, log, cancel=None):
+        calls[provider] = (audio_path, audio_path.read_bytes(), cancel)
+        return attempts[provider](cancel)
+
+    monkeypatch.setattr(router, "_transcribe_with", fake_transcribe_with)
+    monkeypatch.setattr(router, "hedge_delay", lambda provider, duration: 0.05)
+    monkeypatch.setattr(router, "get_breaker", lambda name: _Breaker())
+    media = MediaInfo(duration=30.0, has_audio=True)
+    try:
+        return router._hedged("local", "openai", 30.0, audio, media, None, None, None, logging.getLogger()), calls
+    finally:
+        # A cancelled loser drops its working copy as soon as it notices.
+        deadline = time.monotonic() + 2
+        while len(list(tmp_path.iterdir())) > 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert list(tmp_path.iterdir()) == [audio]
+
+
+def test_hedge_races_fallback_when_primary_is_slow_and_cancels_loser(monkeypatch, tmp_path):
+    def slow(cancel):
+        cancel.wait(5)
+        raise TranscriptionCancelled("lost")
+
+    result, calls = _hedge(monkeypatch, tmp_path, {"local": slow, "openai": lambda cancel: {"text": "fast"}})
+    assert result == {"text": "fast"}
+    (local_path, local_bytes, cancel), (openai_path, openai_bytes, _) = calls["local"], calls["openai"]
+    assert local_path != openai_path and local_bytes == openai_bytes == b"audio"
+    assert cancel.wait(1)
+
+
+def test_hedge_fails_over_on_primary_error(monkeypatch, tmp_path):
+    def broken(cancel):
+        raise RuntimeError("local down")
+
+    result, _ = _hedge(monkeypatch, tmp_path, {"local": broken, "openai": lambda cancel: {"text": "ok"}})
+    assert result == {"text": "ok"}
+
+    def also_broken(cancel):
+        raise ValueError("openai down")
+
+    with pytest.raises(RuntimeError, match="local down"):
+        _hedge(monkeypatch, tmp_path, {"local": broken, "openai": also_broken})
+
+
+def test_cancelled_attempt_is_not_recorded(monkeypatch, tmp_path):
+    breaker = _Breaker()
+    outcomes = []
+    cancel = threading.Event()
+    cancel.set()
+
+    def gone(*args, **kwargs):
+        raise FileNotFoundError("audio removed by the winner")
+
+    monkeypatch.setattr(router, "transcribe_local", gone)
+    monkeypatch.setattr(router, "get_breaker", lambda name: breaker)
+    monkeypatch.setattr(router, "record_outcome", lambda *args, **kwargs: outcomes.append(kwargs))
+    media = MediaInfo(duration=30.0, has_audio=True)
+    with pytest.raises(FileNotFoundError):
+        router._transcribe_with("local", tmp_path / "a.ogg", media, None, None, None, logging.getLogger(), cancel)
+    assert outcomes == [] and breaker.failures == 0
+
+    with pytest.raises(FileNotFoundError):
+        router._transcribe_with("local", tmp_path / "a.ogg", media, None, None, None, logging.getLogger())
+    assert len(outcomes) == 1 and breaker.failures == 1
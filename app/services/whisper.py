@@ -1,19 +1,48 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 import httpx
+import logging
+import threading
+import time
 
 from app.config import get_settings
+from app.services.audio_profile import mime_type_for
+from app.services.chunking import (
+    ChunkCheckpoints,
+    TranscriptionCancelled,
+    payload_text,
+    raise_if_cancelled,
+    should_chunk,
+    transcribe_chunked,
+)
+from app.services.http_client import get_http_client
+from app.services.media_probe import MediaInfo
+from app.services.provider_stats import LOCAL, record_wait
+from app.services.whisper_pool import Backend, get_whisper_pool
+from app.utils.stages import IO, stage
 
 
 class WhisperError(RuntimeError):
     pass
 
 
-def transcribe_audio(audio_path: Path) -> Dict[str, Any]:
-    settings = get_settings()
+def _post(
+    url: str, audio_path: Path, timeout: httpx.Timeout, cancel: Optional[threading.Event] = None
+) -> httpx.Response:
+    with stage(IO):
+        raise_if_cancelled(cancel)
+        with audio_path.open("rb") as f:
+            files = {
+                "file": (audio_path.name, f, mime_type_for(audio_path))
+            }
+            return get_http_client().post(url, files=files, timeout=timeout)
+
+
+def transcribe_audio(audio_path: Path, cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+    pool = get_whisper_pool()
 
     timeout = httpx.Timeout(
         connect=30.0,
@@ -22,19 +51,30 @@ def transcribe_audio(audio_path: Path) -> Dict[str, Any]:
         pool=30.0,
     )
 
-    with audio_path.open("rb") as f:
-        files = {
-            "file": (audio_path.name, f, "audio/mpeg")
-        }
-
+    # A request error or 5xx is retried once on each other healthy backend.
+    tried: List[Backend] = []
+    while True:
+        raise_if_cancelled(cancel)
+        started = time.monotonic()
+        backend = pool.acquire(exclude=tried)
+        record_wait(LOCAL, time.monotonic() - started)
+        tried.append(backend)
+        started = time.monotonic()
         try:
-            resp = httpx.post(
-                settings.WHISPER_URL,
-                files=files,
-                timeout=timeout,
-            )
+            resp = _post(backend.url, audio_path, timeout, cancel)
+        except TranscriptionCancelled:
+            pool.abandon(backend)
+            raise
         except httpx.RequestError as exc:
+            pool.release(backend, latency=time.monotonic() - started, ok=False)
+            if pool.has_healthy(exclude=tried):
+                continue
             raise WhisperError(f"Whisper request failed: {exc}") from exc
+        failed = resp.status_code >= 500 or resp.status_code == 429
+        pool.release(backend, latency=time.monotonic() - started, ok=not failed)
+        if failed and pool.has_healthy(exclude=tried):
+            continue
+        break
 
     if resp.status_code >= 400:
         raise WhisperError(
@@ -50,13 +90,39 @@ def transcribe_audio(audio_path: Path) -> Dict[str, Any]:
             f"{resp.text[:300]}"
         ) from exc
 
-    text = (
-        data.get("text")
-        or data.get("transcript")
-        or data.get("transcriptText")
-    )
-
-    if not text:
+    if not payload_text(data):
         raise WhisperError("Whisper response missing transcript text")
 
     return data
+
+
+def transcribe_local(
+    audio_path: Path,
+    *,
+    media: Optional[MediaInfo] = None,
+    checkpoints: Optional[ChunkCheckpoints] = None,
+    cancel: Optional[threading.Event] = None,
+    logger: logging.Logger | None = None,
+) -> Dict[str, Any]:
+    settings = get_settings()
+    log = logger or logging.getLogger(__name__)
+    duration = media.duration if media else None
+
+    if duration is None or not should_chunk(
+        duration=duration,
+        size_bytes=audio_path.stat().st_size,
+        max_bytes=settings.WHISPER_MAX_UPLOAD_BYTES,
+        min_parallel_seconds=settings.TRANSCRIBE_CHUNK_MIN_SECONDS,
+    ):
+        return transcribe_audio(audio_path, cancel)
+
+    return transcribe_chunked(
+        audio_path,
+        duration=duration,
+        transcribe=lambda path, seconds: transcribe_audio(path, cancel),
+        max_bytes=settings.WHISPER_MAX_UPLOAD_BYTES,
+        concurrency=settings.TRANSCRIBE_CHUNK_CONCURRENCY,
+        checkpoints=checkpoints,
+        cancel=cancel,
+        logger=log,
+    )
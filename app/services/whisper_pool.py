@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import httpx
+
+from app.config import get_settings
+from app.services.http_client import get_http_client
+
+
+EWMA_ALPHA = 0.2
+EJECT_AFTER_FAILURES = 3
+MIN_CONCURRENCY = 1.0
+HEALTH_TIMEOUT_SECONDS = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+def parse_urls(value: str) -> List[str]:
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
+def health_url(url: str, path: str) -> str:
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, path, "", ""))
+
+
+@dataclass
+class Backend:
+    url: str
+    limit: float
+    outstanding: int = 0
+    requests: int = 0
+    errors: int = 0
+    consecutive_failures: int = 0
+    latency_ewma: Optional[float] = None
+    ejected_until: float = 0.0
+
+    def available(self, now: float) -> bool:
+        return self.ejected_until <= now and self.outstanding < int(self.limit)
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.ejected_until <= now,
+            "outstanding": self.outstanding,
+            "concurrencyLimit": round(self.limit, 2),
+            "requests": self.requests,
+            "errors": self.errors,
+            "latencyEwmaSeconds": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+        }
+
+
+class WhisperPool:
+    """Client-side balancer over local Whisper backends.
+
+    Each request goes to the healthy backend with the fewest requests in flight.
+    Per-backend concurrency is adaptive: it grows by one slot per window of
+    successes and halves on an error (AIMD). Repeated failures or a failed health
+    check eject a backend until it passes a health check again.
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        *,
+        max_concurrency: int,
+        eject_seconds: float,
+        health_path: str = "",
+        health_interval: float = 0.0,
+    ) -> None:
+        self.max_concurrency = float(max(max_concurrency, 1))
+        self.backends = [Backend(url=url, limit=self.max_concurrency) for url in urls]
+        if not self.backends:
+            raise ValueError("WhisperPool needs at least one backend URL")
+        self.eject_seconds = eject_seconds
+        self.health_path = health_path
+        self.health_interval = health_interval
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+
+    def acquire(self, exclude: Iterable[Backend] = (), timeout: float | None = None) -> Backend:
+        """Reserve a slot on the least loaded backend, waiting for one to free up."""
+        excluded = {id(backend) for backend in exclude}
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            while True:
+                now = time.time()
+                candidates = [b for b in self.backends if id(b) not in excluded and b.available(now)]
+                if not candidates and all(b.ejected_until > now for b in self.backends):
+                    # Everything is ejected; keep serving rather than stall every job.
+                    candidates = [
+                        b for b in self.backends
+                        if id(b) not in excluded and b.outstanding < int(b.limit)
+                    ]
+                if candidates:
+                    backend = min(
+                        candidates,
+                        key=lambda b: (b.outstanding / b.limit, b.latency_ewma or 0.0),
+                    )
+                    backend.outstanding += 1
+                    return backend
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("No Whisper backend slot became available")
+                self._cond.wait(remaining if remaining is not None else 1.0)
+
+    def has_healthy(self, exclude: Iterable[Backend] = ()) -> bool:
+        excluded = {id(backend) for backend in exclude}
+        now = time.time()
+        with self._cond:
+            return any(b.ejected_until <= now for b in self.backends if id(b) not in excluded)
+
+    def release(self, backend: Backend, *, latency: float, ok: bool) -> None:
+        with self._cond:
+            backend.outstanding -= 1
+            backend.requests += 1
+            if ok:
+                backend.consecutive_failures = 0
+                backend.limit = min(self.max_concurrency, backend.limit + 1.0 / backend.limit)
+                if backend.latency_ewma is None:
+                    backend.latency_ewma = latency
+                else:
+                    backend.latency_ewma += EWMA_ALPHA * (latency - backend.latency_ewma)
+            else:
+                backend.errors += 1
+                backend.consecutive_failures += 1
+                backend.limit = max(MIN_CONCURRENCY, backend.limit / 2)
+                if backend.consecutive_failures >= EJECT_AFTER_FAILURES:
+                    self._eject(backend, f"{backend.consecutive_failures} consecutive failures")
+            self._cond.notify_all()
+
+    def abandon(self, backend: Backend) -> None:
+        """Give back a slot that was never used, without touching the backend's stats."""
+        with self._cond:
+            backend.outstanding -= 1
+            self._cond.notify_all()
+
+    def _eject(self, backend: Backend, reason: str) -> None:
+        if backend.ejected_until <= time.time():
+            logger.warning("Ejecting Whisper backend url=%s reason=%s", backend.url, reason)
+        backend.ejected_until = time.time() + self.eject_seconds
+
+    def _check(self, backend: Backend) -> None:
+        try:
+            resp = get_http_client().get(
+                health_url(backend.url, self.health_path), timeout=HEALTH_TIMEOUT_SECONDS
+            )
+            healthy = resp.status_code < 400
+            reason = f"health check status {resp.status_code}"
+        except httpx.RequestError as exc:
+            healthy = False
+            reason = f"health check failed: {exc}"
+        with self._cond:
+            if not healthy:
+                self._eject(backend, reason)
+            elif backend.ejected_until > time.time():
+                logger.info("Readmitting Whisper backend url=%s", backend.url)
+                backend.ejected_until = 0.0
+                backend.consecutive_failures = 0
+                backend.limit = MIN_CONCURRENCY
+                self._cond.notify_all()
+
+    def _run_health_checks(self) -> None:
+        while not self._stop.wait(self.health_interval):
+            for backend in self.backends:
+                self._check(backend)
+
+    def start(self) -> "WhisperPool":
+        if self.health_path and self.health_interval > 0 and self._health_thread is None:
+            self._health_thread = threading.Thread(
+                target=self._run_health_checks, name="whisper-health", daemon=True
+            )
+            self._health_thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._cond:
+            return [backend.snapshot(now) for backend in self.backends]
+
+
+@lru_cache(maxsize=1)
+def get_whisper_pool() -> WhisperPool:
+    settings = get_settings()
+    urls = parse_urls(settings.WHISPER_URLS)
+    return WhisperPool(
+        urls or [settings.WHISPER_URL],
+        max_concurrency=settings.WHISPER_MAX_CONCURRENCY_PER_BACKEND,
+        eject_seconds=settings.WHISPER_EJECT_SECONDS,
+        # A single external load balancer does its own health checking.
+        health_path=settings.WHISPER_HEALTH_PATH if urls else "",
+        health_interval=settings.WHISPER_HEALTH_INTERVAL_SECONDS,
+    ).start()
@@ -0,0 +1,22 @@
+from app.services.whisper_pool import WhisperPool, health_url, parse_urls
+
+
+def test_parse_urls_and_health_url():
+    assert parse_urls(" http://a/transcribe, ,http://b/transcribe ") == ["http://a/transcribe", "http://b/transcribe"]
+    assert health_url("http://a:8000/transcribe?lang=en", "/health") == "http://a:8000/health"
+
+
+def test_pool_prefers_least_outstanding_and_ejects_failing_backend():
+    pool = WhisperPool(["http://a/t", "http://b/t"], max_concurrency=4, eject_seconds=30)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert {first.url, second.url} == {"http://a/t", "http://b/t"}
+
+    pool.release(second, latency=1.0, ok=True)
+    pool.release(first, latency=1.0, ok=False)
+    for _ in range(2):
+        pool.release(pool.acquire(exclude=[second]), latency=1.0, ok=False)
+
+    assert first.limit == 1.0
+    assert not pool.has_healthy(exclude=[second])
+    assert pool.acquire().url == second.url
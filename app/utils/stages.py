@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterator
+
+from app.config import get_settings
+
+
+CPU = "cpu"
+IO = "io"
+
+IO_SLOTS_PER_CORE = 8
+
+
+def cpu_count() -> int:
+    return os.cpu_count() or 1
+
+
+@lru_cache(maxsize=1)
+def _limits() -> Dict[str, threading.BoundedSemaphore]:
+    settings = get_settings()
+    cpu_limit = settings.WORKER_CPU_CONCURRENCY or cpu_count()
+    io_limit = settings.WORKER_IO_CONCURRENCY or cpu_count() * IO_SLOTS_PER_CORE
+    return {CPU: threading.BoundedSemaphore(cpu_limit), IO: threading.BoundedSemaphore(io_limit)}
+
+
+@contextmanager
+def stage(kind: str) -> Iterator[None]:
+    """Hold a per-process slot for a CPU-bound or I/O-bound stage.
+
+    Only wrap leaf operations (one subprocess, one request, one commit) so a slot
+    is never held while waiting for another.
+    """
+    semaphore = _limits()[kind]
+    with semaphore:
+        yield
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import json
+import logging
+import shutil
+from dataclasses import asdict, dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from google.cloud import firestore
+
+from app.config import get_settings
+from app.jobs.enqueue import DOWNLOAD, PERSIST, TRANSCODE, TRANSCRIBE, enqueue_stage
+from app.jobs.lease import LeaseHeartbeat, LeaseLostError, acquire_lease, fenced_commit, renew_lease
+from app.jobs.retry import backoff_delay, lease_retry_delay, schedule_retry, schedule_stage_retry
+from app.jobs.singleflight import refresh_claim
+from app.services.audio_profile import profile_for_provider
+from app.services.chunk_checkpoints import RedisChunkCheckpoints
+from app.services.downloader import download_instagram
+from app.services.ffmpeg import extract_audio
+from app.services.firestore import workspace_job_ref, workspace_reel_ref
+from app.services.hashing import sha256_file
+from app.services.ingest import stream_audio
+from app.services.media_probe import MediaInfo, NoAudioStreamError, probe_media, require_audio
+from app.services.stage_cache import DOWNLOADED, PERSISTED, TRANSCODED, TRANSCRIBED
+from app.services.transcript_cache import get_cached_transcript, store_transcript
+from app.services.transcription_router import choose_provider, route_transcription
+from app.utils.logging import get_logger
+from app.utils.stages import CPU, IO, stage
+from app.utils.time import utc_now
+from app.workers.worker import abandon_lost_lease, fail_followers, finish_followers, transcript_fields
+
+
+Handoff = Dict[str, Any]
+StageResult = Optional[Tuple[str, Handoff]]
+
+
+@dataclass(frozen=True)
+class StagePolicy:
+    max_attempts: int
+    base_seconds: float
+    cap_seconds: float
+
+
+STAGE_POLICIES: Dict[str, StagePolicy] = {
+    # Instagram throttling takes a while to clear.
+    DOWNLOAD: StagePolicy(max_attempts=3, base_seconds=10.0, cap_seconds=300.0),
+    # ffmpeg failing on the same input rarely changes on a retry.
+    TRANSCODE: StagePolicy(max_attempts=2, base_seconds=5.0, cap_seconds=30.0),
+    TRANSCRIBE: StagePolicy(max_attempts=4, base_seconds=5.0, cap_seconds=120.0),
+    PERSIST: StagePolicy(max_attempts=5, base_seconds=1.0, cap_seconds=30.0),
+}
+
+FINISHED_STAGE: Dict[str, str] = {
+    DOWNLOAD: DOWNLOADED,
+    TRANSCODE: TRANSCODED,
+    TRANSCRIBE: TRANSCRIBED,
+}
+
+RESULT_FILE = "result.json"
+
+
+def artifact_dir(job_id: str) -> Path:
+    return Path(get_settings().TMP_DIR) / "pipeline" / job_id
+
+
+def _cleanup(job_id: str) -> None:
+    shutil.rmtree(artifact_dir(job_id), ignore_errors=True)
+
+
+def _media(handoff: Handoff) -> Optional[MediaInfo]:
+    media = handoff.get("media")
+    return MediaInfo(**media) if media else None
+
+
+def _write_result(handoff: Handoff, whisper_response: Dict[str, Any]) -> Handoff:
+    path = artifact_dir(handoff["jobId"]) / RESULT_FILE
+    path.write_text(json.dumps(whisper_response))
+    return handoff
+
+
+def _download(handoff: Handoff, heartbeat: LeaseHeartbeat, logger: logging.LoggerAdapter) -> StageResult:
+    settings = get_settings()
+    directory = artifact_dir(handoff["jobId"])
+    directory.mkdir(parents=True, exist_ok=True)
+
+    if settings.STREAMING_INGEST:
+        profile = profile_for_provider(choose_provider(None))
+        audio_path = directory / f"audio{profile.suffix}"
+        logger.info("Streaming audio profile=%s", profile.name)
+        with stage(IO):
+            stream_audio(handoff["reelUrl"], audio_path, profile)
+        media = probe_media(audio_path, logger=logger)
+        require_audio(media)
+        return TRANSCODE, {**handoff, "audioPath": str(audio_path), "media": asdict(media) if media else None, "provider": None}
+
+    video_path = directory / "video.mp4"
+    logger.info("Downloading video")
+    with stage(IO):
+        ytdlp_info = download_instagram(handoff["reelUrl"], video_path)
+    media = MediaInfo.from_ytdlp(ytdlp_info) or probe_media(video_path, logger=logger)
+    require_audio(media)
+    return TRANSCODE, {
+        **handoff,
+        "videoPath": str(video_path),
+        "media": asdict(media) if media else None,
+        "provider": choose_provider(media.duration if media else None),
+    }
+
+
+def _transcode(handoff: Handoff, heartbeat: LeaseHeartbeat, logger: logging.LoggerAdapter) -> StageResult:
+    audio_path = handoff.get("audioPath")
+    if not audio_path:
+        video_path = Path(handoff["videoPath"])
+        profile = profile_for_provider(handoff.get("provider"))
+        audio_path = str(artifact_dir(handoff["jobId"]) / f"audio{profile.suffix}")
+        logger.info("Extracting audio profile=%s", profile.name)
+        with stage(CPU):
+            extract_audio(video_path, Path(audio_path), profile)
+        video_path.unlink(missing_ok=True)
+
+    audio_hash = sha256_file(Path(audio_path))
+    handoff = {**handoff, "audioPath": audio_path, "audioHash": audio_hash}
+    cached = get_cached_transcript(audio_hash, logger=logger)
+    if cached is not None:
+        logger.info("Transcript cache hit audioHash=%s", audio_hash)
+        return PERSIST, _write_result(handoff, cached)
+    return TRANSCRIBE, handoff
+
+
+def _transcribe(handoff: Handoff, heartbeat: LeaseHeartbeat, logger: logging.LoggerAdapter) -> StageResult:
+    heartbeat.check()
+    chunk_checkpoints = None
+    if get_settings().CHUNK_CHECKPOINTS_ENABLED:
+        chunk_checkpoints = RedisChunkCheckpoints(handoff["audioHash"], logger=logger)
+    logger.info("Routing transcription")
+    whisper_response = route_transcription(
+        Path(handoff["audioPath"]),
+        media=_media(handoff),
+        checkpoints=chunk_checkpoints,
+        logger=logger,
+    )
+    store_transcript(handoff["audioHash"], whisper_response, logger=logger)
+    if chunk_checkpoints is not None:
+        chunk_checkpoints.clear()
+    return PERSIST, _write_result(handoff, whisper_response)
+
+
+def _persist(handoff: Handoff, heartbeat: LeaseHeartbeat, logger: logging.LoggerAdapter) -> StageResult:
+    workspace_id, job_id, reel_id = handoff["workspaceId"], handoff["jobId"], handoff["reelId"]
+    whisper_response = json.loads((artifact_dir(job_id) / RESULT_FILE).read_text())
+    heartbeat.stop()
+    fenced_commit(
+        workspace_job_ref(workspace_id, job_id),
+        handoff["leaseToken"],
+        {
+            "status": "completed",
+            "stage": PERSISTED,
+            "error": None,
+            "updatedAt": firestore.SERVER_TIMESTAMP,
+            "leaseUntil": utc_now(),
+        },
+        writes=[
+            (
+                workspace_reel_ref(workspace_id, reel_id),
+                transcript_fields(whisper_response, handoff["audioHash"]),
+            )
+        ],
+    )
+    finish_followers(
+        workspace_id,
+        reel_id,
+        job_id,
+        {"status": "completed", "error": None, "updatedAt": firestore.SERVER_TIMESTAMP},
+        logger,
+    )
+    _cleanup(job_id)
+    return None
+
+
+def _stage_failed(name: str, handoff: Handoff, exc: Exception, logger: logging.LoggerAdapter) -> None:
+    workspace_id, job_id = handoff["workspaceId"], handoff["jobId"]
+    job_ref = workspace_job_ref(workspace_id, job_id)
+    policy = STAGE_POLICIES[name]
+    attempt = int(handoff.get("stageAttempt", 1))
+    retry = attempt < policy.max_attempts and not isinstance(exc, NoAudioStreamError)
+    fields: Dict[str, Any] = {"error": str(exc), "updatedAt": firestore.SERVER_TIMESTAMP}
+    if not retry:
+        fields.update({"status": "failed", "leaseUntil": utc_now()})
+    try:
+        fenced_commit(job_ref, handoff["leaseToken"], fields)
+    except LeaseLostError as lost:
+        logger.warning("Skipping failure update: %s", lost)
+        _cleanup(job_id)
+        abandon_lost_lease(job_ref, workspace_id, handoff["reelId"], job_id, logger)
+        return
+
+    if retry:
+        delay = backoff_delay(attempt, base=policy.base_seconds, cap=policy.cap_seconds)
+        logger.info("Stage %s retry %s scheduled in %.1fs", name, attempt + 1, delay)
+        schedule_stage_retry(name, {**handoff, "stageAttempt": attempt + 1}, delay)
+        return
+
+    _cleanup(job_id)
+    fail_followers(workspace_id, handoff["reelId"], job_id, str(exc), logger)
+
+
+def _run_stage(
+    name: str,
+    handoff: Handoff,
+    body: Callable[[Handoff, LeaseHeartbeat, logging.LoggerAdapter], StageResult],
+) -> None:
+    job_id = handoff["jobId"]
+    logger = get_logger(f"pipeline.{name}", job_id=job_id)
+    job_ref = workspace_job_ref(handoff["workspaceId"], job_id)
+    lease_token = handoff["leaseToken"]
+
+    # Renewing also fences: a job whose lease was taken over while queued stops here.
+    # It records the previous stage as finished in the same write.
+    finished = {"stage": handoff["stage"]} if handoff.get("stage") else None
+    try:
+        renew_lease(job_ref, lease_token, finished)
+    except LeaseLostError as exc:
+        logger.warning("Abandoning job at stage %s: %s", name, exc)
+        _cleanup(job_id)
+        abandon_lost_lease(job_ref, handoff["workspaceId"], handoff["reelId"], job_id, logger)
+        return
+
+    heartbeat = LeaseHeartbeat(
+        job_ref,
+        lease_token,
+        logger=logger,
+        on_renew=partial(refresh_claim, handoff["workspaceId"], handoff["reelId"], job_id),
+    ).start()
+    try:
+        result = body(handoff, heartbeat, logger)
+        heartbeat.stop()
+        if result is not None:
+            next_stage, next_handoff = result
+            next_handoff.pop("stageAttempt", None)
+            enqueue_stage(next_stage, {**next_handoff, "stage": FINISHED_STAGE[name]})
+    except LeaseLostError as exc:
+        logger.warning("Abandoning job at stage %s: %s", name, exc)
+        _cleanup(job_id)
+        abandon_lost_lease(job_ref, handoff["workspaceId"], handoff["reelId"], job_id, logger)
+    except Exception as exc:
+        logger.error(f"Stage {name} failed: {exc}")
+        heartbeat.stop()
+        _stage_failed(name, handoff, exc, logger)
+    finally:
+        heartbeat.stop()
+
+
+def _claim(handoff: Handoff) -> Optional[Handoff]:
+    """Take the job lease and load what later stages need; None when there is nothing to run."""
+    workspace_id, job_id = handoff["workspaceId"], handoff["jobId"]
+    logger = get_logger(f"pipeline.{DOWNLOAD}", job_id=job_id)
+    job_ref = workspace_job_ref(workspace_id, job_id)
+    lease_ok, info = acquire_lease(
+        job_ref,
+        reel_ref_for=lambda reel: workspace_reel_ref(workspace_id, reel),
+        reel_id=handoff.get("reelId"),
+    )
+    if not lease_ok:
+        if info.get("status") == "leased":
+            remaining = (info["leaseUntil"] - utc_now()).total_seconds()
+            schedule_retry(job_id, workspace_id, lease_retry_delay(remaining))
+        elif info.get("error"):
+            logger.error(info["error"])
+            fail_followers(workspace_id, handoff.get("reelId"), job_id, info["error"], logger)
+        return None
+
+    job_data = info["job"]
+    handoff = {
+        **handoff,
+        "leaseToken": info["leaseToken"],
+        "reelId": job_data.get("reelId"),
+        "reelUrl": job_data.get("reelUrl") or handoff.get("reelUrl"),
+        "source": job_data.get("source") or handoff.get("source", "instagram"),
+    }
+    if not info["reel"].get("transcriptText"):
+        return handoff
+
+    try:
+        fenced_commit(
+            job_ref,
+            handoff["leaseToken"],
+            {"status": "completed", "updatedAt": firestore.SERVER_TIMESTAMP, "leaseUntil": utc_now()},
+        )
+    except LeaseLostError as exc:
+        logger.warning("Skipping completion: %s", exc)
+        abandon_lost_lease(job_ref, workspace_id, handoff["reelId"], job_id, logger)
+        return None
+    finish_followers(
+        workspace_id,
+        handoff["reelId"],
+        job_id,
+        {"status": "completed", "error": None, "updatedAt": firestore.SERVER_TIMESTAMP},
+        logger,
+    )
+    return None
+
+
+def download_stage(handoff: Handoff) -> None:
+    if "leaseToken" not in handoff:
+        handoff = _claim(handoff)
+        if handoff is None:
+            return
+    _run_stage(DOWNLOAD, handoff, _download)
+
+
+def transcode_stage(handoff: Handoff) -> None:
+    _run_stage(TRANSCODE, handoff, _transcode)
+
+
+def transcribe_stage(handoff: Handoff) -> None:
+    _run_stage(TRANSCRIBE, handoff, _transcribe)
+
+
+def persist_stage(handoff: Handoff) -> None:
+    _run_stage(PERSIST, handoff, _persist)
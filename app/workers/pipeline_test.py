@@ -0,0 +1,80 @@
+import json
+
+import pytest
+from rq import Queue
+
+from app.config import get_settings
+from app.jobs.enqueue import TRANSCODE, TRANSCRIBE, stage_queue_name
+from app.jobs.retry import DELAYED_KEY
+from app.jobs.singleflight import claim_or_attach
+from app.services.firestore import workspace_job_ref
+from app.services.stage_cache import DOWNLOADED, TRANSCODED
+from app.workers import pipeline
+from app.workers.pipeline import STAGE_POLICIES, artifact_dir, download_stage
+
+
+@pytest.fixture
+def tmp_dir(monkeypatch, tmp_path, settings):
+    monkeypatch.setenv("TMP_DIR", str(tmp_path))
+    get_settings.cache_clear()
+    return tmp_path
+
+
+def _job(fake_firestore, **fields):
+    job_ref = workspace_job_ref("w1", "j1")
+    fake_firestore.docs[job_ref.path] = {"reelId": "r1", "reelUrl": "https://example.com/r1", **fields}
+    return fake_firestore.docs[job_ref.path]
+
+
+def _queued(redis, stage):
+    return [job.args[0] for job in Queue(stage_queue_name(stage), connection=redis).jobs]
+
+
+def test_download_claims_and_hands_off_to_transcode(fake_firestore, fake_redis, tmp_dir, monkeypatch):
+    job = _job(fake_firestore, status="queued", attempts=0)
+
+    def download(handoff, heartbeat, logger):
+        return TRANSCODE, {**handoff, "audioPath": "audio.ogg", "stageAttempt": 2}
+
+    monkeypatch.setattr(pipeline, "_download", download)
+    download_stage({"jobId": "j1", "workspaceId": "w1", "reelId": "r1"})
+
+    (handoff,) = _queued(fake_redis, TRANSCODE)
+    assert handoff["leaseToken"] == job["leaseToken"] == 1
+    assert handoff["stage"] == DOWNLOADED and "stageAttempt" not in handoff
+    assert (job["status"], job["attempts"]) == ("running", 1)
+
+    # The next stage records the finished one when it renews the lease.
+    monkeypatch.setattr(pipeline, "_transcode", lambda handoff, heartbeat, logger: None)
+    pipeline.transcode_stage(handoff)
+    assert job["stage"] == DOWNLOADED
+
+
+def test_failed_stage_retries_then_fails_its_followers(fake_firestore, fake_redis, tmp_dir):
+    job = _job(fake_firestore, status="running", attempts=1, leaseToken=1)
+    assert claim_or_attach("w1", "r1", "j1") is None
+    assert claim_or_attach("w1", "r1", "follower") == "j1"
+    follower = workspace_job_ref("w1", "follower").path
+    fake_firestore.docs[follower] = {"status": "queued", "leaderJobId": "j1"}
+    handoff = {"jobId": "j1", "workspaceId": "w1", "reelId": "r1", "leaseToken": 1, "stage": TRANSCODED}
+
+    def broken(handoff, heartbeat, logger):
+        artifact_dir("j1").mkdir(parents=True, exist_ok=True)
+        raise RuntimeError("provider down")
+
+    for attempt in range(1, STAGE_POLICIES[TRANSCRIBE].max_attempts):
+        pipeline._run_stage(TRANSCRIBE, handoff, broken)
+        (member,) = fake_redis.zrange(DELAYED_KEY, 0, -1)
+        entry = json.loads(member)
+        fake_redis.delete(DELAYED_KEY)
+        assert entry["stage"] == TRANSCRIBE and entry["handoff"]["stageAttempt"] == attempt + 1
+        assert (job["status"], job["error"]) == ("running", "provider down")
+        assert fake_firestore.docs[follower]["status"] == "queued"
+        handoff = entry["handoff"]
+
+    pipeline._run_stage(TRANSCRIBE, handoff, broken)
+    assert fake_redis.zcard(DELAYED_KEY) == 0
+    assert job["status"] == "failed"
+    assert fake_firestore.docs[follower]["status"] == "failed"
+    assert not artifact_dir("j1").exists()
+    assert claim_or_attach("w1", "r1", "next") is None
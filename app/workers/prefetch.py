@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple
+
+from google.cloud import firestore
+from redis import Redis
+from rq import Queue
+from rq.job import Job
+
+from app.config import get_settings
+from app.jobs.enqueue import QUEUE_NAME
+from app.jobs.lease import LeaseHeartbeat, acquire_lease, fenced_commit, release_lease
+from app.jobs.retry import LEASE_RETRY_JITTER_SECONDS, cancel_retry, schedule_retry
+from app.jobs.singleflight import refresh_claim
+from app.services.firestore import workspace_job_ref, workspace_reel_ref
+from app.services.ingest import IngestedAudio, ingest_audio
+from app.services.stage_cache import checkpoint_key, touch_checkpoint
+from app.utils.logging import get_logger
+
+
+PROCESS_JOB = "app.workers.worker.process_job"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PrefetchResult:
+    """What a prefetch got done before the job ran.
+
+    Without a ``lease_token`` the job goes through the normal claim path. With one,
+    ``audio`` or ``error`` holds the ingest outcome; neither means the reel was
+    already transcribed or the lease was lost.
+    """
+
+    lease_token: Optional[int] = None
+    heartbeat: Optional[LeaseHeartbeat] = None
+    job: Dict[str, Any] = field(default_factory=dict)
+    reel: Dict[str, Any] = field(default_factory=dict)
+    audio: Optional[IngestedAudio] = None
+    error: Optional[BaseException] = None
+
+    def discard_audio(self) -> None:
+        if self.audio is not None and not self.audio.checkpointed:
+            self.audio.audio_path.unlink(missing_ok=True)
+        self.audio = None
+
+
+def _prefetch(
+    job_id: str,
+    workspace_id: str,
+    payload: Optional[Dict[str, Any]] = None,
+    *,
+    on_renew: Optional[Callable[[], None]] = None,
+) -> PrefetchResult:
+    job_logger = get_logger("prefetch", job_id=job_id)
+    job_ref = workspace_job_ref(workspace_id, job_id)
+    try:
+        lease_ok, info = acquire_lease(
+            job_ref,
+            reel_ref_for=lambda reel: workspace_reel_ref(workspace_id, reel),
+            reel_id=(payload or {}).get("reelId"),
+        )
+    except Exception as exc:
+        job_logger.warning("Prefetch lease failed: %s", exc)
+        return PrefetchResult()
+    if not lease_ok:
+        return PrefetchResult()
+
+    result = PrefetchResult(
+        lease_token=info["leaseToken"],
+        heartbeat=LeaseHeartbeat(job_ref, info["leaseToken"], logger=job_logger, on_renew=on_renew).start(),
+        job=info["job"],
+        reel=info["reel"],
+    )
+    job_data = info["job"]
+    result.heartbeat.add_renew_callback(partial(refresh_claim, workspace_id, job_data.get("reelId"), job_id))
+    key = checkpoint_key(workspace_id, job_data.get("reelId"), job_id)
+    if key:
+        result.heartbeat.add_renew_callback(partial(touch_checkpoint, key))
+    try:
+        if result.reel.get("transcriptText"):
+            return result
+        job_logger.info("Prefetching audio")
+        result.audio = ingest_audio(
+            job_id,
+            job_data.get("reelUrl"),
+            job_logger,
+            checkpoint_key=key,
+            on_stage=lambda name: fenced_commit(
+                job_ref, info["leaseToken"], {"stage": name, "updatedAt": firestore.SERVER_TIMESTAMP}
+            ),
+        )
+    except Exception as exc:
+        result.error = exc
+    if result.heartbeat.lost:
+        job_logger.warning("Lease lost while prefetching, dropping audio")
+        result.discard_audio()
+    return result
+
+
+class Prefetcher:
+    """Claims up to ``depth`` queued jobs ahead of the worker and ingests their audio.
+
+    Claimed jobs leave the RQ queue and wait in a local buffer until a worker asks
+    for its next job, so queue wait overlaps the current transcription. Each claim
+    also parks a delayed retry past the lease expiry, pushed back on every lease
+    renewal while the job waits; if this process dies, the promoter puts the job
+    back on the queue.
+    """
+
+    def __init__(self, depth: int, connection: Redis) -> None:
+        self.depth = depth
+        self.connection = connection
+        self.queue = Queue(QUEUE_NAME, connection=connection)
+        self._buffer: Deque[Tuple[Job, Queue]] = deque()
+        self._pending: Dict[str, Future] = {}
+        self._parked: Set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=depth, thread_name_prefix="prefetch")
+
+    def next_job(self) -> Optional[Tuple[Job, Queue]]:
+        with self._lock:
+            if not self._buffer:
+                return None
+            job, queue = self._buffer.popleft()
+            if job.func_name == PROCESS_JOB:
+                self._unpark(*job.args[:2])
+        return job, queue
+
+    def _unpark(self, job_id: str, workspace_id: str) -> None:
+        # Callers hold the lock, so a concurrent renewal cannot park the retry again.
+        self._parked.discard(job_id)
+        cancel_retry(job_id, workspace_id)
+
+    def _repark(self, job_id: str, workspace_id: str) -> None:
+        with self._lock:
+            if job_id in self._parked:
+                schedule_retry(job_id, workspace_id, get_settings().LEASE_SECONDS + LEASE_RETRY_JITTER_SECONDS)
+
+    def fill(self) -> None:
+        with self._lock:
+            while len(self._buffer) < self.depth:
+                # Queue.pop_job_id chokes on an empty queue, so pop directly.
+                raw = self.connection.lpop(self.queue.key)
+                if raw is None:
+                    return
+                job = self.queue.fetch_job(raw.decode())
+                if job is None:
+                    continue
+                if job.func_name == PROCESS_JOB:
+                    job_id, workspace_id = job.args[:2]
+                    if job_id in self._pending:
+                        # The safety-net retry fired while we still hold the job.
+                        logger.warning("Dropping duplicate of prefetched job jobId=%s", job_id)
+                        continue
+                    self._parked.add(job_id)
+                    schedule_retry(job_id, workspace_id, get_settings().LEASE_SECONDS + LEASE_RETRY_JITTER_SECONDS)
+                    self._pending[job_id] = self._executor.submit(
+                        _prefetch, *job.args[:3], on_renew=partial(self._repark, job_id, workspace_id)
+                    )
+                self._buffer.append((job, self.queue))
+
+    def take(self, job_id: str) -> Optional[PrefetchResult]:
+        with self._lock:
+            future = self._pending.pop(job_id, None)
+        return future.result() if future is not None else None
+
+    def _release(self, job_id: str, workspace_id: str) -> None:
+        result = self.take(job_id)
+        if result is not None and result.lease_token is not None:
+            result.heartbeat.stop()
+            result.discard_audio()
+            try:
+                release_lease(workspace_job_ref(workspace_id, job_id), result.lease_token)
+            except Exception as exc:
+                logger.warning("Releasing prefetched lease failed jobId=%s: %s", job_id, exc)
+        with self._lock:
+            self._unpark(job_id, workspace_id)
+
+    def shutdown(self) -> None:
+        """Hand unstarted jobs and their leases back to the queue."""
+        with self._lock:
+            buffered = list(self._buffer)
+            self._buffer.clear()
+        for job, queue in reversed(buffered):
+            if job.func_name == PROCESS_JOB:
+                self._release(*job.args[:2])
+            queue.push_job_id(job.id, at_front=True)
+        self._executor.shutdown(wait=True)
+        if buffered:
+            logger.info("Returned prefetched jobs count=%s", len(buffered))
+
+
+_prefetcher: Optional[Prefetcher] = None
+
+
+def start_prefetcher(depth: int, connection: Redis) -> Optional[Prefetcher]:
+    global _prefetcher
+    _prefetcher = Prefetcher(depth, connection) if depth > 0 else None
+    return _prefetcher
+
+
+def get_prefetcher() -> Optional[Prefetcher]:
+    return _prefetcher
+
+
+def take_prefetched(job_id: str) -> Optional[PrefetchResult]:
+    return _prefetcher.take(job_id) if _prefetcher is not None else None
@@ -0,0 +1,70 @@
+import pytest
+from rq import Queue
+
+from app.jobs.enqueue import QUEUE_NAME, enqueue_job
+from app.jobs.lease import LeaseHeartbeat
+from app.jobs.retry import DELAYED_KEY
+from app.services.firestore import workspace_job_ref
+from app.workers import prefetch
+from app.workers.prefetch import Prefetcher, PrefetchResult
+
+
+@pytest.fixture
+def prefetcher(fake_firestore, fake_redis, monkeypatch):
+    def leased(job_id, workspace_id, payload=None, *, on_renew=None):
+        # What a successful claim leaves behind: lease token 1, one attempt used.
+        job_ref = workspace_job_ref(workspace_id, job_id)
+        fake_firestore.docs[job_ref.path] = {"status": "running", "leaseToken": 1, "attempts": 1}
+        return PrefetchResult(lease_token=1, heartbeat=LeaseHeartbeat(job_ref, 1))
+
+    monkeypatch.setattr(prefetch, "_prefetch", leased)
+    yield Prefetcher(depth=2, connection=fake_redis)
+
+
+def _queue(redis) -> Queue:
+    return Queue(QUEUE_NAME, connection=redis)
+
+
+def _delayed(redis) -> list:
+    return [member.decode() for member in redis.zrange(DELAYED_KEY, 0, -1)]
+
+
+def test_next_job_cancels_the_parked_retry(prefetcher, fake_redis):
+    enqueue_job("j1", "w1")
+    prefetcher.fill()
+    assert len(_delayed(fake_redis)) == 1
+
+    job, _ = prefetcher.next_job()
+    assert job.args[:2] == ("j1", "w1")
+    assert _delayed(fake_redis) == []
+    assert prefetcher.next_job() is None
+
+
+def test_duplicate_of_a_prefetched_job_is_dropped(prefetcher, fake_redis):
+    enqueue_job("j1", "w1")
+    # The safety-net retry fired while the first copy waited in the buffer.
+    enqueue_job("j1", "w1")
+    prefetcher.fill()
+
+    job, _ = prefetcher.next_job()
+    assert job.args[0] == "j1"
+    assert prefetcher.next_job() is None
+    assert _queue(fake_redis).count == 0
+
+
+def test_shutdown_returns_jobs_to_the_front_and_releases_leases(prefetcher, fake_firestore, fake_redis):
+    enqueue_job("j1", "w1")
+    enqueue_job("j2", "w1")
+    queue = _queue(fake_redis)
+    order = queue.job_ids
+    prefetcher.fill()
+    enqueue_job("j3", "w1")
+
+    prefetcher.shutdown()
+
+    assert queue.job_ids[:2] == order
+    assert [job.args[0] for job in queue.jobs] == ["j1", "j2", "j3"]
+    assert _delayed(fake_redis) == []
+    for job_id in ("j1", "j2"):
+        doc = fake_firestore.docs[workspace_job_ref("w1", job_id).path]
+        assert (doc["status"], doc["attempts"]) == ("queued", 0)
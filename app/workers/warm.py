@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import resource
+import signal
+import threading
+import time
+from typing import Callable
+
+from rq import SimpleWorker
+from rq.timeouts import TimerDeathPenalty
+
+from app.config import get_settings
+from app.jobs.enqueue import worker_queues
+from app.jobs.retry import DelayedJobPromoter
+from app.services.firestore import get_firestore_client
+from app.services.http_client import get_http_client
+from app.services.redis_client import get_redis
+from app.utils.logging import setup_logging
+from app.utils.stages import cpu_count
+from app.workers.prefetch import get_prefetcher, start_prefetcher
+
+
+RESTART_BACKOFF_SECONDS = 2.0
+SLOT_POLL_SECONDS = 5
+
+logger = logging.getLogger(__name__)
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the peak, in KiB on Linux; good enough as a fallback.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def warm_up() -> None:
+    """Create the long-lived clients once so jobs reuse their connections."""
+    get_firestore_client()
+    get_redis().ping()
+    get_http_client()
+
+
+class WarmWorker(SimpleWorker):
+    """Runs jobs in-process and stops itself once memory grows past the limit."""
+
+    def execute_job(self, job, queue):
+        super().execute_job(job, queue)
+        limit = get_settings().WORKER_MAX_RSS_MB
+        rss = current_rss_mb()
+        if limit and rss > limit:
+            self.log.warning("Worker RSS %.0fMB over %sMB, recycling", rss, limit)
+            self.request_recycle()
+
+    def request_recycle(self) -> None:
+        self._stop_requested = True
+
+    def dequeue_job_and_maintain_ttl(self, timeout, max_idle_time=None):
+        prefetcher = get_prefetcher()
+        if prefetcher is None:
+            return super().dequeue_job_and_maintain_ttl(timeout, max_idle_time=max_idle_time)
+
+        result = prefetcher.next_job()
+        if result is not None:
+            self.heartbeat()
+            job, queue = result
+            job.redis_server_version = self.get_redis_server_version()
+            self.log.info("%s: %s (prefetched)", queue.name, job.id)
+        else:
+            result = super().dequeue_job_and_maintain_ttl(timeout, max_idle_time=max_idle_time)
+        if result is not None:
+            # Claim what comes next while this job runs.
+            try:
+                prefetcher.fill()
+            except Exception as exc:
+                self.log.warning("Prefetch failed: %s", exc)
+        return result
+
+
+class SlotWorker(WarmWorker):
+    """A WarmWorker that runs on a non-main thread next to other slots.
+
+    Job timeouts use timers instead of SIGALRM, signals are left to the serving
+    thread, and dequeueing wakes up regularly so a stop request is noticed.
+    """
+
+    death_penalty_class = TimerDeathPenalty
+
+    def __init__(self, *args, on_recycle: Callable[[], None] | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._on_recycle = on_recycle
+
+    def _install_signal_handlers(self) -> None:
+        pass
+
+    def dequeue_job_and_maintain_ttl(self, timeout, max_idle_time=None):
+        while not self._stop_requested:
+            result = super().dequeue_job_and_maintain_ttl(timeout, max_idle_time=SLOT_POLL_SECONDS)
+            if result is not None:
+                return result
+        return None
+
+    def request_recycle(self) -> None:
+        if self._on_recycle:
+            self._on_recycle()
+        else:
+            super().request_recycle()
+
+    def request_slot_stop(self) -> None:
+        self._stop_requested = True
+
+
+def slot_count() -> int:
+    settings = get_settings()
+    return settings.WORKER_SLOTS or cpu_count() * settings.WORKER_SLOTS_PER_CORE
+
+
+def _serve_slots(slots: int) -> None:
+    settings = get_settings()
+    workers: list[SlotWorker] = []
+
+    def stop_all() -> None:
+        for worker in workers:
+            worker.request_slot_stop()
+
+    def on_signal(_signum, _frame) -> None:
+        logger.info("Stopping %s slots after their current jobs", len(workers))
+        stop_all()
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+
+    for _ in range(slots):
+        workers.append(
+            SlotWorker(
+                worker_queues(get_redis()),
+                connection=get_redis(),
+                on_recycle=stop_all,
+            )
+        )
+    threads = [
+        threading.Thread(
+            target=worker.work,
+            kwargs={"with_scheduler": False, "max_jobs": settings.WORKER_MAX_JOBS or None},
+            name=f"slot-{index}",
+        )
+        for index, worker in enumerate(workers)
+    ]
+    logger.info("Starting threaded worker slots=%s", slots)
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def _serve() -> None:
+    settings = get_settings()
+    setup_logging(settings.LOG_LEVEL)
+    warm_up()
+
+    promoter = DelayedJobPromoter()
+    promoter.start()
+    prefetcher = start_prefetcher(settings.PREFETCH_DEPTH, get_redis())
+    try:
+        if settings.WORKER_MODE == "threaded":
+            _serve_slots(slot_count())
+        else:
+            worker = WarmWorker(worker_queues(get_redis()), connection=get_redis())
+            worker.work(with_scheduler=False, max_jobs=settings.WORKER_MAX_JOBS or None)
+    finally:
+        if prefetcher is not None:
+            prefetcher.shutdown()
+        promoter.stop()
+
+
+def run_warm_worker() -> None:
+    """Supervise a warm worker process, restarting it after recycling or a crash.
+
+    Clients are only created in the child, so the supervisor never holds gRPC or
+    HTTP state across a fork.
+    """
+    settings = get_settings()
+    setup_logging(settings.LOG_LEVEL)
+    ctx = multiprocessing.get_context("spawn")
+    stopping = False
+    child = None
+
+    def forward(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        if child is not None and child.is_alive():
+            os.kill(child.pid, signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+
+    while not stopping:
+        child = ctx.Process(target=_serve, name="warm-worker")
+        child.start()
+        child.join()
+        if stopping:
+            break
+        if child.exitcode == 0:
+            logger.info("Warm worker recycled, starting a fresh process")
+        else:
+            logger.error("Warm worker exited with code %s, restarting", child.exitcode)
+            time.sleep(RESTART_BACKOFF_SECONDS)
@@ -1,132 +1,323 @@
 from __future__ import annotations
 
+import logging
 import os
+from functools import partial
 from pathlib import Path
+from typing import Any, Dict, Optional
 
 from google.cloud import firestore
 from redis import Redis
-from rq import Connection, Queue, Worker
+from rq import Worker
 
 from app.config import get_settings
-from app.jobs.enqueue import enqueue_job
-from app.jobs.lease import acquire_lease
-from app.services.downloader import DownloadError, download_instagram
-from app.services.ffmpeg import FfmpegError, extract_audio
-from app.services.firestore import workspace_job_ref, workspace_reel_ref
+from app.jobs.enqueue import worker_queues
+from app.jobs.lease import LeaseHeartbeat, LeaseLostError, acquire_lease, fenced_commit
+from app.jobs.retry import DelayedJobPromoter, backoff_delay, lease_retry_delay, schedule_retry
+from app.jobs.singleflight import refresh_claim, release
+from app.services.chunk_checkpoints import RedisChunkCheckpoints
+from app.services.downloader import DownloadError
+from app.services.ffmpeg import FfmpegError
+from app.services.firestore import get_firestore_client, workspace_job_ref, workspace_reel_ref
+from app.services.hashing import sha256_file
+from app.services.ingest import ingest_audio
+from app.services.media_probe import NoAudioStreamError
+from app.services.stage_cache import (
+    PERSISTED,
+    TRANSCRIBED,
+    DiskChunkCheckpoints,
+    checkpoint_key as stage_checkpoint_key,
+    clear_checkpoints,
+    touch_checkpoint,
+    load_checkpoint,
+    save_checkpoint,
+)
+from app.services.transcript_cache import get_cached_transcript, store_transcript
 from app.services.transcription_router import route_transcription
 from app.services.whisper import WhisperError
 from app.utils.logging import get_logger, setup_logging
+from app.utils.stages import IO, stage
 from app.utils.time import utc_now
+from app.workers.prefetch import take_prefetched
+from app.workers.warm import run_warm_worker
 
 
-def process_job(job_id: str, workspace_id: str) -> None:
+def finish_followers(
+    workspace_id: str,
+    reel_id: str,
+    job_id: str,
+    fields: Dict[str, Any],
+    logger: logging.LoggerAdapter,
+) -> None:
+    try:
+        followers = release(workspace_id, reel_id, job_id)
+        if not followers:
+            return
+        batch = get_firestore_client().batch()
+        for follower_id in followers:
+            batch.set(workspace_job_ref(workspace_id, follower_id), fields, merge=True)
+        with stage(IO):
+            batch.commit()
+        logger.info("Resolved followers count=%s", len(followers))
+    except Exception as exc:
+        logger.warning("Resolving followers failed: %s", exc)
+
+
+def fail_followers(
+    workspace_id: str,
+    reel_id: Optional[str],
+    job_id: str,
+    error: str,
+    logger: logging.LoggerAdapter,
+) -> None:
+    if reel_id:
+        finish_followers(
+            workspace_id,
+            reel_id,
+            job_id,
+            {"status": "failed", "error": error, "updatedAt": firestore.SERVER_TIMESTAMP},
+            logger,
+        )
+
+
+def abandon_lost_lease(
+    job_ref: firestore.DocumentReference,
+    workspace_id: str,
+    reel_id: Optional[str],
+    job_id: str,
+    logger: logging.LoggerAdapter,
+) -> None:
+    """Fail the followers of a leader whose lease was lost because its job doc is gone.
+
+    Any other lost lease was taken by a newer run of the same job, which resolves them.
+    """
+    try:
+        with stage(IO):
+            exists = job_ref.get().exists
+    except Exception as exc:
+        logger.warning("Checking lost job failed: %s", exc)
+        return
+    if not exists:
+        fail_followers(workspace_id, reel_id, job_id, "Job not found", logger)
+
+
+def transcript_fields(whisper_response: Dict[str, Any], audio_hash: str) -> Dict[str, Any]:
+    return {
+        "status": "new",
+        "transcriptText": whisper_response.get("text") or whisper_response.get("transcript"),
+        "transcriptSegments": whisper_response.get("segments"),
+        "durationSeconds": whisper_response.get("duration") or whisper_response.get("durationSeconds"),
+        "audioHash": audio_hash,
+        "scrapedAt": firestore.SERVER_TIMESTAMP,
+        "updatedAt": firestore.SERVER_TIMESTAMP,
+    }
+
+
+def process_job(job_id: str, workspace_id: str, payload: Optional[Dict[str, Any]] = None) -> None:
     settings = get_settings()
     logger = get_logger("worker", job_id=job_id)
+    payload = payload or {}
 
     job_ref = workspace_job_ref(workspace_id, job_id)
-    lease_ok, info = acquire_lease(job_ref)
-    if not lease_ok:
-        status = info.get("status")
-        if status == "leased":
-            enqueue_job(job_id, workspace_id)
-        return
-
-    job_snapshot = job_ref.get()
-    if not job_snapshot.exists:
-        logger.error("Job not found")
-        return
+    prefetched = take_prefetched(job_id)
+    if prefetched is not None and prefetched.lease_token is not None:
+        lease_token = prefetched.lease_token
+        heartbeat = prefetched.heartbeat
+        job_data, reel_data = prefetched.job, prefetched.reel
+        if heartbeat.lost:
+            logger.warning("Abandoning prefetched job: lease lost")
+            prefetched.discard_audio()
+            return
+    else:
+        prefetched = None
+        # The lease transaction hands back the job and reel docs it read.
+        lease_ok, info = acquire_lease(
+            job_ref,
+            reel_ref_for=lambda reel: workspace_reel_ref(workspace_id, reel),
+            reel_id=payload.get("reelId"),
+        )
+        if not lease_ok:
+            status = info.get("status")
+            if status == "leased":
+                remaining = (info["leaseUntil"] - utc_now()).total_seconds()
+                schedule_retry(job_id, workspace_id, lease_retry_delay(remaining))
+            elif info.get("error"):
+                logger.error(info["error"])
+                fail_followers(workspace_id, payload.get("reelId"), job_id, info["error"], logger)
+            return
+        lease_token = info["leaseToken"]
+        job_data, reel_data = info["job"], info["reel"]
+        heartbeat = LeaseHeartbeat(job_ref, lease_token, logger=logger).start()
 
-    job_data = job_snapshot.to_dict() or {}
     reel_id = job_data.get("reelId")
-    reel_url = job_data.get("reelUrl")
+    reel_url = job_data.get("reelUrl") or payload.get("reelUrl")
     source = job_data.get("source", "instagram")
     attempts = int(job_data.get("attempts", 1))
 
     reel_ref = workspace_reel_ref(workspace_id, reel_id)
-    reel_snapshot = reel_ref.get()
-    reel_data = reel_snapshot.to_dict() if reel_snapshot.exists else {}
 
     if reel_data.get("transcriptText"):
-        job_ref.update(
-            {
-                "status": "completed",
-                "updatedAt": firestore.SERVER_TIMESTAMP,
-                "leaseUntil": utc_now(),
-            }
+        heartbeat.stop()
+        if prefetched is not None:
+            prefetched.discard_audio()
+        try:
+            fenced_commit(
+                job_ref,
+                lease_token,
+                {
+                    "status": "completed",
+                    "updatedAt": firestore.SERVER_TIMESTAMP,
+                    "leaseUntil": utc_now(),
+                },
+            )
+        except LeaseLostError as exc:
+            logger.warning("Skipping completion: %s", exc)
+            abandon_lost_lease(job_ref, workspace_id, reel_id, job_id, logger)
+            return
+        finish_followers(
+            workspace_id,
+            reel_id,
+            job_id,
+            {"status": "completed", "error": None, "updatedAt": firestore.SERVER_TIMESTAMP},
+            logger,
         )
         return
 
-    tmp_dir = Path(settings.TMP_DIR)
-    video_path = tmp_dir / f"{job_id}.mp4"
-    audio_path = tmp_dir / f"{job_id}.mp3"
+    if prefetched is None:
+        # A prefetched heartbeat already keeps the in-flight claim alive.
+        heartbeat.add_renew_callback(partial(refresh_claim, workspace_id, reel_id, job_id))
+    checkpoint_key = stage_checkpoint_key(workspace_id, reel_id, job_id)
+    if checkpoint_key:
+        heartbeat.add_renew_callback(partial(touch_checkpoint, checkpoint_key))
+    audio_path: Path | None = None
 
-    try:
-        logger.info("Downloading video")
-        download_instagram(reel_url, video_path)
-
-        logger.info("Extracting audio")
-        extract_audio(video_path, audio_path)
+    def mark_stage(name: str) -> None:
+        fenced_commit(job_ref, lease_token, {"stage": name, "updatedAt": firestore.SERVER_TIMESTAMP})
 
-        logger.info("Routing transcription")
-        whisper_response = route_transcription(
-            video_path,
-            audio_path,
-            logger=logger,
-        )
-
-        transcript_text = whisper_response.get("text") or whisper_response.get("transcript")
-        segments = whisper_response.get("segments")
-        duration = whisper_response.get("duration") or whisper_response.get("durationSeconds")
+    try:
+        transcribed = load_checkpoint(checkpoint_key, TRANSCRIBED) if checkpoint_key else None
+        if transcribed is not None:
+            logger.info("Resuming from %s checkpoint", TRANSCRIBED)
+            whisper_response, audio_hash = transcribed["result"], transcribed["audioHash"]
+            if prefetched is not None:
+                prefetched.discard_audio()
+        else:
+            if prefetched is not None and prefetched.error is not None:
+                raise prefetched.error
+            if prefetched is not None and prefetched.audio is not None:
+                logger.info("Using prefetched audio")
+                ingested = prefetched.audio
+            else:
+                ingested = ingest_audio(
+                    job_id, reel_url, logger, checkpoint_key=checkpoint_key, on_stage=mark_stage
+                )
+            media = ingested.media
+            if not ingested.checkpointed:
+                audio_path = ingested.audio_path
 
-        reel_ref.set(
-            {
-                "status": "new",
-                "transcriptText": transcript_text,
-                "transcriptSegments": segments,
-                "durationSeconds": duration,
-                "scrapedAt": firestore.SERVER_TIMESTAMP,
-                "updatedAt": firestore.SERVER_TIMESTAMP,
-            },
-            merge=True,
-        )
+            audio_hash = sha256_file(ingested.audio_path)
+            whisper_response = get_cached_transcript(audio_hash, logger=logger)
+            if whisper_response is not None:
+                logger.info("Transcript cache hit audioHash=%s", audio_hash)
+            else:
+                heartbeat.check()
+                if settings.CHUNK_CHECKPOINTS_ENABLED:
+                    chunk_checkpoints = RedisChunkCheckpoints(audio_hash, logger=logger)
+                else:
+                    chunk_checkpoints = DiskChunkCheckpoints(checkpoint_key) if checkpoint_key else None
+                logger.info("Routing transcription")
+                whisper_response = route_transcription(
+                    ingested.audio_path,
+                    media=media,
+                    checkpoints=chunk_checkpoints,
+                    logger=logger,
+                )
+                store_transcript(audio_hash, whisper_response, logger=logger)
+                if settings.CHUNK_CHECKPOINTS_ENABLED:
+                    chunk_checkpoints.clear()
+            if checkpoint_key:
+                save_checkpoint(checkpoint_key, TRANSCRIBED, {"result": whisper_response, "audioHash": audio_hash})
+                mark_stage(TRANSCRIBED)
 
-        job_ref.update(
+        heartbeat.stop()
+        fenced_commit(
+            job_ref,
+            lease_token,
             {
                 "status": "completed",
+                "stage": PERSISTED,
                 "error": None,
                 "updatedAt": firestore.SERVER_TIMESTAMP,
                 "leaseUntil": utc_now(),
-            }
+            },
+            writes=[(reel_ref, transcript_fields(whisper_response, audio_hash))],
         )
+        if checkpoint_key:
+            clear_checkpoints(checkpoint_key)
+        finish_followers(
+            workspace_id,
+            reel_id,
+            job_id,
+            {"status": "completed", "error": None, "updatedAt": firestore.SERVER_TIMESTAMP},
+            logger,
+        )
+    except LeaseLostError as exc:
+        logger.warning("Abandoning job: %s", exc)
+        abandon_lost_lease(job_ref, workspace_id, reel_id, job_id, logger)
     except (DownloadError, FfmpegError, WhisperError, Exception) as exc:
         logger.error(f"Job failed: {exc}")
-        job_ref.update(
-            {
-                "status": "failed",
-                "error": str(exc),
-                "updatedAt": firestore.SERVER_TIMESTAMP,
-                "leaseUntil": utc_now(),
-            }
-        )
-        if attempts < settings.MAX_ATTEMPTS:
-            enqueue_job(job_id, workspace_id)
+        heartbeat.stop()
+        try:
+            fenced_commit(
+                job_ref,
+                lease_token,
+                {
+                    "status": "failed",
+                    "error": str(exc),
+                    "updatedAt": firestore.SERVER_TIMESTAMP,
+                    "leaseUntil": utc_now(),
+                },
+            )
+        except LeaseLostError as lost:
+            logger.warning("Skipping failure update: %s", lost)
+            abandon_lost_lease(job_ref, workspace_id, reel_id, job_id, logger)
+            return
+        if attempts < settings.MAX_ATTEMPTS and not isinstance(exc, NoAudioStreamError):
+            delay = backoff_delay(
+                attempts, base=settings.RETRY_BASE_SECONDS, cap=settings.RETRY_MAX_SECONDS
+            )
+            logger.info("Retry scheduled in %.1fs", delay)
+            schedule_retry(job_id, workspace_id, delay)
+        else:
+            if checkpoint_key:
+                clear_checkpoints(checkpoint_key)
+            fail_followers(workspace_id, reel_id, job_id, str(exc), logger)
     finally:
-        for path in (video_path, audio_path):
-            try:
-                if path.exists():
-                    path.unlink()
-            except Exception:
-                pass
+        heartbeat.stop()
+        try:
+            if audio_path and audio_path.exists():
+                audio_path.unlink()
+        except Exception:
+            pass
 
 
 def run_worker() -> None:
     settings = get_settings()
     setup_logging(settings.LOG_LEVEL)
 
+    if settings.WORKER_MODE in ("warm", "threaded"):
+        run_warm_worker()
+        return
+
+    promoter = DelayedJobPromoter()
+    promoter.start()
+
     redis_conn = Redis.from_url(settings.REDIS_URL)
-    with Connection(redis_conn):
-        worker = Worker([Queue("sources")])
+    try:
+        worker = Worker(worker_queues(redis_conn), connection=redis_conn)
         worker.work(with_scheduler=False)
+    finally:
+        promoter.stop()
 
 
 if __name__ == "__main__":
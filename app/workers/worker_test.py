@@ -0,0 +1,42 @@
+import logging
+
+from app.jobs.singleflight import claim_or_attach
+from app.services.firestore import workspace_job_ref
+from app.workers.worker import abandon_lost_lease, process_job
+
+
+logger = logging.LoggerAdapter(logging.getLogger(__name__), {})
+
+
+def _follow(fake_firestore, leader: str, follower: str) -> str:
+    assert claim_or_attach("w1", "r1", leader) is None
+    assert claim_or_attach("w1", "r1", follower) == leader
+    path = workspace_job_ref("w1", follower).path
+    fake_firestore.docs[path] = {"status": "queued", "leaderJobId": leader}
+    return path
+
+
+def test_missing_leader_job_fails_its_followers(fake_firestore, fake_redis):
+    follower = _follow(fake_firestore, "leader", "follower")
+
+    process_job("leader", "w1", {"reelId": "r1"})
+
+    assert fake_firestore.docs[follower]["status"] == "failed"
+    assert fake_firestore.docs[follower]["error"] == "Job not found"
+    assert claim_or_attach("w1", "r1", "next") is None
+
+
+def test_lost_lease_fails_followers_only_when_the_job_is_gone(fake_firestore, fake_redis):
+    follower = _follow(fake_firestore, "leader", "follower")
+    job_ref = workspace_job_ref("w1", "leader")
+    fake_firestore.docs[job_ref.path] = {"status": "running", "leaseToken": 2}
+
+    # A newer run of the same job holds the lease and resolves the followers itself.
+    abandon_lost_lease(job_ref, "w1", "r1", "leader", logger)
+    assert fake_firestore.docs[follower]["status"] == "queued"
+    assert claim_or_attach("w1", "r1", "resubmit") == "leader"
+
+    del fake_firestore.docs[job_ref.path]
+    abandon_lost_lease(job_ref, "w1", "r1", "leader", logger)
+    assert fake_firestore.docs[follower]["status"] == "failed"
+    assert claim_or_attach("w1", "r1", "next") is None
@@ -0,0 +1,52 @@
+"""Measure POST /v1/transcribe latency against a running API.
+
+Point the API at the Firestore emulator (FIRESTORE_EMULATOR_HOST) and a scratch
+Redis, then run before and after a change:
+
+    API_URL=http://localhost:8000 TOKEN=... REQUESTS=500 CONCURRENCY=8 PYTHONPATH=. python scripts/bench_transcribe.py
+
+Percentiles use the router's nearest-rank definition, so the numbers compare directly.
+"""
+import os
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from app.services.provider_stats import percentile
+
+API_URL = os.getenv("API_URL", "http://localhost")
+TOKEN = os.getenv("TOKEN", "")
+REQUESTS = int(os.getenv("REQUESTS", "200"))
+CONCURRENCY = int(os.getenv("CONCURRENCY", "8"))
+WORKSPACE_ID = os.getenv("WORKSPACE_ID", "BENCH")
+
+headers = {"Authorization": f"Bearer {TOKEN}", "Content-Type": "application/json"}
+session = requests.Session()
+
+
+def submit(_: int) -> float:
+    payload = {
+        "workspaceId": WORKSPACE_ID,
+        "source": "instagram",
+        # A fresh reel each time so every request takes the full submit path.
+        "reelUrl": f"https://www.instagram.com/reel/{uuid.uuid4().hex[:11]}/",
+        "postedAt": None,
+        "metadata": {},
+    }
+    start = time.perf_counter()
+    resp = session.post(f"{API_URL}/v1/transcribe", json=payload, headers=headers, timeout=30)
+    elapsed = time.perf_counter() - start
+    resp.raise_for_status()
+    return elapsed
+
+
+submit(0)  # warm up connections and the workspace root
+with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+    latencies = list(pool.map(submit, range(REQUESTS)))
+
+print(f"requests={REQUESTS} concurrency={CONCURRENCY}")
+print(f"p50={percentile(latencies, 50) * 1000:.1f}ms p99={percentile(latencies, 99) * 1000:.1f}ms "
+      f"mean={statistics.mean(latencies) * 1000:.1f}ms")